@@ -0,0 +1,59 @@
+import datetime
+
+import numpy as np
+
+
+def _iso_year_week(days):
+    # days is datetime64[D]; 1970-01-01 was a Thursday, so Monday == 0 below
+    ordinals = days.astype('int64')
+    weekday = (ordinals + 3) % 7
+    thursday = (ordinals - weekday + 3).astype('datetime64[D]')
+    iso_year = thursday.astype('datetime64[Y]')
+    week = (thursday - iso_year.astype('datetime64[D]')).astype('int64') // 7 + 1
+    return iso_year.astype('int64') + 1970, week
+
+
+def _counts(keys):
+    values, counts = np.unique(keys, return_counts=True)
+    return values, counts.tolist()
+
+
+def compute_stats(timestamps_ms, start=None, end=None, today=None):
+    """Daily, ISO-weekly and monthly application counts from epoch-ms timestamps.
+
+    Days are UTC, matching how the dashboard has always bucketed dates.
+    start/end (inclusive datetime.date) limit the series; the today /
+    yesterday / last-7-days totals and the daily average cover everything.
+    """
+    today = today or datetime.datetime.now(datetime.timezone.utc).date()
+    days = np.asarray(timestamps_ms, dtype='int64').astype('datetime64[ms]').astype('datetime64[D]')
+
+    today64 = np.datetime64(today, 'D')
+    _, all_daily = _counts(days)
+    stats = {
+        'total': int(days.size),
+        'today': int(np.count_nonzero(days == today64)),
+        'yesterday': int(np.count_nonzero(days == today64 - 1)),
+        # Same inclusive window the dashboard used: on or after today - 7 days
+        'last_7_days': int(np.count_nonzero(days >= today64 - 7)),
+        'avg_per_day': round(float(np.mean(all_daily)), 2) if all_daily else 0,
+    }
+
+    if start is not None:
+        days = days[days >= np.datetime64(start, 'D')]
+    if end is not None:
+        days = days[days <= np.datetime64(end, 'D')]
+    stats['range'] = {'start': start.isoformat() if start else None,
+                      'end': end.isoformat() if end else None,
+                      'total': int(days.size)}
+
+    dates, counts = _counts(days)
+    stats['daily'] = {'date': [str(d) for d in dates], 'applications': counts}
+
+    year, week = _iso_year_week(days)
+    weeks, counts = _counts(year * 100 + week)
+    stats['weekly'] = {'week': [f"{w // 100}-W{w % 100:02d}" for w in weeks.tolist()], 'applications': counts}
+
+    months, counts = _counts(days.astype('datetime64[M]'))
+    stats['monthly'] = {'month': [str(m) for m in months], 'applications': counts}
+    return stats
@@ -1,10 +1,29 @@
 import os
 import json
-from flask import Flask, redirect, request, session, jsonify
+import time
+import datetime
+import hashlib
+import itertools
+import secrets
+import tempfile
+import httplib2
+from flask import Flask, Response, g, redirect, request, session, jsonify, stream_with_context
+from itsdangerous import BadSignature, URLSafeTimedSerializer
 from google_auth_oauthlib.flow import Flow
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+
+from aggregates import compute_stats
+from cache import CACHE_URL, LRUCache, make_cache
+from email_status import classifier as status_classifier
+from export import ARROW_STREAM, FORMATS as EXPORT_FORMATS, arrow_stream_chunks, export_chunks
+import gmail_client
+import metrics
+from gmail_scheduler import GmailScheduler, is_rate_limited
+from mailbox_store import MailboxStore, account_key, token_key
+from mbox_import import iter_mbox_rows
+from mailbox_sync import FULL_SYNC_STALE_SECONDS, SyncInProgress, incremental_sync, iter_resync_pages, sync_mailbox
+from search_index import SearchIndex, parse_query
+from warmup import Prefetcher
 
 app = Flask(__name__)
 app.secret_key = os.environ.get("FLASK_SECRET_KEY", "dev-secret")
@@ -21,7 +40,127 @@ REDIRECT_URI = f"{BACKEND_BASE}/callback"
 CLIENT_JSON = json.loads(os.environ["GOOGLE_OAUTH_CLIENT_JSON"])
 CLIENT_ID = CLIENT_JSON['web']['client_id']
 CLIENT_SECRET = CLIENT_JSON['web']['client_secret']
-TOKEN_URI = 'https://oauth2.googleapis.com/token'
+TOKEN_URI = os.environ.get("GOOGLE_TOKEN_URI", 'https://oauth2.googleapis.com/token')
+
+# Built from the same phrases the status classifier matches, so the mailbox
+# copy holds rejections, interviews and offers as well as applications
+JOB_EMAIL_QUERY = status_classifier.gmail_query()
+
+store = MailboxStore()
+scheduler = GmailScheduler()
+# Aggregates for a given store revision and window; keys include the date, so
+# nothing older than a day is ever read again.
+stats_cache = make_cache('stats', maxsize=1000, ttl=24 * 3600)
+# Message metadata shared between workers and instances. Each process's store
+# already holds its own copy, so without a shared backend this would only
+# duplicate it.
+row_cache = make_cache('rows', ttl=30 * 24 * 3600) if CACHE_URL else None
+# Per-process search indexes of the most recently searched mailboxes. They hold
+# live Python objects, so they can't go to a shared cache.
+search_indexes = LRUCache(maxsize=64)
+# Mailboxes synced in the background right after login, so the first
+# Dashboard load reads the store instead of waiting on Gmail
+prefetcher = Prefetcher(store)
+# A mailbox synced this recently is searched as it is, without asking Gmail
+# for history on every query
+SEARCH_SYNC_SECONDS = 60
+SEARCH_LIMIT = 50
+# Largest Takeout mailbox /import takes; bigger ones can still be loaded on the
+# backend host with mbox_import.py
+IMPORT_MAX_BYTES = int(os.environ.get("IMPORT_MAX_BYTES", str(2 * 2**30)))
+IMPORT_CHUNK_BYTES = 2**20
+# OAuth state is signed and timestamped, and kept in Flask's session cookie so
+# the callback only accepts it from the browser that started the login. Both
+# work in any worker or instance.
+state_signer = URLSafeTimedSerializer(app.secret_key, salt='oauth-state')
+OAUTH_STATE_MAX_AGE = 600
+
+
+def parse_since(value):
+    # Accepts a unix timestamp or an ISO date (YYYY-MM-DD, taken as UTC midnight)
+    if not value:
+        return None
+    if value.isdigit():
+        return int(value)
+    try:
+        day = datetime.date.fromisoformat(value)
+    except ValueError:
+        raise ValueError("since must be a unix timestamp or YYYY-MM-DD")
+    return int(datetime.datetime(day.year, day.month, day.day, tzinfo=datetime.timezone.utc).timestamp())
+
+
+def parse_limit(value):
+    if not value:
+        return None
+    if not value.isdigit() or int(value) == 0:
+        raise ValueError("limit must be a positive integer")
+    return int(value)
+
+
+def parse_date(value, name):
+    if not value:
+        return None
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a YYYY-MM-DD date")
+
+
+def counted_pages(pages, timings, failure=None):
+    # Runs while the response streams, after the view has returned. Given a
+    # `failure` dict, an error ends the pages and its message is left there.
+    metrics.set_current(timings)
+    try:
+        for page in pages:
+            metrics.count('emails', len(page))
+            yield page
+    except Exception as e:
+        if failure is None:
+            raise
+        kind, _, message = classify_error(e)
+        metrics.REQUEST_ERRORS.inc(endpoint='emails', kind=kind)
+        failure['error'] = message
+
+
+def ndjson_lines(pages, timings, with_timings=False):
+    failure = {}
+    for page in counted_pages(pages, timings, failure):
+        for info in page:
+            yield json.dumps(info) + "\n"
+    if failure:
+        # Headers are already sent, so report the failure in-band
+        yield json.dumps(failure) + "\n"
+    if with_timings:
+        # The breakdown a Server-Timing header would carry, once it is known
+        yield json.dumps({'timings': timings.as_dict()}) + "\n"
+
+
+def arrow_chunks(pages, timings, with_timings=False):
+    # The same stream as ndjson_lines; the failure and timings go in the last batch's metadata
+    trailer = {}
+
+    def metadata():
+        if with_timings:
+            trailer['timings'] = json.dumps(timings.as_dict())
+        return trailer
+
+    return arrow_stream_chunks(counted_pages(pages, timings, trailer), metadata)
+
+
+@app.before_request
+def start_timings():
+    g.timings = metrics.start_request()
+
+
+@app.after_request
+def record_timings(response):
+    timings = g.timings
+    if not response.is_streamed:
+        response.headers['Server-Timing'] = timings.server_timing()
+    endpoint, method, path = request.endpoint or 'unknown', request.method, request.path
+    # On close, so streamed bodies are timed to their last byte
+    response.call_on_close(lambda: metrics.finish_request(timings, endpoint, method, path, response.status_code))
+    return response
 
 
 @app.route('/login')
@@ -34,16 +173,21 @@ def login():
     authorization_url, state = flow.authorization_url(
         access_type='offline',
         include_granted_scopes='true',
-        prompt='consent'  # helps ensure refresh_token
+        prompt='consent',  # helps ensure refresh_token
+        state=state_signer.dumps(secrets.token_urlsafe(16))
     )
     session['state'] = state
     return redirect(authorization_url)
 
 @app.route('/callback')
 def callback():
-    state = session.get('state')
-    if not state:
+    state = session.pop('state', None)
+    if not state or not secrets.compare_digest(state, request.args.get('state', '')):
         return "Session state missing. Try logging in again.", 400
+    try:
+        state_signer.loads(state, max_age=OAUTH_STATE_MAX_AGE)
+    except BadSignature:
+        return "Login state expired. Try logging in again.", 400
 
     flow = Flow.from_client_config(
         CLIENT_JSON,
@@ -55,8 +199,15 @@ def callback():
     try:
         flow.fetch_token(authorization_response=request.url)
         creds = flow.credentials
-        session['access_token'] = creds.token
-        session['refresh_token'] = creds.refresh_token
+        if creds.refresh_token:
+            # Start filling this user's caches while the browser follows the redirect
+            try:
+                key, _, _ = open_gmail(creds.token, creds.refresh_token)
+            except Exception:
+                # The login still works; the first request looks the account up again
+                app.logger.exception('Could not look up the account to warm up')
+            else:
+                prefetcher.submit(key, warm_mailbox, creds.token, creds.refresh_token)
 
         # Redirect back to Streamlit (public URL), pass tokens via query params
         return redirect(
@@ -65,78 +216,395 @@ def callback():
     except Exception as e:
         return f"Error during callback: {str(e)}", 500
 
+def request_tokens():
+    return request.headers.get('Access-Token'), request.headers.get('Refresh-Token')
+
+
+def open_gmail(access_token, refresh_token):
+    # Returns (user key, credentials, Gmail service), refreshing the token first if needed
+    grant = token_key(refresh_token)
+    creds = gmail_client.SharedCredentials(
+        token=access_token,
+        refresh_token=refresh_token,
+        token_uri=TOKEN_URI,
+        client_id=CLIENT_ID,
+        client_secret=CLIENT_SECRET,
+        scopes=SCOPES,
+        cache_key=grant
+    )
+
+    if creds.expired:
+        creds.refresh(gmail_client.token_request())
+
+    service = gmail_client.build_service(creds)
+    # The store is keyed by account, which outlives the grant; asked of Gmail
+    # once per grant
+    key = store.account(grant)
+    if key is None:
+        profile = scheduler.for_user(grant).execute(service.users().getProfile(userId='me'), 'getProfile')
+        key = account_key(profile['emailAddress'])
+        store.link_account(grant, key)
+    return key, creds, service
+
+
+def warm_mailbox(access_token, refresh_token):
+    # Background job queued at login: what the first Dashboard load would otherwise fetch
+    key, creds, service = open_gmail(access_token, refresh_token)
+    sync_mailbox(service, store, key, JOB_EMAIL_QUERY, **sync_kwargs(key, creds))
+    cached_stats(key, store.revision(key), None, None, datetime.datetime.now(datetime.timezone.utc).date())
+
+
+def sync_in_background(key, access_token, refresh_token):
+    # A full sync can outlast the client's timeout, so /stats leaves it to the
+    # warm-up pool. True if one is now queued or running in any worker.
+    if prefetcher.submit(key, warm_mailbox, access_token, refresh_token):
+        return True
+    return store.full_sync_running(key, FULL_SYNC_STALE_SECONDS)
+
+
+def cached_stats(key, revision, start, end, today):
+    cache_key = (key, revision, start, end, today)
+    result = stats_cache.get(cache_key)
+    if result is None:
+        # The series count applications; other statuses are reported as totals
+        result = compute_stats(store.timestamps(key, status='applied'), start=start, end=end, today=today)
+        result['statuses'] = store.status_counts(key)
+        stats_cache.set(cache_key, result)
+    return result
+
+
+def content_etag(*parts):
+    # Stable for a given user, store revision and set of query parameters
+    return hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+
+
+def not_modified(etag):
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
+
+
+def sync_kwargs(key, creds):
+    return {
+        'calls': scheduler.for_user(key),
+        'http_factory': lambda: gmail_client.authorized_http(creds),
+        'row_cache': row_cache,
+        'classifier': status_classifier,
+    }
+
+
+def classify_error(e):
+    # (kind for the error counter, HTTP status, message) for a failed request
+    if is_rate_limited(e):
+        return 'rate_limited', 429, 'Gmail rate limit reached - try again shortly'
+    if isinstance(e, SyncInProgress):
+        return 'syncing', 503, 'Your mailbox is still being synced from Gmail - try again shortly'
+    if 'invalid_grant' in str(e):
+        return 'auth', 401, 'invalid_grant - Please login again'
+    if isinstance(e, HttpError):
+        status = e.resp.status
+        # Gmail's own 4xx (bad request, permissions) pass through; its outages are a bad gateway
+        return 'gmail', status if 400 <= status < 500 else 502, f'Gmail API error {status}: {e.reason}'
+    if isinstance(e, TimeoutError):
+        return 'timeout', 504, 'Gmail did not respond in time'
+    if isinstance(e, (ConnectionError, httplib2.HttpLib2Error)):
+        return 'network', 502, f'Could not reach Gmail: {str(e)}'
+    app.logger.exception('Unexpected error')
+    return 'internal', 500, f'API error: {str(e)}'
+
+
+def gmail_error(e):
+    kind, status, message = classify_error(e)
+    metrics.REQUEST_ERRORS.inc(endpoint=request.endpoint or 'unknown', kind=kind)
+    headers = {'Retry-After': '30'} if status in (429, 503) else {}
+    return jsonify({'error': message}), status, headers
+
+
 @app.route('/emails')
 def emails():
-    access_token = session.get('access_token') or request.headers.get('Access-Token')
-    refresh_token = session.get('refresh_token') or request.headers.get('Refresh-Token')
+    access_token, refresh_token = request_tokens()
+    if not access_token or not refresh_token:
+        return jsonify({'error': 'Missing tokens'}), 401
 
+    try:
+        since = parse_since(request.args.get('since'))
+        limit = parse_limit(request.args.get('limit'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        key, creds, service = open_gmail(access_token, refresh_token)
+        kwargs = sync_kwargs(key, creds)
+        stream = request.args.get('stream') == '1'
+        # Clients that ask for Arrow get the columnar stream; anything else keeps JSON
+        arrow = request.accept_mimetypes.best_match(['application/json', ARROW_STREAM]) == ARROW_STREAM
+
+        etag, resynced = None, False
+        if prefetcher.attach(key) or incremental_sync(service, store, key, JOB_EMAIL_QUERY, **kwargs):
+            # Store is current: an unchanged mailbox costs a bodiless 304
+            etag = content_etag('emails', key, store.revision(key), since, limit, stream, arrow)
+            if request.if_none_match.contains(etag):
+                return not_modified(etag)
+            pages = store.iter_email_pages(key, since=since, limit=limit)
+        else:
+            pages = iter_resync_pages(
+                service, store, key, JOB_EMAIL_QUERY, since=since, limit=limit, **kwargs
+            )
+            try:
+                # Pull the first page eagerly so auth and API errors still get a proper status
+                pages = itertools.chain([next(pages, [])], pages)
+                resynced = True
+            except SyncInProgress:
+                # A warm-up or another request is rebuilding the store, for longer than
+                # attach() waits: send what it holds so far, as /stats does. That
+                # partial copy gets no ETag.
+                pages = store.iter_email_pages(key, since=since, limit=limit)
+
+        with_timings = request.args.get('timings') == '1'
+        if arrow:
+            chunks = arrow_chunks(pages, g.timings, with_timings=with_timings)
+            response = Response(stream_with_context(chunks), mimetype=ARROW_STREAM)
+        elif stream:
+            lines = ndjson_lines(pages, g.timings, with_timings=with_timings)
+            response = Response(stream_with_context(lines), mimetype='application/x-ndjson')
+        else:
+            records = [info for page in pages for info in page]
+            metrics.count('emails', len(records))
+            response = jsonify(records)
+            if resynced:
+                # The rebuild finished while the records were collected, so they
+                # are the store at its new revision. Streams send their headers
+                # before it ends and go without an ETag until the next request.
+                etag = content_etag('emails', key, store.revision(key), since, limit, stream, arrow)
+        response.vary.add('Accept')
+        if etag:
+            response.set_etag(etag)
+        return response
+
+    except Exception as e:
+        return gmail_error(e)
+
+
+@app.route('/stats')
+def stats():
+    access_token, refresh_token = request_tokens()
     if not access_token or not refresh_token:
         return jsonify({'error': 'Missing tokens'}), 401
 
     try:
-        creds = Credentials(
-            token=access_token,
-            refresh_token=refresh_token,
-            token_uri=TOKEN_URI,
-            client_id=CLIENT_ID,
-            client_secret=CLIENT_SECRET,
-            scopes=SCOPES
-        )
+        start = parse_date(request.args.get('start'), 'start')
+        end = parse_date(request.args.get('end'), 'end')
+        today = parse_date(request.args.get('today'), 'today') or datetime.datetime.now(datetime.timezone.utc).date()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        key, creds, service = open_gmail(access_token, refresh_token)
+        syncing = False
+        if not prefetcher.attach(key) and not incremental_sync(service, store, key, JOB_EMAIL_QUERY,
+                                                               **sync_kwargs(key, creds)):
+            # The mailbox needs a full sync: report what's stored while it runs
+            syncing = sync_in_background(key, access_token, refresh_token)
+            if not syncing:
+                try:
+                    sync_mailbox(service, store, key, JOB_EMAIL_QUERY, **sync_kwargs(key, creds))
+                except SyncInProgress:
+                    syncing = True
+
+        # Aggregates only change when the stored emails do
+        revision = store.revision(key)
+        etag = content_etag('stats', key, revision, start, end, today, syncing)
+        if request.if_none_match.contains(etag):
+            return not_modified(etag)
+
+        response = jsonify(dict(cached_stats(key, revision, start, end, today), syncing=syncing))
+        response.set_etag(etag)
+        return response
+
+    except Exception as e:
+        return gmail_error(e)
 
-        if creds.expired:
-            if creds.refresh_token:
-                creds.refresh(Request())
-                session['access_token'] = creds.token
-            else:
-                return jsonify({'error': 'Access token expired and no refresh token available'}), 401
-
-        service = build('gmail', 'v1', credentials=creds)
-        result = service.users().messages().list(
-            userId='me',
-            q=(
-                'subject:"Thank you for Applying" OR '
-                '"Thank you for your expression" OR '
-                '"Thank you for applying" OR '
-                '"Your application was sent" OR '
-                '"Thank you for your application" OR '
-                '"We have received your application"'
-            ),
-            maxResults=50
-        ).execute()
-
-        messages = result.get('messages', [])
-        job_emails = []
-        for msg in messages:
-            msg_data = service.users().messages().get(
-                userId='me', id=msg['id'], format='metadata',
-                metadataHeaders=['Subject', 'From', 'Date']
-            ).execute()
-            headers = msg_data.get('payload', {}).get('headers', [])
-            info = {'Subject': '', 'From': '', 'Date': ''}
-            for h in headers:
-                if h['name'] in info:
-                    info[h['name']] = h['value']
-            job_emails.append(info)
-
-        return jsonify(job_emails)
+
+@app.route('/search')
+def search():
+    """The newest job emails matching q, from an in-memory index of the user's mailbox.
+
+    q takes words, word* prefixes, from:/subject:/status: fields, OR and
+    -word (see search_index.parse_query); limit defaults to 50.
+    """
+    access_token, refresh_token = request_tokens()
+    if not access_token or not refresh_token:
+        return jsonify({'error': 'Missing tokens'}), 401
+
+    query = request.args.get('q', '')
+    if not parse_query(query):
+        return jsonify({'error': 'q must contain at least one word'}), 400
+    try:
+        limit = parse_limit(request.args.get('limit')) or SEARCH_LIMIT
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        key, creds, service = open_gmail(access_token, refresh_token)
+        if not prefetcher.attach(key):
+            _, synced_at, _ = store.sync_state(key)
+            if synced_at is None or time.time() - synced_at > SEARCH_SYNC_SECONDS:
+                sync_mailbox(service, store, key, JOB_EMAIL_QUERY, **sync_kwargs(key, creds))
+
+        index = search_indexes.get(key)
+        if index is None:
+            index = SearchIndex()
+            search_indexes.set(key, index)
+        with metrics.span('search.index'):
+            index.refresh(store, key)
+
+        etag = content_etag('search', key, index.revision, query, limit)
+        if request.if_none_match.contains(etag):
+            return not_modified(etag)
+        with metrics.span('search.query'):
+            total, results = index.search(query, limit)
+        response = jsonify({'query': query, 'total': total, 'results': results})
+        response.set_etag(etag)
+        return response
 
     except Exception as e:
-        if 'invalid_grant' in str(e):
-            session.pop('access_token', None)
-            session.pop('refresh_token', None)
-            return jsonify({'error': 'invalid_grant - Please login again'}), 401
-        return jsonify({'error': f'API error: {str(e)}'}), 500
-    
+        return gmail_error(e)
+
+
+@app.route('/export')
+def export():
+    """Every stored job email as a CSV, Parquet or Feather download, streamed in batches.
+
+    ?format=csv|parquet|feather (default csv); since and limit work as on /emails.
+    """
+    access_token, refresh_token = request_tokens()
+    if not access_token or not refresh_token:
+        return jsonify({'error': 'Missing tokens'}), 401
+
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f"format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+    try:
+        since = parse_since(request.args.get('since'))
+        limit = parse_limit(request.args.get('limit'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        key, creds, service = open_gmail(access_token, refresh_token)
+        if not prefetcher.attach(key):
+            sync_mailbox(service, store, key, JOB_EMAIL_QUERY, **sync_kwargs(key, creds))
+
+        etag = content_etag('export', key, store.revision(key), fmt, since, limit)
+        if request.if_none_match.contains(etag):
+            return not_modified(etag)
+
+        pages = counted_pages(store.iter_email_pages(key, since=since, limit=limit), g.timings)
+        chunks = export_chunks(pages, fmt)
+        # Write the first batch eagerly so a failing writer still gets a proper status
+        chunks = itertools.chain([next(chunks, b'')], chunks)
+        mimetype, extension = EXPORT_FORMATS[fmt]
+        response = Response(stream_with_context(chunks), mimetype=mimetype,
+                            headers={'Content-Disposition': f'attachment; filename="job_emails.{extension}"'})
+        response.set_etag(etag)
+        return response
+
+    except Exception as e:
+        return gmail_error(e)
+
+
+@app.route('/import', methods=['POST'])
+def import_mailbox():
+    """Load the job emails of a Google Takeout .mbox, sent as the request body, into the user's store.
+
+    Imported emails are kept when the mailbox is next synced from Gmail in full.
+    """
+    access_token, refresh_token = request_tokens()
+    if not access_token or not refresh_token:
+        return jsonify({'error': 'Missing tokens'}), 401
+    too_large = jsonify({'error': f'mailbox must be at most {IMPORT_MAX_BYTES} bytes'}), 413
+    if (request.content_length or 0) > IMPORT_MAX_BYTES:
+        return too_large
+
+    try:
+        key, _, _ = open_gmail(access_token, refresh_token)
+        # iter_mbox_rows maps the file, so the upload is spooled to disk first
+        with tempfile.NamedTemporaryFile(suffix='.mbox') as upload:
+            size = 0
+            for chunk in iter(lambda: request.stream.read(IMPORT_CHUNK_BYTES), b''):
+                size += len(chunk)
+                if size > IMPORT_MAX_BYTES:
+                    return too_large
+                upload.write(chunk)
+            upload.flush()
+
+            count = 0
+            with metrics.span('import'):
+                for rows in iter_mbox_rows(upload.name):
+                    if rows:
+                        store.upsert(key, rows)
+                        count += len(rows)
+        metrics.count('imported', count)
+        return jsonify({'imported': count})
+
+    except Exception as e:
+        return gmail_error(e)
+
+
 @app.route('/logout')
 def logout():
-    session.pop('access_token', None)
-    session.pop('refresh_token', None)
+    # Nothing is kept per session; just drop the user's cached access token
+    _, refresh_token = request_tokens()
+    if refresh_token:
+        gmail_client.tokens.forget(token_key(refresh_token))
     return "Logged out. <a href='/login'>Login again</a>"
 
 @app.route('/health')
 def health():
     return 'ok', 200
 
+@app.route('/metrics')
+def prometheus_metrics():
+    # This worker's numbers only; each gunicorn worker keeps its own
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/health/scheduler')
+def scheduler_health():
+    return jsonify(scheduler.stats())
+
+@app.route('/health/clients')
+def clients_health():
+    return jsonify(gmail_client.stats())
+
+@metrics.registry.collector
+def backend_stats():
+    # Counters the scheduler, client and caches already keep, read at scrape time
+    calls = scheduler.stats()
+    client = gmail_client.stats()
+    caches = {'stats': stats_cache.stats(), 'tokens': client['token_cache']}
+    if row_cache:
+        caches['rows'] = row_cache.stats()
+    return [
+        ('jobbuddy_gmail_throttled_total', 'counter', 'Gmail calls that waited for quota',
+         [({}, calls['throttled'])]),
+        ('jobbuddy_gmail_rate_limited_total', 'counter', 'Gmail calls answered with a rate limit error',
+         [({}, calls['rate_limited'])]),
+        ('jobbuddy_gmail_retries_total', 'counter', 'Rate-limited Gmail calls retried', [({}, calls['retries'])]),
+        ('jobbuddy_gmail_gave_up_total', 'counter', 'Gmail calls that ran out of retries', [({}, calls['gave_up'])]),
+        ('jobbuddy_gmail_queue_depth', 'gauge', 'Gmail calls waiting for quota', [({}, calls['queue_depth'])]),
+        ('jobbuddy_token_refreshes_total', 'counter', 'Access token refreshes',
+         [({'result': 'refreshed'}, client['refreshes']), ({'result': 'shared'}, client['refreshes_shared'])]),
+        ('jobbuddy_service_builds_total', 'counter', 'Gmail service objects built', [({}, client['service_builds'])]),
+        ('jobbuddy_cache_hits_total', 'counter', 'Cache hits', [({'cache': n}, s['hits']) for n, s in caches.items()]),
+        ('jobbuddy_cache_misses_total', 'counter', 'Cache misses',
+         [({'cache': n}, s['misses']) for n, s in caches.items()]),
+    ]
+
+
+@app.route('/health/cache')
+def cache_health():
+    return jsonify({'stats': stats_cache.stats(), 'rows': row_cache.stats() if row_cache else None})
+
 
 if __name__ == '__main__':
     app.run(debug=True)
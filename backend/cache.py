@@ -0,0 +1,150 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+# redis://host:port/db shares caches between workers and instances; unset
+# keeps everything in each process's memory.
+CACHE_URL = os.environ.get("CACHE_URL")
+
+
+class LRUCache:
+    """Thread-safe LRU mapping bounded to `maxsize` entries, with optional TTLs."""
+
+    def __init__(self, maxsize=1024, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # key -> (expires_at or None, value)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] is not None and entry[0] <= time.monotonic():
+                del self._data[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_many(self, keys):
+        # {key: value} for the keys that are present
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def set_many(self, mapping, ttl=None):
+        for key, value in mapping.items():
+            self.set(key, value, ttl)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            return {'backend': 'memory', 'size': len(self._data), 'maxsize': self.maxsize, 'hits': self.hits,
+                    'misses': self.misses, 'evictions': self.evictions}
+
+
+class RedisCache:
+    """The LRUCache interface over a Redis server, shared by every process using it.
+
+    Values are stored as JSON, so they come back as dicts, lists and scalars.
+    Keys are namespaced; non-string keys are hashed. Redis errors count as
+    misses, so an unavailable cache slows requests down instead of failing them.
+    """
+
+    def __init__(self, url, namespace, ttl=None):
+        import redis
+
+        self._redis = redis.Redis.from_url(url, socket_timeout=2, socket_connect_timeout=2)
+        self._errors = redis.RedisError
+        self.namespace = namespace
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def _key(self, key):
+        if not isinstance(key, str):
+            key = hashlib.sha256(repr(key).encode()).hexdigest()
+        return f"{self.namespace}:{key}"
+
+    def _count(self, hits=0, misses=0, errors=0):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+            self.errors += errors
+
+    def get(self, key, default=None):
+        return self.get_many([key]).get(key, default)
+
+    def get_many(self, keys):
+        keys = list(keys)
+        if not keys:
+            return {}
+        try:
+            values = self._redis.mget([self._key(k) for k in keys])
+        except self._errors:
+            self._count(misses=len(keys), errors=1)
+            return {}
+        found = {k: json.loads(v) for k, v in zip(keys, values) if v is not None}
+        self._count(hits=len(found), misses=len(keys) - len(found))
+        return found
+
+    def set(self, key, value, ttl=None):
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, mapping, ttl=None):
+        ttl = ttl if ttl is not None else self.ttl
+        try:
+            with self._redis.pipeline(transaction=False) as pipe:
+                for key, value in mapping.items():
+                    pipe.set(self._key(key), json.dumps(value), ex=max(1, int(ttl)) if ttl is not None else None)
+                pipe.execute()
+        except self._errors:
+            self._count(errors=1)
+
+    def delete(self, key):
+        try:
+            self._redis.delete(self._key(key))
+        except self._errors:
+            self._count(errors=1)
+
+    def stats(self):
+        with self._lock:
+            return {'backend': 'redis', 'namespace': self.namespace, 'hits': self.hits,
+                    'misses': self.misses, 'errors': self.errors}
+
+
+def make_cache(namespace, maxsize=1024, ttl=None):
+    """A RedisCache when CACHE_URL is set, otherwise an in-process LRUCache."""
+    if CACHE_URL:
+        return RedisCache(CACHE_URL, namespace, ttl=ttl)
+    return LRUCache(maxsize=maxsize, ttl=ttl)
@@ -0,0 +1,115 @@
+import os
+import html
+import json
+import hashlib
+
+import ahocorasick
+import numpy as np
+
+# Phrases per status, matched case-insensitively as whole words against the
+# subject and snippet. A message matching several statuses gets the one listed
+# first, so "unfortunately we won't move forward to the interview stage" is a
+# rejection. JOB_STATUS_PHRASES_FILE can point at a JSON object of the same
+# shape to replace these; its key order sets the priority the same way.
+DEFAULT_PHRASES = {
+    'rejected': [
+        'regret to inform', 'not to move forward', 'not moving forward', 'will not be moving forward',
+        "won't be moving forward", 'decided to pursue other candidates', 'move forward with other candidates',
+        'proceed with other candidates', 'position has been filled', 'not been selected',
+        'no longer under consideration', 'unable to offer you',
+    ],
+    'offer': [
+        'offer letter', 'pleased to offer you the', 'job offer', 'offer of employment', 'extend an offer',
+    ],
+    'interview': [
+        'invite you to interview', 'invitation to interview', 'interview invitation', 'schedule an interview',
+        'schedule a call', 'phone screen', 'like to speak with you', 'your interview',
+    ],
+    'assessment': [
+        'coding challenge', 'online assessment', 'technical assessment', 'take-home', 'hackerrank',
+        'codility', 'codesignal',
+    ],
+    'applied': [
+        'thank you for applying', 'thank you for your expression', 'your application was sent',
+        'thank you for your application', 'we have received your application', 'thanks for applying',
+        'application received',
+    ],
+}
+UNMATCHED = 'other'
+PHRASES_FILE = os.environ.get("JOB_STATUS_PHRASES_FILE")
+
+
+def load_phrases(path=PHRASES_FILE):
+    if not path:
+        return DEFAULT_PHRASES
+    with open(path) as f:
+        return json.load(f)
+
+
+def _normalize(text):
+    # Snippets arrive HTML-escaped ("won&#39;t"), and mail clients like curly quotes
+    return html.unescape(text).replace('’', "'").lower()
+
+
+class StatusClassifier:
+    """Labels messages with a job application status in one Aho-Corasick pass."""
+
+    def __init__(self, phrases):
+        self.statuses = list(phrases)
+        self.phrases = {status: [p.lower() for p in phrases[status]] for status in self.statuses}
+        # Changes whenever the phrase set does; stored with the sync state so a
+        # new configuration triggers a full resync with the new query.
+        self.version = hashlib.sha256(json.dumps(self.phrases).encode()).hexdigest()[:16]
+
+        self._automaton = ahocorasick.Automaton()
+        for rank, status in enumerate(self.statuses):
+            for phrase in self.phrases[status]:
+                # The same phrase listed twice keeps its highest-priority status
+                existing = self._automaton.get(phrase, None)
+                if existing is None or existing[0] > rank:
+                    self._automaton.add_word(phrase, (rank, len(phrase)))
+        self._automaton.make_automaton()
+
+    def gmail_query(self):
+        # Every phrase of every status, so the mailbox holds the whole lifecycle.
+        # Gmail matches them anywhere in a message; mailbox_sync drops what
+        # classify() then can't label from the subject and snippet.
+        quoted = dict.fromkeys(f'"{p}"' for status in self.statuses for p in self.phrases[status])
+        return ' OR '.join(quoted)
+
+    def classify(self, subjects, snippets):
+        """Status for each (subject, snippet) pair, or UNMATCHED."""
+        subjects = list(subjects)
+        if not subjects:
+            return []
+        # One scan over all messages: \x00 separates messages and \n keeps a
+        # phrase from straddling a subject and its snippet.
+        text = _normalize('\x00'.join(f"{subject}\n{snippet}" for subject, snippet in zip(subjects, snippets)))
+        starts = np.cumsum([0] + [len(part) + 1 for part in text.split('\x00')])
+
+        end_positions, ranks = [], []
+        for end, (rank, length) in self._automaton.iter(text):
+            start = end - length + 1
+            # Whole words only, so neither "bjob offer" nor "job offers" (as
+            # in "our job offers page") is a job offer
+            if (start > 0 and text[start - 1].isalnum()) or (end + 1 < len(text) and text[end + 1].isalnum()):
+                continue
+            end_positions.append(end)
+            ranks.append(rank)
+
+        best = np.full(len(subjects), len(self.statuses), dtype='int64')
+        if ranks:
+            message = np.searchsorted(starts, np.asarray(end_positions), side='right') - 1
+            np.minimum.at(best, message, np.asarray(ranks, dtype='int64'))
+        labels = np.array(self.statuses + [UNMATCHED], dtype=object)
+        return labels[best].tolist()
+
+    def classify_rows(self, rows):
+        # Sets 'status' on mailbox_sync rows in place
+        statuses = self.classify((r['Subject'] for r in rows), [r.get('snippet', '') for r in rows])
+        for row, status in zip(rows, statuses):
+            row['status'] = status
+        return rows
+
+
+classifier = StatusClassifier(load_phrases())
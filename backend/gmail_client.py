@@ -0,0 +1,152 @@
+import os
+import json
+import time
+import datetime
+import threading
+
+import httplib2
+import requests
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document
+
+import metrics
+from cache import make_cache
+
+TOKEN_CACHE_SIZE = int(os.environ.get("GMAIL_TOKEN_CACHE_SIZE", "10000"))
+HTTP_TIMEOUT = 60
+# Lets local runs and load tests point the client at a fake Gmail server
+API_ROOT = os.environ.get("GMAIL_API_ROOT")
+# Same-key refreshes always land on the same lock, so a fixed stripe count
+# gives single-flight refreshes without one lock object per user.
+LOCK_STRIPES = 64
+
+_discovery_lock = threading.Lock()
+_discovery_doc = None
+_local = threading.local()
+_token_session = requests.Session()
+_stats_lock = threading.Lock()
+_stats = {'discovery_loads': 0, 'service_builds': 0, 'service_build_seconds': 0.0,
+          'refreshes': 0, 'refreshes_shared': 0}
+
+
+def _count(name, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def discovery_document():
+    # The bundled Gmail discovery document is parsed once per process
+    global _discovery_doc
+    if _discovery_doc is None:
+        with _discovery_lock:
+            if _discovery_doc is None:
+                doc = json.loads(discovery_cache.get_static_doc('gmail', 'v1'))
+                if API_ROOT:
+                    # The batch endpoint is derived from rootUrl as well
+                    doc['rootUrl'] = doc['mtlsRootUrl'] = API_ROOT
+                _discovery_doc = doc
+                _count('discovery_loads')
+    return _discovery_doc
+
+
+def pooled_http():
+    # httplib2 keeps connections alive per Http object but isn't thread-safe,
+    # so every thread reuses its own across requests.
+    http = getattr(_local, 'http', None)
+    if http is None:
+        http = _local.http = httplib2.Http(timeout=HTTP_TIMEOUT)
+    return http
+
+
+def authorized_http(creds):
+    return AuthorizedHttp(creds, http=pooled_http())
+
+
+def token_request():
+    return Request(session=_token_session)
+
+
+def build_service(creds):
+    started = time.perf_counter()
+    with metrics.span('build'):
+        service = build_from_document(discovery_document(), http=authorized_http(creds))
+    _count('service_builds')
+    _count('service_build_seconds', time.perf_counter() - started)
+    return service
+
+
+class TokenCache:
+    """Refreshed access tokens keyed by user, with single-flight refreshes.
+
+    With a shared cache backend, a token refreshed by one worker is picked up
+    by the others; the refresh lock itself is per process.
+    """
+
+    def __init__(self, maxsize=TOKEN_CACHE_SIZE):
+        self._tokens = make_cache('tokens', maxsize)
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    def _get(self, key):
+        # (token, naive UTC expiry or None), or None when not cached
+        cached = self._tokens.get(key)
+        if cached is None:
+            return None
+        token, expiry = cached
+        return token, datetime.datetime.fromisoformat(expiry) if expiry else None
+
+    def load(self, key, creds):
+        cached = self._get(key)
+        if cached is not None:
+            creds.token, creds.expiry = cached
+
+    def refresh(self, key, creds, do_refresh):
+        with self._locks[hash(key) % LOCK_STRIPES]:
+            cached = self._get(key)
+            if cached is not None and cached[0] != creds.token:
+                # Another request refreshed while we waited for the lock
+                creds.token, creds.expiry = cached
+                if not creds.expired:
+                    _count('refreshes_shared')
+                    return
+            with metrics.span('token_refresh'):
+                do_refresh()
+            _count('refreshes')
+            ttl = None
+            if creds.expiry is not None:
+                ttl = (creds.expiry - datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)).total_seconds()
+            self._tokens.set(key, [creds.token, creds.expiry.isoformat() if creds.expiry else None], ttl)
+
+    def forget(self, key):
+        self._tokens.delete(key)
+
+    def stats(self):
+        return self._tokens.stats()
+
+
+tokens = TokenCache()
+
+
+class SharedCredentials(Credentials):
+    """Credentials whose refreshes go through the process-wide token cache.
+
+    AuthorizedHttp also refreshes on a 401, so overriding refresh() covers both
+    the up-front expiry check and refreshes triggered mid-fetch.
+    """
+
+    def __init__(self, *args, cache_key, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cache_key = cache_key
+        tokens.load(cache_key, self)
+
+    def refresh(self, request):
+        tokens.refresh(self._cache_key, self, lambda: super(SharedCredentials, self).refresh(request))
+
+
+def stats():
+    with _stats_lock:
+        snapshot = dict(_stats)
+    snapshot['token_cache'] = tokens.stats()
+    return snapshot
@@ -0,0 +1,147 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+from gmail_scheduler import DIRECT, QUOTA_COSTS, is_rate_limited
+
+# Gmail accepts up to 100 calls in one batch request, but sub-requests start
+# failing with rateLimitExceeded well before that, so default to 50.
+MAX_BATCH_SIZE = 100
+BATCH_SIZE = min(int(os.environ.get("GMAIL_BATCH_SIZE", "50")), MAX_BATCH_SIZE)
+FETCH_WORKERS = int(os.environ.get("GMAIL_FETCH_WORKERS", "4"))
+# Batches in flight across all requests in this process; a sync worker only
+# serves one request at a time, gevent workers raise this (gunicorn.conf.py).
+FETCH_POOL_SIZE = int(os.environ.get("GMAIL_FETCH_POOL_SIZE", str(FETCH_WORKERS)))
+# messages.list returns at most 500 ids per page.
+PAGE_SIZE = 500
+
+METADATA_HEADERS = ['Subject', 'From', 'Date']
+
+# Shared by all requests so worker threads, and the keep-alive connections
+# they hold, survive from one request to the next.
+_pool = ThreadPoolExecutor(max_workers=FETCH_POOL_SIZE, thread_name_prefix='gmail-fetch')
+
+
+def parse_metadata(msg_data):
+    headers = msg_data.get('payload', {}).get('headers', [])
+    info = {'Subject': '', 'From': '', 'Date': ''}
+    for h in headers:
+        if h['name'] in info:
+            info[h['name']] = h['value']
+    return info
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield start, items[start:start + size]
+
+
+def fetch_metadata(service, message_ids, batch_size=BATCH_SIZE, workers=FETCH_WORKERS, http_factory=None,
+                   parse=parse_metadata, calls=DIRECT):
+    """Fetch Subject/From/Date for every id, in the same order as message_ids.
+
+    The `get` calls are grouped into Gmail batch requests and up to `workers`
+    batches run at once on the shared fetch pool. httplib2 connections are not thread-safe, so
+    parallel batches need `http_factory` to hand each worker its own
+    authorized http; without it the batches run one after another.
+    `parse` turns each raw messages.get response into the returned record.
+    Batches go through `calls`, and sub-requests that come back rate limited
+    are retried in a follow-up batch after a backoff.
+    """
+    message_ids = list(message_ids)
+    if not message_ids:
+        return []
+
+    batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+    if http_factory is None:
+        workers = 1
+    results = [None] * len(message_ids)
+    local = threading.local()
+    # Every users().messages() call rebuilds the resource's methods from the
+    # discovery document, which costs more CPU than the batch itself
+    messages = service.users().messages()
+
+    def worker_http():
+        if http_factory is None:
+            return None
+        if not hasattr(local, 'http'):
+            local.http = http_factory()
+        return local.http
+
+    def run_batch(offset, ids):
+        pending = list(enumerate(ids))
+        attempt = 0
+        while pending:
+            limited = []
+            errors_limited = []
+            errors = []
+
+            def callback(request_id, response, exception):
+                index = int(request_id)
+                if exception is None:
+                    results[offset + index] = parse(response)
+                elif is_rate_limited(exception):
+                    limited.append((index, ids[index]))
+                    errors_limited.append(exception)
+                else:
+                    errors.append(exception)
+
+            batch = service.new_batch_http_request(callback=callback)
+            for index, msg_id in pending:
+                batch.add(
+                    messages.get(
+                        userId='me', id=msg_id, format='metadata',
+                        metadataHeaders=METADATA_HEADERS
+                    ),
+                    request_id=str(index)
+                )
+            calls.execute(batch, 'messages.get', cost=QUOTA_COSTS['messages.get'] * len(pending),
+                          http=worker_http())
+            if errors:
+                raise errors[0]
+            if limited:
+                attempt += 1
+                calls.wait_before_retry(errors_limited[0], attempt)
+            pending = limited
+
+    chunks = list(_chunks(message_ids, batch_size))
+    # Wall time of the whole fetch, however many batches ran in parallel
+    with metrics.span('messages.get'):
+        if workers <= 1 or len(chunks) == 1:
+            for offset, ids in chunks:
+                run_batch(offset, ids)
+        else:
+            for start in range(0, len(chunks), workers):
+                # list() re-raises the first failed batch
+                list(_pool.map(lambda chunk: run_batch(*chunk), chunks[start:start + workers]))
+    metrics.GMAIL_MESSAGES.inc(len(message_ids))
+    metrics.count('gmail_messages', len(message_ids))
+
+    return results
+
+
+def iter_message_id_pages(service, query, limit=None, page_size=PAGE_SIZE, calls=DIRECT):
+    """Walk every messages.list page for query, yielding one list of ids per page."""
+    page_token = None
+    remaining = limit
+    while remaining is None or remaining > 0:
+        kwargs = {'userId': 'me', 'q': query, 'maxResults': page_size}
+        if remaining is not None:
+            kwargs['maxResults'] = min(page_size, remaining)
+        if page_token:
+            kwargs['pageToken'] = page_token
+        with metrics.span('messages.list'):
+            result = calls.execute(service.users().messages().list(**kwargs), 'messages.list')
+
+        ids = [msg['id'] for msg in result.get('messages', [])]
+        if remaining is not None:
+            ids = ids[:remaining]
+            remaining -= len(ids)
+        if ids:
+            yield ids
+
+        page_token = result.get('nextPageToken')
+        if not page_token:
+            break
+
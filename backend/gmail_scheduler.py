@@ -0,0 +1,224 @@
+import os
+import json
+import time
+import random
+import threading
+from collections import OrderedDict, deque
+
+from googleapiclient.errors import HttpError
+
+import metrics
+
+# Quota units charged per call, from the Gmail API usage limits page.
+QUOTA_COSTS = {
+    'messages.list': 5,
+    'messages.get': 5,
+    'history.list': 2,
+    'getProfile': 1,
+}
+
+# Gmail allows 250 units/s per user and 1,200,000 units/min per project. The
+# project bucket is per process, so set it to the project limit divided by the
+# number of workers when running more than one.
+USER_UNITS_PER_SECOND = float(os.environ.get("GMAIL_USER_UNITS_PER_SECOND", "250"))
+PROJECT_UNITS_PER_SECOND = float(os.environ.get("GMAIL_PROJECT_UNITS_PER_SECOND", "20000"))
+MAX_RETRIES = int(os.environ.get("GMAIL_MAX_RETRIES", "5"))
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 32.0
+
+RATE_LIMIT_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded')
+
+
+def timed_execute(request, method, http=None):
+    started = time.perf_counter()
+    try:
+        return request.execute(http=http)
+    finally:
+        metrics.GMAIL_CALLS.inc(method=method)
+        metrics.GMAIL_CALL_SECONDS.observe(time.perf_counter() - started, method=method)
+
+
+def is_rate_limited(error):
+    if not isinstance(error, HttpError):
+        return False
+    if error.resp.status == 429:
+        return True
+    if error.resp.status == 403:
+        try:
+            content = json.loads(error.content.decode('utf-8'))
+            reasons = [e.get('reason') for e in content['error'].get('errors', [])]
+        except (ValueError, KeyError, AttributeError, TypeError):
+            return False
+        return any(r in RATE_LIMIT_REASONS for r in reasons)
+    return False
+
+
+def backoff_delay(attempt):
+    # Full jitter: a random wait up to the exponential ceiling
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, cost, now):
+        # A call bigger than the bucket (e.g. a full batch) only needs a full
+        # bucket to start; the balance then goes negative and later calls wait.
+        self._refill(now)
+        needed = min(cost, self.capacity)
+        if self.tokens >= needed:
+            return 0.0
+        return (needed - self.tokens) / self.rate
+
+    def take(self, cost):
+        self.tokens -= cost
+
+    def is_full(self, now):
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class GmailScheduler:
+    """Admits Gmail calls against per-user and per-project quota buckets.
+
+    Waiting callers are queued per user and project capacity is handed out
+    round-robin across users, so one large mailbox can't starve the others.
+    Rate-limit responses are retried with jittered exponential backoff.
+    """
+
+    def __init__(self, user_rate=USER_UNITS_PER_SECOND, project_rate=PROJECT_UNITS_PER_SECOND,
+                 max_retries=MAX_RETRIES):
+        self.user_rate = user_rate
+        self.max_retries = max_retries
+        self._cond = threading.Condition()
+        self._project = TokenBucket(project_rate)
+        self._user_buckets = {}
+        # user_key -> deque of waiting costs; order is the round-robin order
+        self._waiting = OrderedDict()
+        self._stats = {'granted_calls': 0, 'granted_units': 0, 'throttled': 0,
+                       'rate_limited': 0, 'retries': 0, 'gave_up': 0}
+
+    def _user_bucket(self, user_key):
+        bucket = self._user_buckets.get(user_key)
+        if bucket is None:
+            bucket = self._user_buckets[user_key] = TokenBucket(self.user_rate)
+        return bucket
+
+    def _next_user(self, now):
+        # First user in rotation whose own bucket can admit its head call
+        for key, queue in self._waiting.items():
+            if self._user_bucket(key).wait_time(queue[0][0], now) == 0:
+                return key
+        return None
+
+    def acquire(self, user_key, cost):
+        ticket = [cost]
+        throttled = False
+        with self._cond:
+            queue = self._waiting.setdefault(user_key, deque())
+            queue.append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    bucket = self._user_bucket(user_key)
+                    if queue[0] is ticket and self._next_user(now) == user_key:
+                        wait = self._project.wait_time(cost, now)
+                        if wait == 0:
+                            bucket.take(cost)
+                            self._project.take(cost)
+                            self._stats['granted_calls'] += 1
+                            self._stats['granted_units'] += cost
+                            return
+                    else:
+                        wait = bucket.wait_time(cost, now) or 0.05
+                    if not throttled:
+                        throttled = True
+                        self._stats['throttled'] += 1
+                    self._cond.wait(wait)
+            finally:
+                queue.remove(ticket)
+                # Move this user to the back of the rotation
+                del self._waiting[user_key]
+                if queue:
+                    self._waiting[user_key] = queue
+                self._prune_buckets()
+                self._cond.notify_all()
+
+    def _prune_buckets(self):
+        if len(self._user_buckets) <= 1000:
+            return
+        now = time.monotonic()
+        for key in [k for k, b in self._user_buckets.items() if k not in self._waiting and b.is_full(now)]:
+            del self._user_buckets[key]
+
+    def wait_before_retry(self, error, attempt):
+        """Sleep before retry number `attempt`, or re-raise once retries are exhausted."""
+        with self._cond:
+            self._stats['rate_limited'] += 1
+            if attempt > self.max_retries:
+                self._stats['gave_up'] += 1
+                raise error
+            self._stats['retries'] += 1
+        time.sleep(backoff_delay(attempt))
+
+    def execute(self, user_key, request, method, cost=None, http=None):
+        cost = cost if cost is not None else QUOTA_COSTS[method]
+        attempt = 0
+        while True:
+            self.acquire(user_key, cost)
+            try:
+                return timed_execute(request, method, http=http)
+            except HttpError as e:
+                if not is_rate_limited(e):
+                    raise
+                attempt += 1
+                self.wait_before_retry(e, attempt)
+
+    def for_user(self, user_key):
+        return UserCalls(self, user_key)
+
+    def stats(self):
+        with self._cond:
+            return {
+                **self._stats,
+                'queue_depth': sum(len(q) for q in self._waiting.values()),
+                'waiting_users': len(self._waiting),
+                'tracked_users': len(self._user_buckets),
+            }
+
+
+class UserCalls:
+    """Runs one user's Gmail requests through the scheduler."""
+
+    def __init__(self, scheduler, user_key):
+        self.scheduler = scheduler
+        self.user_key = user_key
+
+    def execute(self, request, method, cost=None, http=None):
+        return self.scheduler.execute(self.user_key, request, method, cost=cost, http=http)
+
+    def wait_before_retry(self, error, attempt):
+        self.scheduler.wait_before_retry(error, attempt)
+
+
+class DirectCalls:
+    """Executes requests immediately; used when no scheduler is involved."""
+
+    def execute(self, request, method, cost=None, http=None):
+        return timed_execute(request, method, http=http)
+
+    def wait_before_retry(self, error, attempt):
+        if attempt > MAX_RETRIES:
+            raise error
+        time.sleep(backoff_delay(attempt))
+
+
+DIRECT = DirectCalls()
@@ -0,0 +1,17 @@
+import os
+
+# gevent workers monkey-patch sockets, so the Gmail API, batch and token
+# calls yield while they wait on the network: one worker interleaves many
+# users' fetches and /health keeps answering during long syncs. Set
+# GUNICORN_WORKER_CLASS=sync to get the old one-request-per-worker model.
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gevent")
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", "200"))
+# Cold syncs of large mailboxes stream for a while
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+
+if worker_class == "gevent":
+    # Fetch pool threads are greenlets here, so let every concurrent request
+    # keep GMAIL_FETCH_WORKERS batches in flight instead of sharing four.
+    os.environ.setdefault("GMAIL_FETCH_POOL_SIZE",
+                          str(int(os.environ.get("GMAIL_FETCH_WORKERS", "4")) * worker_connections))
@@ -0,0 +1,337 @@
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+import uuid
+
+DB_PATH = os.environ.get("MAILBOX_DB_PATH", "mailbox.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_state (
+    user_key TEXT PRIMARY KEY,
+    history_id TEXT,
+    synced_at INTEGER NOT NULL,
+    version TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS emails (
+    user_key TEXT NOT NULL,
+    message_id TEXT NOT NULL,
+    internal_date INTEGER NOT NULL,
+    subject TEXT NOT NULL,
+    sender TEXT NOT NULL,
+    date TEXT NOT NULL,
+    snippet TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL DEFAULT 'other',
+    source TEXT NOT NULL DEFAULT 'gmail',
+    written TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (user_key, message_id)
+);
+CREATE INDEX IF NOT EXISTS emails_by_date ON emails (user_key, internal_date DESC);
+CREATE TABLE IF NOT EXISTS revisions (
+    user_key TEXT PRIMARY KEY,
+    revision TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS full_syncs (
+    user_key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    heartbeat_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS warmups (
+    user_key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL DEFAULT '',
+    started_at REAL NOT NULL,
+    heartbeat_at REAL NOT NULL DEFAULT 0,
+    finished_at REAL,
+    ok INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS accounts (
+    token_key TEXT PRIMARY KEY,
+    user_key TEXT NOT NULL,
+    linked_at REAL NOT NULL
+);
+"""
+# Columns added since the first release, for databases created before them.
+# Old rows keep the defaults until the version mismatch resyncs their user.
+MIGRATIONS = [
+    ('sync_state', 'version', "TEXT NOT NULL DEFAULT ''"),
+    ('emails', 'snippet', "TEXT NOT NULL DEFAULT ''"),
+    ('emails', 'status', "TEXT NOT NULL DEFAULT 'other'"),
+    ('emails', 'source', "TEXT NOT NULL DEFAULT 'gmail'"),
+    ('emails', 'written', "TEXT NOT NULL DEFAULT ''"),
+    ('warmups', 'owner', "TEXT NOT NULL DEFAULT ''"),
+    ('warmups', 'heartbeat_at', 'REAL NOT NULL DEFAULT 0'),
+]
+# Data filed under a key no account maps to any more is dropped once it has
+# gone this long without a sync
+SUPERSEDED_AFTER = 30 * 24 * 3600
+# Every table holding per-user data, for moving or dropping a whole key
+USER_TABLES = ('sync_state', 'emails', 'revisions', 'full_syncs', 'warmups')
+
+
+def token_key(refresh_token):
+    # Identifies one grant without keeping the token on disk: the access
+    # tokens refreshed from it, and the account it belongs to
+    return hashlib.sha256(refresh_token.encode()).hexdigest()
+
+
+def account_key(email_address):
+    # Mailboxes are filed by account, since every login (prompt=consent)
+    # issues a new refresh token
+    return hashlib.sha256(email_address.strip().lower().encode()).hexdigest()
+
+
+class MailboxStore:
+    """Per-user SQLite copy of the application emails already fetched from Gmail."""
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        for table, column, definition in MIGRATIONS:
+            if column not in {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}:
+                conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+        self.prune_superseded(SUPERSEDED_AFTER)
+
+    def _conn(self):
+        # sqlite3 connections can't be shared between threads, so keep one per thread
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def account(self, token_key):
+        # The account key a grant was linked to, or None before its first use
+        row = self._conn().execute('SELECT user_key FROM accounts WHERE token_key = ?', (token_key,)).fetchone()
+        return row[0] if row else None
+
+    def link_account(self, token_key, user_key):
+        """File the grant `token_key` under the account `user_key`.
+
+        Mailboxes used to be stored under the grant's own key. Those rows move
+        to the account: imported ones always, synced ones only if the account
+        has no synced copy of its own.
+        """
+        now = time.time()
+        with self._conn() as conn:
+            # Grants linked long ago have most likely been replaced by a later login
+            conn.execute('DELETE FROM accounts WHERE user_key = ? AND linked_at < ?',
+                         (user_key, now - SUPERSEDED_AFTER))
+            conn.execute('INSERT OR REPLACE INTO accounts (token_key, user_key, linked_at) VALUES (?, ?, ?)',
+                         (token_key, user_key, now))
+            if not conn.execute('SELECT 1 FROM emails WHERE user_key = ? LIMIT 1', (token_key,)).fetchone():
+                self._drop(conn, token_key)
+                return
+            if conn.execute('SELECT 1 FROM sync_state WHERE user_key = ?', (user_key,)).fetchone():
+                moved = "source = 'mbox'"
+            else:
+                moved = '1'
+                conn.execute('UPDATE sync_state SET user_key = ? WHERE user_key = ?', (user_key, token_key))
+            # The account's own copy of a message wins
+            conn.execute(f'UPDATE OR IGNORE emails SET user_key = ? WHERE user_key = ? AND {moved}',
+                         (user_key, token_key))
+            self._drop(conn, token_key)
+            self._bump_revision(conn, user_key)
+
+    def prune_superseded(self, stale_after):
+        # Mailboxes filed under keys no grant links to: those of older grants,
+        # never migrated because their token wasn't used again
+        with self._conn() as conn:
+            keys = conn.execute(
+                'SELECT user_key FROM sync_state WHERE synced_at < ? '
+                'AND user_key NOT IN (SELECT user_key FROM accounts)', (time.time() - stale_after,)
+            ).fetchall()
+            for (key,) in keys:
+                self._drop(conn, key)
+        return len(keys)
+
+    def _drop(self, conn, user_key):
+        for table in USER_TABLES:
+            conn.execute(f'DELETE FROM {table} WHERE user_key = ?', (user_key,))
+
+    def sync_state(self, user_key):
+        # (history id, synced at, version of the query and classifier used)
+        row = self._conn().execute(
+            'SELECT history_id, synced_at, version FROM sync_state WHERE user_key = ?', (user_key,)
+        ).fetchone()
+        return row if row else (None, None, None)
+
+    def set_sync_state(self, user_key, history_id, synced_at, version=''):
+        with self._conn() as conn:
+            conn.execute(
+                'INSERT INTO sync_state (user_key, history_id, synced_at, version) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (user_key) DO UPDATE SET history_id = excluded.history_id, '
+                'synced_at = excluded.synced_at, version = excluded.version',
+                (user_key, history_id, synced_at, version)
+            )
+
+    def claim_full_sync(self, user_key, owner, stale_after):
+        """Claim the user's full sync for `owner`, or renew the claim.
+
+        False while another owner's claim was renewed under `stale_after` seconds ago.
+        """
+        now = time.time()
+        with self._conn() as conn:
+            claimed = conn.execute(
+                'INSERT INTO full_syncs (user_key, owner, heartbeat_at) VALUES (?, ?, ?) '
+                'ON CONFLICT (user_key) DO UPDATE SET owner = excluded.owner, heartbeat_at = excluded.heartbeat_at '
+                'WHERE full_syncs.owner = excluded.owner OR full_syncs.heartbeat_at < ?',
+                (user_key, owner, now, now - stale_after)
+            )
+            return claimed.rowcount == 1
+
+    def release_full_sync(self, user_key, owner):
+        with self._conn() as conn:
+            conn.execute('DELETE FROM full_syncs WHERE user_key = ? AND owner = ?', (user_key, owner))
+
+    def full_sync_running(self, user_key, stale_after):
+        row = self._conn().execute('SELECT heartbeat_at FROM full_syncs WHERE user_key = ?', (user_key,)).fetchone()
+        return row is not None and row[0] >= time.time() - stale_after
+
+    def begin_warmup(self, user_key, owner, stale_after):
+        """Claim the user's warm-up for `owner`.
+
+        False while another one runs whose owner renewed it under `stale_after` seconds ago.
+        """
+        now = time.time()
+        with self._conn() as conn:
+            claimed = conn.execute(
+                'INSERT INTO warmups (user_key, owner, started_at, heartbeat_at) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (user_key) DO UPDATE SET owner = excluded.owner, started_at = excluded.started_at, '
+                'heartbeat_at = excluded.heartbeat_at, finished_at = NULL, ok = 0 '
+                'WHERE warmups.finished_at IS NOT NULL OR warmups.heartbeat_at < ?',
+                (user_key, owner, now, now, now - stale_after)
+            )
+            return claimed.rowcount == 1
+
+    def renew_warmups(self, owner):
+        # Keeps every unfinished warm-up of `owner` from looking lost with its worker
+        with self._conn() as conn:
+            conn.execute('UPDATE warmups SET heartbeat_at = ? WHERE owner = ? AND finished_at IS NULL',
+                         (time.time(), owner))
+
+    def finish_warmup(self, user_key, owner, ok):
+        with self._conn() as conn:
+            conn.execute('UPDATE warmups SET finished_at = ?, ok = ? WHERE user_key = ? AND owner = ?',
+                         (time.time(), int(ok), user_key, owner))
+
+    def warmup_state(self, user_key):
+        # (last heartbeat, finished at or None while running, whether it succeeded)
+        row = self._conn().execute(
+            'SELECT heartbeat_at, finished_at, ok FROM warmups WHERE user_key = ?', (user_key,)
+        ).fetchone()
+        return row if row else (None, None, False)
+
+    def revision(self, user_key):
+        # Replaced whenever the user's stored emails change, for cache keys and
+        # ETags. Random rather than a counter, so a rebuilt database can't
+        # hand out a revision that meant different contents before.
+        row = self._conn().execute('SELECT revision FROM revisions WHERE user_key = ?', (user_key,)).fetchone()
+        return row[0] if row else ''
+
+    def _bump_revision(self, conn, user_key):
+        revision = uuid.uuid4().hex
+        conn.execute('INSERT OR REPLACE INTO revisions (user_key, revision) VALUES (?, ?)', (user_key, revision))
+        return revision
+
+    def reset(self, user_key):
+        # Emails imported from a mailbox export (source 'mbox') stay: they
+        # can't be fetched again without spending the quota they saved
+        with self._conn() as conn:
+            conn.execute("DELETE FROM emails WHERE user_key = ? AND source = 'gmail'", (user_key,))
+            conn.execute('DELETE FROM sync_state WHERE user_key = ?', (user_key,))
+            self._bump_revision(conn, user_key)
+
+    def upsert(self, user_key, rows):
+        with self._conn() as conn:
+            # Each row records the revision that wrote it, see versions()
+            revision = self._bump_revision(conn, user_key)
+            conn.executemany(
+                'INSERT OR REPLACE INTO emails '
+                '(user_key, message_id, internal_date, subject, sender, date, snippet, status, source, written) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [(user_key, r['id'], r['internal_date'], r['Subject'], r['From'], r['Date'],
+                  r.get('snippet', ''), r.get('status', 'other'), r.get('source', 'gmail'), revision) for r in rows]
+            )
+
+    def delete(self, user_key, message_ids):
+        # History reports deletions across the whole mailbox, most of them not
+        # job emails; only a change to the stored ones is a new revision
+        with self._conn() as conn:
+            deleted = conn.executemany(
+                'DELETE FROM emails WHERE user_key = ? AND message_id = ?',
+                [(user_key, msg_id) for msg_id in message_ids]
+            )
+            if deleted.rowcount > 0:
+                self._bump_revision(conn, user_key)
+
+    def message_ids(self, user_key):
+        rows = self._conn().execute('SELECT message_id FROM emails WHERE user_key = ?', (user_key,))
+        return {msg_id for (msg_id,) in rows}
+
+    def rows_by_message_id(self, user_key, message_ids):
+        """The stored mailbox_sync rows, source included, of those of `message_ids` the store has."""
+        message_ids, rows = list(message_ids), []
+        sql = ('SELECT message_id, internal_date, subject, sender, date, snippet, status, source FROM emails '
+               'WHERE user_key = ? AND message_id IN ')
+        for start in range(0, len(message_ids), 500):
+            chunk = message_ids[start:start + 500]
+            rows += self._conn().execute(f"{sql}({','.join('?' * len(chunk))})", [user_key, *chunk]).fetchall()
+        return [{'id': i, 'internal_date': ts, 'Subject': s, 'From': f, 'Date': d, 'snippet': sn, 'status': st,
+                 'source': src} for i, ts, s, f, d, sn, st, src in rows]
+
+    def versions(self, user_key):
+        # (message id, revision that wrote it) of every email. Rowids won't do:
+        # SQLite hands a deleted row's rowid out again, but revisions are random
+        rows = self._conn().execute('SELECT message_id, written FROM emails WHERE user_key = ?', (user_key,))
+        return set(rows.fetchall())
+
+    def rows_by_version(self, user_key, message_ids=None):
+        """(version, subject, sender, date, internal_date, status) for `message_ids`, or for every email."""
+        sql = 'SELECT message_id, written, subject, sender, date, internal_date, status FROM emails WHERE user_key = ?'
+        if message_ids is None:
+            rows = self._conn().execute(sql, (user_key,)).fetchall()
+        else:
+            message_ids, rows = list(message_ids), []
+            # Kept under SQLite's limit on bound parameters
+            for start in range(0, len(message_ids), 500):
+                chunk = message_ids[start:start + 500]
+                rows += self._conn().execute(f"{sql} AND message_id IN ({','.join('?' * len(chunk))})",
+                                             [user_key, *chunk]).fetchall()
+        return [((msg_id, written), *rest) for msg_id, written, *rest in rows]
+
+    def timestamps(self, user_key, status=None):
+        sql = 'SELECT internal_date FROM emails WHERE user_key = ?'
+        params = [user_key]
+        if status is not None:
+            sql += ' AND status = ?'
+            params.append(status)
+        return [ts for (ts,) in self._conn().execute(sql, params)]
+
+    def status_counts(self, user_key):
+        rows = self._conn().execute(
+            'SELECT status, COUNT(*) FROM emails WHERE user_key = ? GROUP BY status', (user_key,)
+        )
+        return dict(rows.fetchall())
+
+    def iter_email_pages(self, user_key, since=None, limit=None, page_size=500):
+        # Newest first, the same order messages.list returns
+        sql = 'SELECT subject, sender, date, internal_date, status FROM emails WHERE user_key = ?'
+        params = [user_key]
+        if since is not None:
+            sql += ' AND internal_date >= ?'
+            params.append(since * 1000)
+        sql += ' ORDER BY internal_date DESC'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+
+        cursor = self._conn().execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(page_size)
+            if not rows:
+                break
+            yield [{'Subject': s, 'From': f, 'Date': d, 'Timestamp': ts, 'Status': st} for s, f, d, ts, st in rows]
@@ -0,0 +1,246 @@
+import time
+import uuid
+import hashlib
+
+from googleapiclient.errors import HttpError
+
+import metrics
+from email_status import UNMATCHED
+from gmail_fetch import fetch_metadata, iter_message_id_pages, parse_metadata
+from gmail_scheduler import DIRECT
+
+# History records only carry ids, so newly added messages are matched against
+# the search query again. Restricting that search to mail received shortly
+# before the previous sync keeps it to a single small list call. Mail restored
+# from Trash or Spam can be of any age, so it is fetched and classified instead,
+# or without a classifier matched against the whole search.
+RECHECK_WINDOW_SECONDS = 24 * 3600
+
+HIDDEN_LABELS = {'TRASH', 'SPAM'}
+# A full sync renews its claim on the user with every page it stores; a claim
+# not renewed for this long was left by a worker that died mid-sync
+FULL_SYNC_STALE_SECONDS = 120
+# Part of the sync version: bumped when what a sync keeps changes, so stores
+# written by an older release are rebuilt
+STORE_FORMAT = 2
+
+
+class SyncInProgress(Exception):
+    """Another request or worker is already rebuilding this user's store."""
+
+
+def to_row(msg_data):
+    return {
+        'id': msg_data['id'],
+        'internal_date': int(msg_data.get('internalDate', 0)),
+        'snippet': msg_data.get('snippet', ''),
+        **parse_metadata(msg_data),
+    }
+
+
+def to_record(row):
+    # What /emails returns: the headers, Gmail's internalDate in epoch ms and the status
+    return {'Subject': row['Subject'], 'From': row['From'], 'Date': row['Date'], 'Timestamp': row['internal_date'],
+            'Status': row.get('status', 'other')}
+
+
+def sync_version(query, classifier=None):
+    # Stored with the sync state: a different query or phrase set means the
+    # stored messages and their statuses no longer match, so resync from scratch
+    parts = f"{STORE_FORMAT}\n{query}\n{classifier.version if classifier else ''}"
+    return hashlib.sha256(parts.encode()).hexdigest()[:16]
+
+
+def _classify(rows, classifier):
+    if classifier is None:
+        return rows
+    with metrics.span('classify'):
+        return classifier.classify_rows(rows)
+
+
+def _job_rows(rows, classifier):
+    # The query matches its phrases anywhere in a message, the classifier only
+    # in the subject and snippet; mail it can't label isn't kept
+    if classifier is None:
+        return rows
+    return [row for row in rows if row['status'] != UNMATCHED]
+
+
+def fetch_rows(service, user_key, message_ids, calls=DIRECT, row_cache=None, classifier=None, **fetch_kwargs):
+    """to_row() for every id, in order, taking what it can from row_cache.
+
+    A message's headers, snippet and internalDate never change, so rows cached
+    by any worker (or instance, with a shared cache) stay valid; only the
+    misses are fetched from Gmail. Rows get their status from classifier.
+    """
+    if row_cache is None:
+        rows = fetch_metadata(service, message_ids, parse=to_row, calls=calls, **fetch_kwargs)
+        return _classify(rows, classifier)
+
+    message_ids = list(message_ids)
+    cached = row_cache.get_many(f"{user_key}:{msg_id}" for msg_id in message_ids)
+    # Rows cached before snippets were kept can't be classified
+    cached = {key: row for key, row in cached.items() if 'snippet' in row}
+    missing = [msg_id for msg_id in message_ids if f"{user_key}:{msg_id}" not in cached]
+    fetched = fetch_metadata(service, missing, parse=to_row, calls=calls, **fetch_kwargs)
+    if fetched:
+        row_cache.set_many({f"{user_key}:{row['id']}": row for row in fetched})
+    by_id = {row['id']: row for row in fetched}
+    rows = [cached.get(f"{user_key}:{msg_id}") or by_id[msg_id] for msg_id in message_ids]
+    return _classify(rows, classifier)
+
+
+def _read_history(service, start_history_id, calls):
+    # Returns (added ids, restored ids, removed ids, latest history id), or None
+    # when Gmail no longer has history that far back and a full resync is needed.
+    added, restored, removed = set(), set(), set()
+    latest = start_history_id
+    page_token = None
+    while True:
+        kwargs = {
+            'userId': 'me',
+            'startHistoryId': start_history_id,
+            'historyTypes': ['messageAdded', 'messageDeleted', 'labelAdded', 'labelRemoved'],
+        }
+        if page_token:
+            kwargs['pageToken'] = page_token
+        try:
+            with metrics.span('history.list'):
+                result = calls.execute(service.users().history().list(**kwargs), 'history.list')
+        except HttpError as e:
+            if e.resp.status == 404:
+                return None
+            raise
+
+        for record in result.get('history', []):
+            for item in record.get('messagesAdded', []):
+                added.add(item['message']['id'])
+                removed.discard(item['message']['id'])
+            for item in record.get('labelsRemoved', []):
+                if HIDDEN_LABELS & set(item.get('labelIds', [])):
+                    restored.add(item['message']['id'])
+                    removed.discard(item['message']['id'])
+            for item in record.get('messagesDeleted', []):
+                removed.add(item['message']['id'])
+                added.discard(item['message']['id'])
+                restored.discard(item['message']['id'])
+            for item in record.get('labelsAdded', []):
+                if HIDDEN_LABELS & set(item.get('labelIds', [])):
+                    removed.add(item['message']['id'])
+                    added.discard(item['message']['id'])
+                    restored.discard(item['message']['id'])
+
+        latest = result.get('historyId', latest)
+        page_token = result.get('nextPageToken')
+        if not page_token:
+            return added, restored, removed, latest
+
+
+def incremental_sync(service, store, user_key, query, calls=DIRECT, row_cache=None, classifier=None,
+                     **fetch_kwargs):
+    """Apply the Gmail history since the last sync to the store.
+
+    Returns False when there is nothing to build on (first visit, history
+    expired, or the query or classifier changed) and the caller has to run
+    full_sync instead.
+    """
+    version = sync_version(query, classifier)
+    history_id, synced_at, synced_version = store.sync_state(user_key)
+    if history_id is None or synced_version != version:
+        return False
+
+    changes = _read_history(service, history_id, calls)
+    if changes is None:
+        return False
+    added, restored, removed, latest = changes
+
+    if removed:
+        store.delete(user_key, removed)
+
+    stored = store.message_ids(user_key)
+    restored -= stored
+    new_ids = added - restored - stored
+    matching = []
+    if new_ids:
+        recheck_query = f"({query}) after:{max(synced_at - RECHECK_WINDOW_SECONDS, 0)}"
+        matching += [msg_id for ids in iter_message_id_pages(service, recheck_query, calls=calls) for msg_id in ids
+                     if msg_id in new_ids]
+    if restored and classifier is None:
+        matching += [msg_id for ids in iter_message_id_pages(service, query, calls=calls) for msg_id in ids
+                     if msg_id in restored]
+    rows = []
+    if matching:
+        rows += fetch_rows(service, user_key, matching, calls=calls, row_cache=row_cache, classifier=classifier,
+                           **fetch_kwargs)
+    if restored and classifier is not None:
+        # Fetching and classifying restored mail is cheaper than paging through the whole search
+        rows += fetch_rows(service, user_key, sorted(restored), calls=calls, row_cache=row_cache,
+                           classifier=classifier, **fetch_kwargs)
+    rows = _job_rows(rows, classifier)
+    if rows:
+        store.upsert(user_key, rows)
+
+    store.set_sync_state(user_key, latest, int(time.time()), version)
+    return True
+
+
+def full_sync(service, store, user_key, query, calls=DIRECT, row_cache=None, classifier=None, **fetch_kwargs):
+    """Rebuild the user's store from a full search, yielding each stored page of rows.
+
+    Only one full sync per user runs at a time, across workers; the others
+    raise SyncInProgress instead of resetting the store under it.
+    """
+    owner = uuid.uuid4().hex
+    if not store.claim_full_sync(user_key, owner, FULL_SYNC_STALE_SECONDS):
+        raise SyncInProgress(user_key)
+    try:
+        # Take the history id before listing so nothing that arrives mid-sync is missed
+        with metrics.span('getProfile'):
+            history_id = calls.execute(service.users().getProfile(userId='me'), 'getProfile')['historyId']
+        started_at = int(time.time())
+        store.reset(user_key)
+        # What's left was imported from a mailbox export and needn't be fetched
+        imported = store.message_ids(user_key)
+
+        for ids in iter_message_id_pages(service, query, calls=calls):
+            known = {row['id']: row for row in _classify(store.rows_by_message_id(user_key, imported & set(ids)),
+                                                         classifier)} if imported else {}
+            fetched = iter(fetch_rows(service, user_key, [msg_id for msg_id in ids if msg_id not in known],
+                                      calls=calls, row_cache=row_cache, classifier=classifier, **fetch_kwargs))
+            rows = _job_rows([known[msg_id] if msg_id in known else next(fetched) for msg_id in ids], classifier)
+            if rows:
+                with metrics.span('store'):
+                    store.upsert(user_key, rows)
+            if not store.claim_full_sync(user_key, owner, FULL_SYNC_STALE_SECONDS):
+                raise SyncInProgress(user_key)
+            yield rows
+
+        store.set_sync_state(user_key, history_id, started_at, sync_version(query, classifier))
+    finally:
+        store.release_full_sync(user_key, owner)
+
+
+def sync_mailbox(service, store, user_key, query, calls=DIRECT, **fetch_kwargs):
+    """Bring the store up to date without producing any records."""
+    if not incremental_sync(service, store, user_key, query, calls=calls, **fetch_kwargs):
+        for _ in full_sync(service, store, user_key, query, calls=calls, **fetch_kwargs):
+            pass
+
+
+def iter_resync_pages(service, store, user_key, query, since=None, limit=None, calls=DIRECT, **fetch_kwargs):
+    """Rebuild the store with full_sync, yielding the since/limit window of
+    records as soon as each page is stored.
+
+    Use this when incremental_sync returns False; otherwise the store is
+    current and can be read directly.
+    """
+    remaining = limit
+    for rows in full_sync(service, store, user_key, query, calls=calls, **fetch_kwargs):
+        # Keep consuming after the window is filled so the store ends up complete
+        if since is not None:
+            rows = [r for r in rows if r['internal_date'] >= since * 1000]
+        if remaining is not None:
+            rows = rows[:remaining]
+            remaining -= len(rows)
+        if rows:
+            yield [to_record(r) for r in rows]
@@ -0,0 +1,179 @@
+"""Job emails from a Google Takeout (or any mboxrd) file instead of the Gmail API.
+
+    python backend/mbox_import.py "All mail Including Spam and Trash.mbox" > emails.ndjson
+    python backend/mbox_import.py Takeout.mbox --db mailbox.db --email me@gmail.com
+
+Prints the /emails stream (one NDJSON record per job email, in file order),
+or upserts the rows into a MailboxStore under the account of `--email`. Signed-in users don't need either: the Home page uploads the file
+to the backend's /import, which loads it the same way. Imported rows survive
+full syncs from Gmail, which only fetch what the import lacks.
+"""
+import os
+import re
+import sys
+import json
+import mmap
+import hashlib
+import argparse
+import datetime
+import email.header
+import email.utils
+
+from email_status import UNMATCHED, classifier as status_classifier
+from mailbox_sync import to_record
+
+SEPARATOR = b'\nFrom '
+# "From 1780000000000000000@xxx Wed Jan 03 12:00:00 +0000 2024" in Takeout, asctime elsewhere
+SEPARATOR_DATES = ['%a %b %d %H:%M:%S %z %Y', '%a %b %d %H:%M:%S %Y']
+# The headers the import reads, with their folded continuation lines
+HEADER = re.compile(rb'^(subject|from|date|x-gmail-labels):[ \t]*(.*(?:\r?\n[ \t].*)*)', re.I | re.M)
+FOLD = re.compile(rb'\r?\n(?=[ \t])')
+# Takeout's label header; messages.list leaves these out unless asked
+HIDDEN_LABELS = {'spam', 'trash'}
+# Header blocks longer than this are cut off rather than searched to the end of a body
+MAX_HEADER_BYTES = 64 * 1024
+# Pages of the mapping already scanned are handed back this often, so resident
+# memory stays flat however large the file is
+RELEASE_BYTES = 64 * 2**20
+PAGE_ROWS = 500
+
+
+def _messages(mm):
+    """(separator line, header block) for each message in a mapped mbox."""
+    size, released = len(mm), 0
+    if mm[:5] == b'From ':
+        start = 0
+    else:
+        start = mm.find(SEPARATOR) + 1
+        if not start:
+            return
+    while start < size:
+        next_separator = mm.find(SEPARATOR, start)
+        end = size if next_separator == -1 else next_separator + 1
+        line_end = mm.find(b'\n', start, end)
+        line_end = end if line_end == -1 else line_end
+        limit = min(end, line_end + MAX_HEADER_BYTES)
+        head_end = mm.find(b'\n\n', line_end, limit)
+        crlf_end = mm.find(b'\n\r\n', line_end, limit if head_end == -1 else head_end)
+        head_end = crlf_end if crlf_end != -1 else (limit if head_end == -1 else head_end)
+        yield mm[start:line_end], mm[line_end + 1:head_end + 1]
+
+        start = end
+        if start - released >= RELEASE_BYTES and hasattr(mm, 'madvise'):
+            length = (start - released) // mmap.PAGESIZE * mmap.PAGESIZE
+            mm.madvise(mmap.MADV_DONTNEED, released, length)
+            released += length
+
+
+def _text(value):
+    value = FOLD.sub(b'', value).strip().decode('utf-8', 'replace')
+    if '=?' in value:
+        # RFC 2047 encoded words, which the Gmail API decodes for us
+        try:
+            value = str(email.header.make_header(email.header.decode_header(value)))
+        except (ValueError, LookupError):
+            pass
+    return value
+
+
+def _message_id(separator, headers):
+    # Takeout writes the Gmail message id in decimal; the API uses the same number in hex
+    sender = separator[5:].split(b'@', 1)[0]
+    if sender.isdigit():
+        return format(int(sender), 'x')
+    return 'mbox-' + hashlib.sha1(headers).hexdigest()[:16]
+
+
+def _internal_date(separator, date):
+    # The separator's date is when Gmail received the message, like internalDate.
+    # Dates without a zone, from other mbox writers, are taken as UTC.
+    received = separator.split(None, 2)[2:]
+    when = None
+    for fmt in SEPARATOR_DATES:
+        try:
+            when = datetime.datetime.strptime(received[0].decode().strip(), fmt)
+            break
+        except (IndexError, UnicodeDecodeError, ValueError):
+            continue
+    if when is None:
+        try:
+            when = email.utils.parsedate_to_datetime(date)
+        except (TypeError, ValueError):
+            return 0
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=datetime.timezone.utc)
+    return int(when.timestamp() * 1000)
+
+
+def _rows(candidates, classifier):
+    statuses = classifier.classify((c[2] for c in candidates), [''] * len(candidates))
+    rows = []
+    for (separator, headers, subject, sender, date), status in zip(candidates, statuses):
+        if status == UNMATCHED:
+            continue
+        rows.append({'id': _message_id(separator, headers), 'internal_date': _internal_date(separator, date),
+                     'Subject': subject, 'From': sender, 'Date': date, 'snippet': '', 'status': status,
+                     'source': 'mbox'})
+    return rows
+
+
+def iter_mbox_rows(path, classifier=status_classifier, page_size=PAGE_ROWS):
+    """Pages of mailbox_sync rows for the job emails in the mbox at `path`, in file order.
+
+    The file is memory-mapped and only message boundaries and header blocks
+    are read; bodies are never decoded. A message is a job email when its
+    subject matches the classifier's phrases, the filter the Gmail query
+    applies (Gmail also searches bodies, so this finds a few less).
+    """
+    if not os.path.getsize(path):
+        # mmap refuses empty files
+        return
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if hasattr(mm, 'madvise'):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        candidates = []
+        for separator, headers in _messages(mm):
+            found = {name.lower(): value for name, value in HEADER.findall(headers)}
+            labels = _text(found.get(b'x-gmail-labels', b'')).lower().split(',')
+            if HIDDEN_LABELS.intersection(label.strip() for label in labels):
+                continue
+            candidates.append((separator, headers, _text(found.get(b'subject', b'')),
+                               _text(found.get(b'from', b'')), _text(found.get(b'date', b''))))
+            if len(candidates) == page_size:
+                yield _rows(candidates, classifier)
+                candidates = []
+        if candidates:
+            yield _rows(candidates, classifier)
+
+
+def iter_mbox_pages(path, classifier=status_classifier, page_size=PAGE_ROWS):
+    """The same emails as /emails records, the shape the frontend's fetch_job_emails returns."""
+    for rows in iter_mbox_rows(path, classifier, page_size):
+        if rows:
+            yield [to_record(row) for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path', help='the .mbox file')
+    parser.add_argument('--db', help='MailboxStore database to load the rows into, instead of printing records')
+    parser.add_argument('--email', help='the Gmail address whose mailbox to load into (with --db)')
+    args = parser.parse_args()
+    if bool(args.db) != bool(args.email):
+        parser.error('--db goes with --email')
+
+    if args.db:
+        from mailbox_store import MailboxStore, account_key
+
+        store, count = MailboxStore(args.db), 0
+        for rows in iter_mbox_rows(args.path):
+            store.upsert(account_key(args.email), rows)
+            count += len(rows)
+        print(f'{count} job emails loaded', file=sys.stderr)
+        return
+    for page in iter_mbox_pages(args.path):
+        sys.stdout.writelines(json.dumps(record) + "\n" for record in page)
+
+
+if __name__ == '__main__':
+    main()
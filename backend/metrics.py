@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Seconds; stretched past Prometheus' defaults because a cold sync of a big
+# mailbox takes minutes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+COUNT_BUCKETS = (0, 10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000)
+# One JSON line per request on the "jobbuddy.requests" logger
+LOG_REQUESTS = os.environ.get("METRICS_LOG_REQUESTS", "").lower() in ("1", "true", "yes")
+
+request_log = logging.getLogger("jobbuddy.requests")
+if LOG_REQUESTS and not request_log.handlers:
+    # Bare JSON lines on stderr, where gunicorn's own logs go
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter('%(message)s'))
+    request_log.addHandler(_handler)
+    request_log.setLevel(logging.INFO)
+    request_log.propagate = False
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for v in values)
+    return '{' + ','.join(f'{n}="{v}"' for n, v in zip(names, escaped)) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, '') for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        lines += [f'{self.name}{_labels(self.labels, key)} {_number(v)}' for key, v in values]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # label values -> [count per bucket (last is +Inf), sum]
+        self._values = {}
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, '') for n in self.labels)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def render(self):
+        with self._lock:
+            values = sorted((key, list(counts), total) for key, (counts, total) in self._values.items())
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        names = self.labels + ('le',)
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_labels(names, key + (bound,))} {cumulative}')
+            lines.append(f'{self.name}_sum{_labels(self.labels, key)} {_number(total)}')
+            lines.append(f'{self.name}_count{_labels(self.labels, key)} {cumulative}')
+        return lines
+
+
+class Registry:
+    """Counters and histograms for this process, rendered in the Prometheus text format.
+
+    Collectors are called at scrape time and report values the rest of the
+    backend already keeps (cache and scheduler stats) as
+    (name, type, help, [(labels dict, value)]) tuples.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, help, labels=()):
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, fn):
+        self._collectors.append(fn)
+        return fn
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines += metric.render()
+        for collect in self._collectors:
+            for name, kind, help, samples in collect():
+                lines += [f'# HELP {name} {help}', f'# TYPE {name} {kind}']
+                lines += [f'{name}{_labels(tuple(labels), tuple(labels.values()))} {_number(value)}'
+                          for labels, value in samples]
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+REQUEST_SECONDS = registry.histogram(
+    'jobbuddy_request_seconds', 'HTTP request latency, until the last byte of the body', ('endpoint', 'status'))
+REQUEST_EMAILS = registry.histogram(
+    'jobbuddy_request_emails', 'Emails returned per request', ('endpoint',), buckets=COUNT_BUCKETS)
+REQUEST_ERRORS = registry.counter('jobbuddy_request_errors_total', 'Failed requests by cause', ('endpoint', 'kind'))
+PHASE_SECONDS = registry.histogram('jobbuddy_phase_seconds', 'Time spent in each phase of a request', ('phase',))
+GMAIL_CALLS = registry.counter('jobbuddy_gmail_calls_total', 'Gmail HTTP calls (a batch counts once)', ('method',))
+GMAIL_CALL_SECONDS = registry.histogram('jobbuddy_gmail_call_seconds', 'Gmail HTTP call latency', ('method',))
+GMAIL_MESSAGES = registry.counter('jobbuddy_gmail_messages_fetched_total', 'Messages fetched with messages.get')
+WARMUPS = registry.counter('jobbuddy_warmups_total', 'Background cache warm-ups queued at login', ('result',))
+
+
+class RequestTimings:
+    """Phase durations and counts for one request, for logs and Server-Timing."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self.phases = {}
+        self.counts = {}
+
+    def add(self, phase, seconds):
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counts[name] = self.counts.get(name, 0) + amount
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def as_dict(self):
+        with self._lock:
+            return {'total_ms': round(self.elapsed() * 1000, 1),
+                    'phases_ms': {name: round(s * 1000, 1) for name, s in self.phases.items()},
+                    **self.counts}
+
+    def server_timing(self):
+        # https://www.w3.org/TR/server-timing/
+        with self._lock:
+            parts = [f"{name};dur={s * 1000:.1f}" for name, s in self.phases.items()]
+        return ', '.join(parts + [f'total;dur={self.elapsed() * 1000:.1f}'])
+
+
+# Per request thread (or greenlet under gevent); worker-pool threads see None
+_current = contextvars.ContextVar('request_timings', default=None)
+
+
+def start_request():
+    timings = RequestTimings()
+    _current.set(timings)
+    return timings
+
+
+def set_current(timings):
+    _current.set(timings)
+
+
+@contextmanager
+def span(phase):
+    """Time a block as `phase`, for the histogram and the current request's breakdown."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        PHASE_SECONDS.observe(elapsed, phase=phase)
+        timings = _current.get()
+        if timings is not None:
+            timings.add(phase, elapsed)
+
+
+def count(name, amount=1):
+    timings = _current.get()
+    if timings is not None:
+        timings.count(name, amount)
+
+
+def finish_request(timings, endpoint, method, path, status):
+    """Record a finished request: latency histogram, emails histogram and the optional log line."""
+    seconds = timings.elapsed()
+    REQUEST_SECONDS.observe(seconds, endpoint=endpoint, status=status)
+    if 'emails' in timings.counts:
+        REQUEST_EMAILS.observe(timings.counts['emails'], endpoint=endpoint)
+    if LOG_REQUESTS:
+        request_log.info(json.dumps({'method': method, 'path': path, 'endpoint': endpoint, 'status': status,
+                                     **timings.as_dict()}))
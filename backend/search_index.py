@@ -0,0 +1,199 @@
+import re
+import bisect
+import functools
+import threading
+from array import array
+
+import numpy as np
+
+# Words, keeping dotted and hyphenated ones ("greenhouse-mail.io", "front-end")
+# whole next to their parts, so either can be searched for
+WORD = re.compile(r"\w+(?:[.\-'’]\w+)*")
+PART = re.compile(r'\w+')
+FIELDS = ('subject', 'from', 'status')
+# Unqualified terms match either of these
+TEXT_FIELDS = ('subject', 'from')
+TERM = re.compile(r'(?P<negated>-)?(?:(?P<field>subject|from|status):)?(?P<text>.+)', re.I)
+
+
+def tokens(text):
+    """The searchable tokens of `text`: its lowercased words, their parts and domain suffixes."""
+    found = set()
+    for word in WORD.findall(text.lower()):
+        found.add(word)
+        if not word.isalnum():
+            found.update(PART.findall(word))
+            # "us.greenhouse-mail.io" is also found as "greenhouse-mail.io"
+            labels = word.split('.')
+            found.update('.'.join(labels[i:]) for i in range(1, len(labels) - 1))
+    return found
+
+
+def parse_query(query):
+    """AND groups of OR'd (negated, fields, token, is_prefix) terms.
+
+    Words are ANDed, OR between two words makes them alternatives (binding
+    tighter than AND, as in Gmail), -word excludes, word* matches a prefix,
+    and from:, subject: or status: limit a word to one field.
+    """
+    groups, join_next = [], False
+    for part in query.split():
+        if part == 'OR':
+            join_next = bool(groups)
+            continue
+        match = TERM.fullmatch(part)
+        negated, field = bool(match['negated']), (match['field'] or '').lower()
+        text = match['text']
+        is_prefix = text.endswith('*')
+        words = WORD.findall(text.rstrip('*').lower())
+        for i, word in enumerate(words):
+            term = (negated, (field,) if field else TEXT_FIELDS, word, is_prefix and i == len(words) - 1)
+            if join_next and i == 0:
+                groups[-1].append(term)
+            else:
+                groups.append([term])
+        join_next = False
+    return groups
+
+
+class SearchIndex:
+    """Inverted index over one mailbox's subjects, senders and statuses.
+
+    Documents are the store's rows, numbered as they're added so every posting
+    list stays sorted, and known by their store version (message id and the
+    revision that wrote them). refresh() brings the index up to the store's
+    current revision by adding the versions it hasn't seen and marking vanished
+    ones dead, so a sync that adds a few emails costs a few rows, not a rebuild.
+    """
+
+    def __init__(self):
+        self.revision = None
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self):
+        self._docs_by_version = {}
+        self._rows = []
+        self._timestamps = array('q')
+        self._alive = bytearray()
+        self._postings = {field: {} for field in FIELDS}
+        # Sorted tokens per field for prefix lookups; None until a prefix query needs them
+        self._vocabulary = {field: None for field in FIELDS}
+
+    def __len__(self):
+        return len(self._docs_by_version)
+
+    def _add(self, row):
+        version, subject, sender, date, timestamp, status = row
+        doc = len(self._rows)
+        self._docs_by_version[version] = doc
+        self._rows.append((subject, sender, date, timestamp, status))
+        self._timestamps.append(timestamp)
+        self._alive.append(1)
+        for field, words in (('subject', tokens(subject)), ('from', tokens(sender)), ('status', (status,))):
+            postings = self._postings[field]
+            for word in words:
+                docs = postings.get(word)
+                if docs is None:
+                    docs = postings[word] = array('i')
+                    self._vocabulary[field] = None
+                docs.append(doc)
+
+    def refresh(self, store, user_key):
+        """Apply the store's changes since the last refresh."""
+        revision = store.revision(user_key)
+        if revision == self.revision:
+            return
+        with self._lock:
+            if revision == self.revision:
+                return
+            current = store.versions(user_key)
+            removed = self._docs_by_version.keys() - current
+            if len(self._rows) - len(self._docs_by_version) + len(removed) > len(current):
+                # Mostly dead, as after a full resync: cheaper to start over
+                self._clear()
+                removed = ()
+            for version in removed:
+                self._alive[self._docs_by_version.pop(version)] = 0
+            added = current - self._docs_by_version.keys()
+            if added:
+                message_ids = None if not self._docs_by_version else {msg_id for msg_id, _ in added}
+                for row in sorted(store.rows_by_version(user_key, message_ids)):
+                    # A row rewritten since versions() was read is picked up by the next refresh
+                    if row[0] in added:
+                        self._add(row)
+            self.revision = revision
+
+    def _docs(self, fields, word, is_prefix):
+        found = []
+        for field in fields:
+            postings = self._postings[field]
+            if not is_prefix:
+                if word in postings:
+                    found.append(postings[word])
+                continue
+            vocabulary = self._vocabulary[field]
+            if vocabulary is None:
+                vocabulary = self._vocabulary[field] = sorted(postings)
+            for i in range(bisect.bisect_left(vocabulary, word), len(vocabulary)):
+                if not vocabulary[i].startswith(word):
+                    break
+                found.append(postings[vocabulary[i]])
+        if len(found) == 1:
+            return np.array(found[0], dtype=np.int32)
+        return self._union([np.frombuffer(docs, dtype=np.int32) for docs in found])
+
+    def _union(self, docs):
+        # Marking a mask is linear in the mailbox; sorting the concatenated lists isn't
+        if not docs:
+            return np.empty(0, dtype=np.int32)
+        if len(docs) == 1:
+            return docs[0]
+        mask = np.zeros(len(self._rows), dtype=bool)
+        for part in docs:
+            mask[part] = True
+        return np.flatnonzero(mask).astype(np.int32)
+
+    def search(self, query, limit=50):
+        """(number of matches, the newest `limit` of them as /emails records) for `query`; see parse_query."""
+        groups = parse_query(query)
+        if not groups:
+            return 0, []
+        with self._lock:
+            alive = np.frombuffer(self._alive, dtype=np.uint8).astype(bool)
+            everything = np.flatnonzero(alive).astype(np.int32)
+            required, excluded = [], []
+            for group in groups:
+                if all(negated for negated, *_ in group):
+                    # "-a OR -b" leaves out what matches both a and b
+                    docs = [self._docs(fields, word, is_prefix) for _, fields, word, is_prefix in group]
+                    excluded.append(functools.reduce(lambda a, b: np.intersect1d(a, b, assume_unique=True), docs))
+                    continue
+                required.append(self._union([
+                    np.setdiff1d(everything, docs, assume_unique=True) if negated else docs
+                    for negated, docs in ((negated, self._docs(fields, word, is_prefix))
+                                          for negated, fields, word, is_prefix in group)
+                ]))
+
+            if required:
+                # Smallest first, so each intersection is as cheap as it can be
+                required.sort(key=len)
+                matches = required[0]
+                for docs in required[1:]:
+                    matches = np.intersect1d(matches, docs, assume_unique=True)
+            else:
+                matches = everything
+            for docs in excluded:
+                matches = np.setdiff1d(matches, docs, assume_unique=True)
+            matches = matches[alive[matches]]
+
+            timestamps = np.frombuffer(self._timestamps, dtype=np.int64)[matches]
+            if len(matches) > limit:
+                # Only the page shown needs ordering
+                top = np.argpartition(-timestamps, limit - 1)[:limit]
+            else:
+                top = np.arange(len(matches))
+            top = top[np.argsort(-timestamps[top], kind='stable')]
+            results = [self._rows[doc] for doc in matches[top].tolist()]
+        return len(matches), [{'Subject': s, 'From': f, 'Date': d, 'Timestamp': ts, 'Status': st}
+                              for s, f, d, ts, st in results]
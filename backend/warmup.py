@@ -0,0 +1,112 @@
+import os
+import time
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import metrics
+
+# Warm-ups run at once per process; 0 turns them off
+WARMUP_WORKERS = int(os.environ.get("WARMUP_WORKERS", "4"))
+# Logins beyond this many queued warm-ups are left to sync on their first request
+WARMUP_QUEUE = int(os.environ.get("WARMUP_QUEUE", "64"))
+# A request waits this long for a warm-up in flight before going on without
+# it, well under the frontend's 30 s timeout
+ATTACH_SECONDS = 20
+# Workers renew their warm-up claims this often...
+HEARTBEAT_SECONDS = 5
+# ...and a claim not renewed for this long is presumed lost with its worker
+STALE_SECONDS = 20
+# A store warmed this recently is served as it is, without asking Gmail again
+FRESH_SECONDS = 60
+POLL_SECONDS = 0.05
+
+log = logging.getLogger("jobbuddy.warmup")
+
+
+class Prefetcher:
+    """Runs one background warm-up per user on a bounded pool.
+
+    Claims are recorded in the store, so a login whose callback one worker
+    served isn't warmed again by another, and requests in any worker can wait
+    for the warm-up instead of fetching the same mailbox alongside it. The
+    claiming worker renews them every HEARTBEAT_SECONDS, so a claim left by a
+    worker that died holds nobody up for more than STALE_SECONDS.
+    """
+
+    def __init__(self, store, workers=WARMUP_WORKERS, queue=WARMUP_QUEUE):
+        self.store = store
+        self.owner = uuid.uuid4().hex
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='warmup') if workers else None
+        self._limit = workers + queue
+        self._lock = threading.Lock()
+        # User key -> Future of the warm-up running or queued in this process
+        self._jobs = {}
+        # Started with the first warm-up, as the pool starts its threads
+        self._heartbeat_thread = None
+
+    def _heartbeat(self):
+        while True:
+            time.sleep(HEARTBEAT_SECONDS)
+            if self._jobs:
+                try:
+                    self.store.renew_warmups(self.owner)
+                except Exception:
+                    log.exception('Renewing warm-up claims failed')
+
+    def submit(self, key, job, *args):
+        """Queue job(*args) to warm `key`'s caches; True if it's queued, or already warming in any worker."""
+        if self._pool is None:
+            return False
+        with self._lock:
+            if key in self._jobs:
+                metrics.WARMUPS.inc(result='duplicate')
+                return True
+            if len(self._jobs) >= self._limit:
+                metrics.WARMUPS.inc(result='dropped')
+                return False
+            if not self.store.begin_warmup(key, self.owner, STALE_SECONDS):
+                metrics.WARMUPS.inc(result='duplicate')
+                return True
+            self._jobs[key] = self._pool.submit(self._run, key, job, args)
+            if self._heartbeat_thread is None:
+                self._heartbeat_thread = threading.Thread(target=self._heartbeat, name='warmup-heartbeat',
+                                                          daemon=True)
+                self._heartbeat_thread.start()
+        metrics.WARMUPS.inc(result='queued')
+        return True
+
+    def _run(self, key, job, args):
+        ok = False
+        try:
+            with metrics.span('warmup'):
+                job(*args)
+            ok = True
+        except Exception:
+            log.exception('Warm-up failed')
+        finally:
+            self.store.finish_warmup(key, self.owner, ok)
+            with self._lock:
+                self._jobs.pop(key, None)
+            metrics.WARMUPS.inc(result='done' if ok else 'failed')
+
+    def attach(self, key, timeout=ATTACH_SECONDS):
+        """Wait up to `timeout` for a live warm-up of `key`; True if one succeeded within FRESH_SECONDS."""
+        heartbeat_at, finished_at, ok = self.store.warmup_state(key)
+        if heartbeat_at is None:
+            return False
+        if finished_at is None and time.time() - heartbeat_at < STALE_SECONDS:
+            with metrics.span('warmup.wait'):
+                future = self._jobs.get(key)
+                if future is not None:
+                    wait([future], timeout)
+                else:
+                    # Another worker's: waited on only while it keeps renewing its claim
+                    deadline = time.monotonic() + timeout
+                    while (finished_at is None and time.time() - heartbeat_at < STALE_SECONDS
+                           and time.monotonic() < deadline):
+                        time.sleep(POLL_SECONDS)
+                        heartbeat_at, finished_at, ok = self.store.warmup_state(key)
+            heartbeat_at, finished_at, ok = self.store.warmup_state(key)
+        return bool(ok) and finished_at is not None and time.time() - finished_at < FRESH_SECONDS
@@ -0,0 +1,69 @@
+"""Status classification: one Aho-Corasick pass vs. a regex per status.
+
+    python bench/bench_classify.py [messages]
+"""
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+from email_status import UNMATCHED, _normalize, classifier  # noqa: E402
+
+FILLER = ("we appreciate your interest in the role and our team will review your background "
+          "carefully over the coming weeks please keep an eye on your inbox for updates").split()
+
+
+def synthetic_messages(count, seed=0):
+    rng = np.random.default_rng(seed)
+    phrases = [p for status in classifier.statuses for p in classifier.phrases[status]]
+    subjects, snippets = [], []
+    for i in range(count):
+        words = list(rng.choice(FILLER, 30))
+        # Most messages carry a phrase or two, some none at all
+        for _ in range(rng.integers(0, 3)):
+            words.insert(int(rng.integers(0, len(words))), phrases[int(rng.integers(0, len(phrases)))])
+        subjects.append(f"Your application #{i} at Company {i % 500}")
+        snippets.append(' '.join(words).replace("'", '&#39;'))
+    return subjects, snippets
+
+
+def per_status_regex(subjects, snippets):
+    # One alternation per status, tried in priority order on every message
+    patterns = [re.compile(r'\b(?:' + '|'.join(map(re.escape, classifier.phrases[s])) + r')\b')
+                for s in classifier.statuses]
+    statuses = []
+    for subject, snippet in zip(subjects, snippets):
+        text = _normalize(f"{subject}\n{snippet}")
+        statuses.append(next((s for s, p in zip(classifier.statuses, patterns) if p.search(text)), UNMATCHED))
+    return statuses
+
+
+def best_of(fn, repeat=3):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    return min(times), result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    subjects, snippets = synthetic_messages(count)
+
+    regex_seconds, expected = best_of(lambda: per_status_regex(subjects, snippets))
+    ac_seconds, statuses = best_of(lambda: classifier.classify(subjects, snippets))
+    assert statuses == expected
+
+    print(f"{count} messages, {sum(map(len, snippets)) / 1e6:.1f} MB of snippets")
+    print(f"  regex per status : {regex_seconds * 1000:8.1f} ms")
+    print(f"  Aho-Corasick     : {ac_seconds * 1000:8.1f} ms")
+    for status in classifier.statuses + [UNMATCHED]:
+        print(f"  {status:<11}{statuses.count(status):>8}")
+
+
+if __name__ == '__main__':
+    main()
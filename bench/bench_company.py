@@ -0,0 +1,89 @@
+"""Company/source resolution throughput: memoized per-sender vs. parsing every row.
+
+    python bench/bench_company.py [rows]
+"""
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'frontend'))
+from application_frame import build_application_frame  # noqa: E402
+from company_source import SUBJECT_PATTERNS, UNKNOWN, _clean_name, resolve_companies, resolve_sender  # noqa: E402
+
+RELAYS = ['no-reply@us.greenhouse-mail.io', 'no-reply@hire.lever.co', 'jobs-noreply@linkedin.com',
+          'workday@myworkday.com', 'noreply@indeed.com']
+
+
+def synthetic_mail(rows, senders=400, seed=0):
+    rng = np.random.default_rng(seed)
+    pool = []
+    for i in range(senders):
+        kind = i % 4
+        if kind == 0:
+            pool.append(f"Company{i} Careers <careers@company{i}.com>")
+        elif kind == 1:
+            pool.append(f"Company{i} via Greenhouse <no-reply@greenhouse.io>")
+        elif kind == 2:
+            pool.append(f"noreply@company{i}.wd5.myworkdayjobs.com")
+        else:
+            # Relays that only name the employer in the subject
+            pool.append(RELAYS[i % len(RELAYS)])
+    picks = rng.integers(0, senders, rows)
+    senders = [pool[p] for p in picks]
+    subjects = [f"Thank you for applying to Employer{p % 97}" if p % 4 == 3 else f"Application update {p}"
+                for p in picks]
+    return senders, subjects
+
+
+def per_row(senders, subjects):
+    # Parse every row from scratch, the way an unmemoized resolver would
+    patterns = [re.compile(p) for p in SUBJECT_PATTERNS]
+    companies, sources = [], []
+    for sender, subject in zip(senders, subjects):
+        company, source = resolve_sender.__wrapped__(sender)
+        if company is None:
+            for pattern in patterns:
+                match = pattern.search(subject)
+                company = _clean_name(match['company'].rstrip('.!,')) if match else None
+                if company:
+                    break
+        companies.append(company or UNKNOWN)
+        sources.append(source)
+    return companies, sources
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - started, result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    senders, subjects = synthetic_mail(rows)
+
+    loop_seconds, (loop_companies, loop_sources) = timed(lambda: per_row(senders, subjects))
+    resolve_sender.cache_clear()
+    cold_seconds, (company, source) = timed(lambda: resolve_companies(senders, subjects))
+    warm_seconds, _ = timed(lambda: resolve_companies(senders, subjects))
+    assert list(company) == loop_companies and list(source) == loop_sources
+
+    records = [{'Subject': s, 'From': f, 'Date': '', 'Timestamp': 1_700_000_000_000 + i, 'Status': 'applied'}
+               for i, (f, s) in enumerate(zip(senders, subjects))]
+    frame_seconds, frame = timed(lambda: build_application_frame(records))
+
+    print(f"{rows} emails, {len(set(senders))} senders, {frame['Company'].nunique()} companies")
+    print(f"  per-row parsing          : {loop_seconds * 1000:8.1f} ms ({rows / loop_seconds:12,.0f} rows/s)")
+    print(f"  memoized, cold cache     : {cold_seconds * 1000:8.1f} ms ({rows / cold_seconds:12,.0f} rows/s)")
+    print(f"  memoized, warm cache     : {warm_seconds * 1000:8.1f} ms ({rows / warm_seconds:12,.0f} rows/s)")
+    print(f"  whole application frame  : {frame_seconds * 1000:8.1f} ms (includes resolution)")
+    print(f"  sender cache             : {resolve_sender.cache_info()}")
+    print(pd.crosstab(frame['Source'], 'emails').to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""Export time and peak memory on a large mailbox: the Dashboard's download and the backend's /export.
+
+    python bench/bench_export.py [rows]
+
+Every case runs in a fresh process, after its input is built: the frame for
+the Dashboard cases, a filled SQLite store for the backend ones. Peak memory
+is how far VmHWM rose above the RSS the process had before the export, so it
+also counts Arrow's buffers, which tracemalloc can't see. Each writer runs
+once on a few rows first: the first use of Arrow in a process maps about
+50 MB of library code and allocator arenas, once per worker, not per export.
+"""
+import os
+import sys
+import json
+import time
+import random
+import tempfile
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'frontend'))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'backend'))
+
+STATUSES = ['applied'] * 12 + ['rejected'] * 4 + ['interview'] * 2 + ['assessment', 'offer']
+CASES = {
+    # What every Dashboard rerun did before: the CSV as one str, encoded to bytes by st.download_button
+    'dashboard: to_csv (old)': 'frontend',
+    'dashboard: CSV': 'frontend',
+    'dashboard: Parquet': 'frontend',
+    'dashboard: Feather (Arrow)': 'frontend',
+    # The whole mailbox as one JSON array, what a non-streamed /emails does
+    'backend: JSON list': 'backend',
+    'backend: csv': 'backend',
+    'backend: parquet': 'backend',
+    'backend: feather': 'backend',
+}
+
+
+def memory_kb():
+    usage = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            name, _, value = line.partition(':')
+            if name in ('VmRSS', 'VmHWM'):
+                usage[name] = int(value.split()[0])
+    return usage
+
+
+def synthetic_rows(rows, seed=0):
+    from fake_gmail import synthetic_senders
+
+    rng = random.Random(seed)
+    senders = synthetic_senders(seed, rows)
+    now = 1_700_000_000_000
+    for i in range(rows):
+        sender, company = rng.choice(senders)
+        yield {'id': str(i), 'internal_date': now - i * 3_600_000, 'Subject': f'Thank you for applying to {company}',
+               'From': sender, 'Date': '', 'status': rng.choice(STATUSES)}
+
+
+def frontend_case(case, rows):
+    from application_frame import build_application_frame
+    from frame_export import EXPORT_COLUMNS, export_frame
+
+    frame = build_application_frame([{'Subject': r['Subject'], 'From': r['From'], 'Timestamp': r['internal_date'],
+                                      'Status': r['status']} for r in synthetic_rows(rows)])
+    fmt = case.split(': ', 1)[1]
+    if fmt == 'to_csv (old)':
+        return lambda: frame[EXPORT_COLUMNS].to_csv(index=False).encode()
+    export_frame(frame.head(10), fmt)
+    return lambda: export_frame(frame, fmt)
+
+
+def backend_case(case, rows, db_dir):
+    from export import export_chunks
+    from mailbox_store import MailboxStore
+
+    store = MailboxStore(os.path.join(db_dir, 'bench.db'))
+    if not store.revision('bench'):
+        store.upsert('bench', synthetic_rows(rows))
+    fmt = case.split(': ', 1)[1]
+    if fmt == 'JSON list':
+        return lambda: json.dumps([e for page in store.iter_email_pages('bench') for e in page]).encode()
+    list(export_chunks(store.iter_email_pages('bench', limit=10), fmt))
+    # Stream to nowhere, as the response does to the socket
+    return lambda: sum(len(chunk) for chunk in export_chunks(store.iter_email_pages('bench'), fmt))
+
+
+def run_case(case, rows, db_dir):
+    export = frontend_case(case, rows) if CASES[case] == 'frontend' else backend_case(case, rows, db_dir)
+    before = memory_kb()['VmRSS']
+    started = time.perf_counter()
+    result = export()
+    seconds = time.perf_counter() - started
+    size = result if isinstance(result, int) else len(result)
+    return {'case': case, 'ms': round(seconds * 1000), 'bytes': size,
+            'peak_increase_kb': memory_kb()['VmHWM'] - before}
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        print(json.dumps(run_case(sys.argv[2], int(sys.argv[3]), sys.argv[4])))
+        return
+
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    print(f'{rows} emails')
+    print(f"{'case':<28} {'ms':>7} {'MB out':>8} {'peak +MB':>9}")
+    with tempfile.TemporaryDirectory() as db_dir:
+        for case in CASES:
+            output = subprocess.run([sys.executable, __file__, '--child', case, str(rows), db_dir],
+                                    capture_output=True, text=True, check=True).stdout
+            result = json.loads(output.splitlines()[-1])
+            print(f"{case:<28} {result['ms']:>7} {result['bytes'] / 2**20:>8.1f} "
+                  f"{result['peak_increase_kb'] / 1024:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
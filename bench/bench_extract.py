@@ -0,0 +1,66 @@
+"""PDF text extraction: uncached sequential parse vs. the content-hash cache and page pool.
+
+    python bench/bench_extract.py [pages]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'frontend'))
+import document_text  # noqa: E402
+
+
+def synthetic_pdf(pages, lines_per_page=45):
+    # Minimal hand-written PDF: one Helvetica text stream per page
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for p in range(pages):
+        text = b"BT /F1 10 Tf 14 TL 40 800 Td " + b" ".join(
+            b"(Page %d line %d: Python, SQL, Airflow, stakeholder management and data pipelines.) '" % (p, i)
+            for i in range(lines_per_page)) + b" ET"
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(text), text))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> "
+                       b"/Contents %d 0 R >>" % len(objects))
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % k for k in kids), pages)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % o for o in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - started, result
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    data = synthetic_pdf(pages)
+
+    sequential, expected = timed(lambda: "\n".join(document_text.iter_pdf_pages(data, workers=1)))
+    # Warm the pool first: spawning workers is a one-off cost per process
+    list(document_text.iter_pdf_pages(synthetic_pdf(document_text.PARALLEL_MIN_PAGES)))
+    parallel, text = timed(lambda: "\n".join(document_text.iter_pdf_pages(data)))
+    assert text == expected
+    first_call, _ = timed(lambda: document_text.extract_text("resume.pdf", data))
+    rerun, text = timed(lambda: document_text.extract_text("resume.pdf", data))
+    assert text == expected
+
+    print(f"{pages}-page PDF ({len(data) / 1024:.0f} KiB), {document_text.PDF_WORKERS} worker process(es)")
+    print(f"  sequential pages        : {sequential * 1000:8.1f} ms")
+    print(f"  page pool               : {parallel * 1000:8.1f} ms")
+    print(f"  extract_text, first call: {first_call * 1000:8.1f} ms")
+    print(f"  extract_text, rerun     : {rerun * 1000:8.3f} ms (content-hash cache hit)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Application frame build time vs. the old per-page pd.to_datetime path.
+
+    python bench/bench_frame.py [rows]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'frontend'))
+from application_frame import build_application_frame  # noqa: E402
+
+ZONES = ['+0000', '-0700', '+0530', '-0400', 'GMT']
+
+
+def synthetic_records(rows, with_timestamp, seed=0):
+    rng = np.random.default_rng(seed)
+    stamps = rng.integers(1_600_000_000_000, 1_760_000_000_000, rows)
+    senders = [f"Recruiting {i} <jobs@company{i}.com>" for i in range(300)]
+    records = []
+    for i, ts in enumerate(stamps):
+        date = pd.Timestamp(int(ts), unit='ms').strftime('%a, %d %b %Y %H:%M:%S ') + ZONES[i % len(ZONES)]
+        record = {'Subject': f"Thank you for applying {i}", 'From': senders[i % len(senders)], 'Date': date}
+        if with_timestamp:
+            record['Timestamp'] = int(ts)
+        records.append(record)
+    return records
+
+
+def old_pipeline(records):
+    # What render_dashboard and render_more_analysis each did before
+    df = pd.DataFrame(records)
+    df['Date'] = pd.to_datetime(df['Date'], errors='coerce', utc=True).dt.tz_convert(None)
+    df = df.dropna(subset=['Date'])
+    df['Year'] = df['Date'].dt.year
+    df['Week_Num'] = df['Date'].dt.isocalendar().week
+    df['Date_Only'] = df['Date'].dt.date
+    df['Year_Week'] = df['Date'].dt.strftime('%G-W%V')
+    return df
+
+
+def timed(fn, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    headers_only = synthetic_records(rows, with_timestamp=False)
+    with_internal_date = synthetic_records(rows, with_timestamp=True)
+
+    results = {
+        'old_to_datetime_s': timed(old_pipeline, headers_only),
+        'frame_rfc2822_s': timed(build_application_frame, headers_only),
+        'frame_internal_date_s': timed(build_application_frame, with_internal_date),
+    }
+    for name, seconds in results.items():
+        print(f"{name:>24}: {seconds * 1000:8.1f} ms  ({rows} rows)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""Per-interaction latency of the Streamlit pages: full-script reruns vs. fragment reruns.
+
+    python bench/bench_interactions.py [--messages 20000] [--repeat 10] [--app path/to/s_app.py]
+
+Starts bench/fake_gmail.py with a seeded mailbox and a backend against it,
+opens each page once through streamlit's AppTest (which fills the session's
+backend cache) and then times every interaction two ways:
+
+- full: the widget change followed by a rerun of the whole script, which is
+  what every interaction cost before the pages were split into fragments
+- fragment: the same change followed by a rerun of only the fragment that
+  owns the widget, which is what the browser asks for now
+
+AppTest always reruns the whole script, so fragment reruns are requested the
+way the browser does it, by putting the fragment's id in the rerun request.
+--app times the full reruns of another version of the script, e.g. one saved
+with `git show <rev>:frontend/s_app.py`.
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import statistics
+
+from streamlit.runtime.scriptrunner import RerunData
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1 import local_script_runner
+
+from e2e_bench import start_fake_gmail
+from load_test import BENCH_DIR, start_backend
+
+FRONTEND_DIR = os.path.abspath(os.path.join(BENCH_DIR, '..', 'frontend'))
+# --app scripts saved elsewhere still import the frontend's helper modules
+sys.path.insert(0, FRONTEND_DIR)
+
+# (page, fragment, widget kind, widget label, the two values it is toggled between)
+INTERACTIONS = [
+    ("📊 Dashboard", 'render_daily_trend', 'selectbox', "Select Time Range", ("All Time", "Last Month")),
+    ("📊 Dashboard", 'render_raw_email_data', 'toggle', "🔍 Show raw email data and export", (True, False)),
+    ("📈 More Analysis", 'render_weekly_goal', 'number_input', "Set your weekly job application goal:", (5, 20)),
+    ("📆Trackig", 'render_status_timeline', 'text_input', "🔎 Search applications", ("ac", "")),
+]
+
+# Fragment ids for the next rerun request; empty means a full rerun
+_fragment_queue = []
+
+
+def _rerun_data(**kwargs):
+    if _fragment_queue:
+        return RerunData(fragment_id_queue=list(_fragment_queue), **kwargs)
+    return RerunData(**kwargs)
+
+
+# AppTest compiles the script again for every run; the server compiles it
+# once and keeps the bytecode, so share one cache the same way
+_script_cache = ScriptCache()
+
+local_script_runner.RerunData = _rerun_data
+local_script_runner.ScriptCache = lambda: _script_cache
+
+
+def fragment_ids(at):
+    """{function name: fragment id} for the fragments the last run registered."""
+    ids = {}
+    for fragment_id, wrapper in at._fragment_storage._fragments.items():
+        for cell in wrapper.__closure__ or ():
+            if callable(cell.cell_contents) and hasattr(cell.cell_contents, '__name__'):
+                ids.setdefault(cell.cell_contents.__name__, fragment_id)
+    return ids
+
+
+def widget(at, kind, label):
+    return next(w for w in getattr(at, kind) if w.label == label)
+
+
+def show(at, page):
+    # After a fragment rerun the element tree holds only that fragment, so a
+    # plain full run would lose the page selection and land on the first page
+    at.run()
+    at.sidebar.radio[0].set_value(page).run()
+
+
+def time_interaction(at, interaction, fragment, repeat):
+    """Median milliseconds of `repeat` widget changes, each followed by a full or a fragment rerun."""
+    page, name, kind, label, values = interaction
+    samples = []
+    for i in range(repeat):
+        show(at, page)
+        if fragment:
+            fragment_id = fragment_ids(at).get(name)
+            if fragment_id is None:
+                return None
+            _fragment_queue[:] = [fragment_id]
+        widget(at, kind, label).set_value(values[i % 2])
+        try:
+            started = time.perf_counter()
+            at.run()
+            samples.append((time.perf_counter() - started) * 1000)
+        finally:
+            _fragment_queue.clear()
+        if at.exception:
+            raise RuntimeError(f'{label}: {at.exception[0].value}')
+    return statistics.median(samples)
+
+
+def open_app(app, base):
+    at = AppTest.from_file(app, default_timeout=600)
+    at.secrets['BACKEND_BASE_URL'] = base
+    # The cache filled by the first run stays fresh for the whole benchmark
+    at.secrets['FETCH_CACHE_TTL_SECONDS'] = 1e9
+    at.session_state['access_token'] = 'bench-access'
+    at.session_state['refresh_token'] = 'bench-refresh'
+    at.run()
+    return at
+
+
+def measure(app, base, repeat, fragments):
+    at = open_app(app, base)
+    results = {}
+    for interaction in INTERACTIONS:
+        page, _, _, label, _ = interaction
+        full = time_interaction(at, interaction, False, repeat)
+        frag = time_interaction(at, interaction, True, repeat) if fragments else None
+        results[(page, label)] = (full, frag)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=20000, help='synthetic mailbox size')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=10, help='timed reruns per interaction and mode')
+    parser.add_argument('--app', help='another s_app.py to time full reruns of')
+    args = parser.parse_args()
+    # Deprecation notices from every rerun would bury the results
+    logging.disable(logging.WARNING)
+
+    fake, fake_root = start_fake_gmail(args.messages, 0.0, 0.0, args.seed)
+    try:
+        with tempfile.TemporaryDirectory() as db_dir:
+            backend, base = start_backend('gevent', 1, fake_root, db_dir)
+            try:
+                started = time.perf_counter()
+                current = measure(os.path.join(FRONTEND_DIR, 's_app.py'), base, args.repeat, True)
+                print(f'{args.messages} messages, synced and measured in {time.perf_counter() - started:.0f} s\n',
+                      file=sys.stderr)
+                other = measure(args.app, base, args.repeat, False) if args.app else {}
+            finally:
+                backend.terminate()
+                backend.wait()
+    finally:
+        fake.terminate()
+        fake.wait()
+
+    header = f"{'page':<18} {'widget':<40} {'full ms':>8} {'fragment ms':>12} {'speedup':>8}"
+    if other:
+        header += f" {'--app full ms':>14}"
+    print(header)
+    for (page, label), (full, frag) in current.items():
+        line = f"{page:<18} {label:<40} {full:>8.1f} {frag:>12.1f} {full / frag:>7.1f}x"
+        if other:
+            line += f" {other[(page, label)][0]:>14.1f}"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""Messages per second and peak memory of the mbox import on a synthetic multi-GB Takeout file.
+
+    python bench/bench_mbox.py [--gb 2] [--path /tmp/takeout.mbox] [--keep] [--stdlib-mb 200]
+
+Writes an mbox shaped like a Google Takeout export: mostly non-job mail,
+some job emails with RFC 2047 subjects and folded headers, spam and trash
+labels, and a few messages with multi-MB base64 attachments. Then times
+three passes over it: a plain read of the bytes for reference, the import,
+and the standard library's mailbox module on the first --stdlib-mb MB. The
+file is usually still in the page cache from being written, so the read is
+memory bandwidth rather than disk; drop caches first to see the disk.
+"""
+import os
+import sys
+import json
+import time
+import base64
+import random
+import argparse
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'backend'))
+
+JOB_SUBJECTS = ['Thank you for applying to {company}', 'Your application was sent to {company}',
+                'Update from {company}: we regret to inform you', '{company} - invitation to interview',
+                '=?UTF-8?Q?Thank_you_for_your_application_=E2=80=93_{company}?=']
+OTHER_SUBJECTS = ['Your weekly digest', 'Receipt for your order #{n}', 'Re: dinner on Friday?',
+                  'Security alert for your account', '{company} newsletter: what we shipped', 'Invoice {n}']
+COMPANIES = ['Acme', 'Globex', 'Initech', 'Umbrella', 'Hooli', 'Stark Industries', 'Wayne Enterprises']
+LABELS = ['Inbox,Opened', 'Category Updates,Opened', 'Archived', 'Inbox,Important', 'Spam', 'Trash,Opened']
+
+
+def message(rng, n, attachment):
+    received = 1_500_000_000 + n * 900
+    company = rng.choice(COMPANIES)
+    job = rng.random() < 0.1
+    subject = rng.choice(JOB_SUBJECTS if job else OTHER_SUBJECTS).format(company=company, n=n)
+    head, _, tail = subject.rpartition(' ')
+    stamp = time.gmtime(received)
+    body = ('Lorem ipsum dolor sit amet. From the team at ' + company + '.\n') * rng.randint(20, 200)
+    parts = [
+        f"From {10**18 + n}@xxx {time.strftime('%a %b %d %H:%M:%S +0000 %Y', stamp)}\n",
+        f"X-GM-THRID: {10**18 + n}\nX-Gmail-Labels: {rng.choice(LABELS)}\n",
+        "Received: from mail.example.com (mail.example.com [203.0.113.5])\n"
+        "        by mx.google.com with ESMTPS id abc123\n"
+        f"        for <me@example.com>; {time.strftime('%a, %d %b %Y %H:%M:%S +0000', stamp)}\n",
+        f"Date: {time.strftime('%a, %d %b %Y %H:%M:%S +0000', stamp)}\n",
+        f"From: {company} Careers <jobs@{company.split()[0].lower()}.com>\n",
+        "To: me@example.com\n",
+        # Long subjects arrive folded at a space
+        f"Subject: {head}\n {tail}\n" if len(subject) > 30 and head else f"Subject: {subject}\n",
+        f"Message-ID: <{n}@example.com>\nMIME-Version: 1.0\n",
+        'Content-Type: multipart/mixed; boundary="b1"\n\n--b1\nContent-Type: text/plain\n\n',
+        # mboxrd quoting: a body line starting with "From " is written as ">From "
+        body.replace('\nFrom ', '\n>From '),
+    ]
+    text = ''.join(parts).encode()
+    if attachment:
+        text += b'\n--b1\nContent-Type: application/pdf\nContent-Transfer-Encoding: base64\n\n' + attachment
+    return text + b'\n--b1--\n\n'
+
+
+def write_mbox(path, size):
+    rng = random.Random(0)
+    # Reused blocks: generating fresh random bytes would make writing the file the slow part
+    blobs = [base64.encodebytes(os.urandom(n)) for n in (200_000, 1_000_000, 3_000_000)]
+    count = written = 0
+    with open(path, 'wb', buffering=2**22) as f:
+        while written < size:
+            attachment = rng.choice(blobs) if rng.random() < 0.03 else None
+            data = message(rng, count, attachment)
+            f.write(data)
+            written += len(data)
+            count += 1
+    return count
+
+
+def memory_kb():
+    usage = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            name, _, value = line.partition(':')
+            if name in ('VmRSS', 'VmHWM'):
+                usage[name] = int(value.split()[0])
+    return usage
+
+
+def run_case(case, path, stdlib_bytes):
+    """Runs in a fresh child, so each case's peak memory is its own."""
+    from mbox_import import iter_mbox_rows
+
+    before = memory_kb()['VmRSS']
+    messages = found = 0
+    if case == 'read':
+        started = time.perf_counter()
+        with open(path, 'rb') as f:
+            while f.read(2**24):
+                pass
+        seconds, scanned = time.perf_counter() - started, os.path.getsize(path)
+    elif case == 'import':
+        started = time.perf_counter()
+        for rows in iter_mbox_rows(path):
+            found += len(rows)
+        seconds, scanned = time.perf_counter() - started, os.path.getsize(path)
+        with open(path, 'rb') as f:
+            messages = sum(chunk.count(b'\nFrom ') for chunk in iter(lambda: f.read(2**24), b'')) + 1
+    else:
+        import mailbox
+        import email.header
+        from email_status import UNMATCHED, classifier
+
+        # mailbox.mbox indexes the whole file before the first message, so give it a slice
+        subset = path + '.stdlib'
+        with open(path, 'rb') as source, open(subset, 'wb') as target:
+            data = source.read(stdlib_bytes)
+            target.write(data[:data.rfind(b'\nFrom ') + 1])
+        del data
+        started = time.perf_counter()
+        for msg in mailbox.mbox(subset):
+            messages += 1
+            labels = (msg['X-Gmail-Labels'] or '').lower()
+            if 'spam' in labels or 'trash' in labels:
+                continue
+            subject = ' '.join((msg['Subject'] or '').split())
+            subject = str(email.header.make_header(email.header.decode_header(subject)))
+            found += classifier.classify([subject], [''])[0] != UNMATCHED
+        seconds, scanned = time.perf_counter() - started, os.path.getsize(subset)
+        os.remove(subset)
+    return {'case': case, 'seconds': seconds, 'messages': messages, 'found': found, 'bytes': scanned,
+            'peak_increase_kb': memory_kb()['VmHWM'] - before}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--gb', type=float, default=2.0, help='size of the synthetic mbox')
+    parser.add_argument('--path', default=os.path.join('/tmp', 'bench_takeout.mbox'))
+    parser.add_argument('--keep', action='store_true', help='reuse the file if it exists, and leave it behind')
+    parser.add_argument('--stdlib-mb', type=int, default=200, help='MB of the file given to mailbox.mbox')
+    parser.add_argument('--child', nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_case(args.child[0], args.child[1], int(args.child[2]))))
+        return
+
+    if not (args.keep and os.path.exists(args.path)):
+        started = time.perf_counter()
+        count = write_mbox(args.path, int(args.gb * 2**30))
+        print(f'wrote {count} messages in {time.perf_counter() - started:.0f} s')
+    print(f'{args.path}: {os.path.getsize(args.path) / 2**30:.2f} GB')
+    print(f"{'case':<8} {'s':>7} {'MB/s':>7} {'messages/s':>11} {'job emails':>11} {'peak +MB':>9}")
+    try:
+        for case in ('read', 'import', 'stdlib'):
+            output = subprocess.run([sys.executable, __file__, '--child', case, args.path,
+                                     str(args.stdlib_mb * 2**20)], capture_output=True, text=True, check=True).stdout
+            r = json.loads(output.splitlines()[-1])
+            rate = f"{r['messages'] / r['seconds']:>11.0f}" if r['messages'] else f"{'':>11}"
+            print(f"{case:<8} {r['seconds']:>7.2f} {r['bytes'] / 2**20 / r['seconds']:>7.0f} {rate} "
+                  f"{r['found'] if case != 'read' else '':>11} {r['peak_increase_kb'] / 1024:>9.1f}")
+    finally:
+        if not args.keep:
+            os.remove(args.path)
+
+
+if __name__ == '__main__':
+    main()
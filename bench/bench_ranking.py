@@ -0,0 +1,63 @@
+"""Batch JD ranking vs. calling the single-JD analysis once per posting.
+
+    python bench/bench_ranking.py [job_descriptions]
+"""
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'frontend'))
+from resume_ranking import rank_job_descriptions  # noqa: E402
+
+
+def synthetic_documents(count, words_per_doc=450, vocabulary_size=8000, seed=0):
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array([f"skill{i}" for i in range(vocabulary_size)])
+    # Zipf-ish word frequencies, like real postings
+    p = 1 / np.arange(1, vocabulary_size + 1)
+    p /= p.sum()
+    resume = ' '.join(rng.choice(vocabulary, 900, p=p))
+    jds = [(f"jd_{i:05d}.pdf", ' '.join(rng.choice(vocabulary, words_per_doc, p=p))) for i in range(count)]
+    return resume, jds
+
+
+def per_pair(resume_text, jd_text):
+    # What the analyzer did per upload: tokenize both, rebuild the stopwords
+    stopwords = set(["and", "or", "the", "a", "an", "with", "to", "for", "of", "in", "on", "is", "are", "you", "your"])
+    jd_words = re.findall(r'\b\w+\b', jd_text.lower())
+    jd_keywords = set([w for w in jd_words if w not in stopwords and len(w) > 2])
+    resume_words = set(re.findall(r'\b\w+\b', resume_text.lower()))
+    matched = jd_keywords.intersection(resume_words)
+    return int(len(matched) / len(jd_keywords) * 100) if jd_keywords else 0
+
+
+def best_of(fn, repeat=3):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    return min(times), result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    resume, jds = synthetic_documents(count)
+
+    loop_seconds, loop_scores = best_of(lambda: [per_pair(resume, text) for _, text in jds])
+    batch_seconds, ranking = best_of(lambda: rank_job_descriptions(resume, jds))
+
+    by_name = ranking.set_index('Job Description')['Match %']
+    assert all(by_name[name] == score for (name, _), score in zip(jds, loop_scores))
+
+    print(f"{count} job descriptions")
+    print(f"  per-pair analysis loop : {loop_seconds * 1000:8.1f} ms (match % only)")
+    print(f"  batch ranking          : {batch_seconds * 1000:8.1f} ms (match %, TF-IDF %, missing keywords)")
+    print(ranking.head(5).to_string())
+
+
+if __name__ == '__main__':
+    main()
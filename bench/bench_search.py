@@ -0,0 +1,108 @@
+"""Search index build, incremental refresh and query latency over a large mailbox.
+
+    python bench/bench_search.py [rows]      # default: 100000
+
+Fills a SQLite store with synthetic job emails (varied roles, employers,
+senders and requisition numbers), builds the index the way /search does,
+then times each query QUERY_REPEATS times. For comparison, the same words
+are also looked up the way the Dashboard would have: a pandas string scan
+of the application frame's Subject and From columns.
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+import statistics
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'backend'))
+
+from mailbox_store import MailboxStore  # noqa: E402
+from search_index import SearchIndex  # noqa: E402
+
+ROLES = ['Software Engineer', 'Senior Software Engineer', 'Data Scientist', 'Machine Learning Engineer',
+         'Product Manager', 'Backend Developer', 'Front-End Developer', 'DevOps Engineer', 'Data Analyst',
+         'Site Reliability Engineer', 'Engineering Manager', 'QA Engineer', 'Solutions Architect']
+# (subject, status)
+TEMPLATES = [
+    ('Thank you for applying to {company} - {role} (R-{req})', 'applied'),
+    ('{company}: we have received your application for {role}', 'applied'),
+    ('Your application was sent to {company}', 'applied'),
+    ('Update on your {role} application at {company}', 'rejected'),
+    ('Invitation to interview: {role}, {company}', 'interview'),
+    ('{company} online assessment for {role} #{req}', 'assessment'),
+    ('Offer letter - {role} at {company}', 'offer'),
+]
+SENDERS = ['{company} Careers <careers@{domain}>', '{company} via Greenhouse <no-reply@us.greenhouse-mail.io>',
+           '{company} Hiring Team <no-reply@hire.lever.co>', 'noreply@{tenant}.wd5.myworkdayjobs.com',
+           'LinkedIn <jobs-noreply@linkedin.com>']
+QUERIES = ['engineer', 'acme', 'data scientist', 'status:interview', 'from:greenhouse', 'engin*', 'r-123*',
+           'status:offer OR status:interview', 'engineer -senior', 'from:linkedin.com data*',
+           'machine learning engineer status:rejected', 'zzzz']
+QUERY_REPEATS = 50
+
+
+def synthetic_rows(rows, seed=0):
+    rng = random.Random(seed)
+    companies = [f'{a}{b}' for a in ('Acme', 'Globex', 'Initech', 'Umbrella', 'Hooli', 'Stark', 'Wayne', 'Pied',
+                                     'Cyber', 'Zen', 'Nex', 'Sol') for b in ('', 'Labs', 'Corp', 'Works', 'AI', 'io')]
+    for i in range(rows):
+        company = rng.choice(companies)
+        subject, status = rng.choice(TEMPLATES)
+        sender = rng.choice(SENDERS).format(company=company, domain=f'{company.lower()}.com', tenant=company.lower())
+        yield {'id': str(i), 'internal_date': 1_700_000_000_000 - i * 600_000, 'Date': '', 'status': status,
+               'Subject': subject.format(company=company, role=rng.choice(ROLES), req=rng.randint(10000, 99999)),
+               'From': sender}
+
+
+def timed_ms(fn):
+    started = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - started) * 1000, result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    with tempfile.TemporaryDirectory() as db_dir:
+        store = MailboxStore(os.path.join(db_dir, 'bench.db'))
+        store.upsert('bench', synthetic_rows(rows))
+
+        index = SearchIndex()
+        build_ms, _ = timed_ms(lambda: index.refresh(store, 'bench'))
+        noop_ms, _ = timed_ms(lambda: index.refresh(store, 'bench'))
+        store.upsert('bench', synthetic_rows(50, seed=1))
+        store.delete('bench', [str(i) for i in range(100, 110)])
+        update_ms, _ = timed_ms(lambda: index.refresh(store, 'bench'))
+        print(f'{len(index)} emails: build {build_ms:.0f} ms, refresh with nothing new {noop_ms:.2f} ms, '
+              f'after +50/-10 emails {update_ms:.0f} ms')
+
+        import pandas as pd
+
+        frame = pd.DataFrame.from_records([(e['Subject'], e['From']) for page in store.iter_email_pages('bench')
+                                           for e in page], columns=['Subject', 'From'])
+
+        def scan(query):
+            # What a text filter on the Dashboard costs: every word is a pass over both columns
+            mask = pd.Series(True, index=frame.index)
+            for word in query.split():
+                mask &= (frame['Subject'].str.contains(word, case=False, regex=False)
+                         | frame['From'].str.contains(word, case=False, regex=False))
+            return int(mask.sum())
+
+        print(f"{'query':<44} {'matches':>8} {'p50 ms':>7} {'p95 ms':>7} {'max ms':>7} {'pandas ms':>10}")
+        worst = 0
+        for query in QUERIES:
+            index.search(query)
+            times = sorted(timed_ms(lambda: index.search(query))[0] for _ in range(QUERY_REPEATS))
+            total, _ = index.search(query)
+            p95 = times[int(len(times) * 0.95) - 1]
+            worst = max(worst, p95)
+            plain = ':' not in query and '*' not in query and ' OR ' not in query and '-' not in query
+            scan_ms = f'{timed_ms(lambda: scan(query))[0]:>10.0f}' if plain else f"{'':>10}"
+            print(f'{query:<44} {total:>8} {statistics.median(times):>7.2f} {p95:>7.2f} {times[-1]:>7.2f} {scan_ms}')
+        print(f'slowest p95: {worst:.2f} ms ({"under" if worst < 10 else "OVER"} the 10 ms target)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""Streamlit cold start: time, memory and imports of the first run and of opening each page.
+
+    python bench/bench_startup.py [--app path/to/s_app.py] [--output startup.json]
+    python bench/bench_startup.py --baseline startup.json   # exit 1 on regressions
+
+Each page is measured in a fresh interpreter, the way a container that just
+woke up sees it: the first script run (which shows the Home page), then a
+switch to the page. Both steps report wall time, resident memory and the
+modules imported so far. The session isn't logged in, so pages draw their
+empty states without calling the backend: what's measured is the import
+graph and the page code, not data.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP = os.path.join(BENCH_DIR, '..', 'frontend', 's_app.py')
+PAGES = ["🏠 Home", "📊 Dashboard", "📈 More Analysis", "📆Trackig", "🕵️‍♂️Resume Analyzer"]
+# Libraries worth knowing about when they show up in a process
+HEAVY = ['numpy', 'pandas', 'pyarrow', 'altair', 'requests', 'PyPDF2', 'docx', 'matplotlib', 'openai']
+NOT_COMPARED = {'heavy'}
+
+
+def memory_kb():
+    # VmHWM is the peak resident set size since the process started
+    usage = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            name, _, value = line.partition(':')
+            if name in ('VmRSS', 'VmHWM'):
+                usage[name] = int(value.split()[0])
+    return usage
+
+
+def snapshot(started):
+    usage = memory_kb()
+    return {'ms': round((time.perf_counter() - started) * 1000, 1), 'rss_kb': usage['VmRSS'],
+            'peak_rss_kb': usage['VmHWM'], 'modules': len(sys.modules),
+            'heavy': [name for name in HEAVY if name in sys.modules]}
+
+
+def measure_page(app, page):
+    """Runs in the child: the first run, then opening `page`."""
+    from streamlit.testing.v1 import AppTest
+
+    result = {'page': page, 'streamlit_rss_kb': memory_kb()['VmRSS']}
+    at = AppTest.from_file(app, default_timeout=120)
+    # Nothing listens here; a page that calls the backend anyway fails fast
+    at.secrets['BACKEND_BASE_URL'] = 'http://127.0.0.1:9'
+    started = time.perf_counter()
+    at.run()
+    result['first_run'] = snapshot(started)
+    if page != PAGES[0]:
+        started = time.perf_counter()
+        at.sidebar.radio[0].set_value(page).run()
+        result['open_page'] = snapshot(started)
+    if at.exception:
+        raise RuntimeError(f'{page}: {at.exception[0].value}')
+    return result
+
+
+def run_child(app, page):
+    output = subprocess.run([sys.executable, __file__, '--app', app, '--child', page],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def flatten(result):
+    return {f'{step}.{name}': value for step in ('first_run', 'open_page') for name, value in result.get(step, {}).items()}
+
+
+def regressions(report, baseline, tolerance, min_delta_ms=20, min_delta_kb=2048):
+    """Lines describing every number worse than the baseline's by more than tolerance."""
+    previous = {r['page']: flatten(r) for r in baseline.get('results', [])}
+    found = []
+    for result in report['results']:
+        before = previous.get(result['page'], {})
+        for name, value in flatten(result).items():
+            old = before.get(name)
+            if name.split('.')[1] in NOT_COMPARED or not old:
+                continue
+            # Small absolute moves are noise on a shared machine
+            if name.endswith('ms') and value - old < min_delta_ms:
+                continue
+            if name.endswith('_kb') and value - old < min_delta_kb:
+                continue
+            if (value - old) / old > tolerance:
+                found.append(f"{result['page']}: {name} {old} -> {value} ({(value - old) / old:+.0%})")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--app', default=APP, help='the Streamlit script to measure')
+    parser.add_argument('--repeat', type=int, default=3, help='fresh processes per page; the fastest is kept')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    parser.add_argument('--baseline', help='earlier JSON report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed growth before a regression')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    app = os.path.abspath(args.app)
+
+    if args.child:
+        # The app's helper modules live next to s_app.py, wherever --app is
+        sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'frontend'))
+        print(json.dumps(measure_page(app, args.child)))
+        return
+
+    report = {'meta': {'app': app, 'python': sys.version.split()[0], 'cpus': os.cpu_count()}, 'results': []}
+    for page in PAGES:
+        runs = [run_child(app, page) for _ in range(args.repeat)]
+        result = min(runs, key=lambda r: r.get('open_page', r['first_run'])['ms'])
+        report['results'].append(result)
+        opened = result.get('open_page', result['first_run'])
+        print(f"{page:<22} first run {result['first_run']['ms']:>6.0f} ms {result['first_run']['rss_kb'] / 1024:>5.0f} MB"
+              f" | opened {opened['ms']:>6.0f} ms {opened['rss_kb'] / 1024:>5.0f} MB {opened['modules']:>5} modules"
+              f"  {' '.join(opened['heavy'])}", file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(report, json.load(f), args.tolerance)
+        for line in found:
+            print(f'REGRESSION {line}', file=sys.stderr)
+        sys.exit(1 if found else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""Time to first Dashboard after login, with and without the login warm-up.
+
+    python bench/bench_warmup.py [--messages 2000] [--latency 0.05] [--logins 5] [--redirect-ms 0,1000,3000]
+
+Starts bench/fake_gmail.py with --latency on every call and two backends
+like the default deployment (gevent, two workers), one with WARMUP_WORKERS=0.
+Each login goes through the real /login and /callback, the fake's token
+endpoint handing out a new refresh token, so every login is a mailbox the
+backend hasn't seen. After the callback's redirect and --redirect-ms for the
+browser and Streamlit to get going, the Dashboard's first requests follow:
+/emails as Arrow, then /stats. Time to first Dashboard runs from the
+callback request to the last byte of /stats; "waiting" is the part of it
+after the redirect, what the user sits through. Gmail calls per login show
+whether the warm-up and the Dashboard fetched the mailbox twice.
+"""
+import os
+import json
+import time
+import argparse
+import datetime
+import statistics
+import subprocess
+import urllib.parse
+
+import requests
+
+from load_test import BACKEND_DIR, free_port, percentile, start_fake_gmail, wait_until_up
+
+ARROW_STREAM = 'application/vnd.apache.arrow.stream'
+
+
+def start_backend(fake_root, db_path, warmup_workers):
+    port = free_port()
+    base = f'http://127.0.0.1:{port}'
+    client = {'web': {'client_id': 'bench', 'client_secret': 'bench', 'auth_uri': fake_root + 'auth',
+                      'token_uri': fake_root + 'token'}}
+    env = dict(os.environ,
+               GOOGLE_OAUTH_CLIENT_JSON=json.dumps(client),
+               GMAIL_API_ROOT=fake_root,
+               GOOGLE_TOKEN_URI=fake_root + 'token',
+               BACKEND_BASE_URL=base,
+               STREAMLIT_BASE_URL='http://streamlit.invalid',
+               # The callback URL is plain http here
+               OAUTHLIB_INSECURE_TRANSPORT='1',
+               MAILBOX_DB_PATH=db_path,
+               GMAIL_USER_UNITS_PER_SECOND='1000000',
+               GMAIL_PROJECT_UNITS_PER_SECOND='1000000',
+               GUNICORN_WORKER_CLASS='gevent',
+               WEB_CONCURRENCY='2',
+               WARMUP_WORKERS=str(warmup_workers))
+    proc = subprocess.Popen(['gunicorn', '-c', 'gunicorn.conf.py', '-b', f'127.0.0.1:{port}', 'app:app'],
+                            cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wait_until_up(proc, base + '/health', 'gunicorn')
+    return proc, base
+
+
+def gmail_calls(fake_root):
+    counts = requests.get(fake_root + '_counts').json()
+    return sum(n for name, n in counts.items() if name != 'token')
+
+
+def first_dashboard(base, redirect_seconds):
+    """Milliseconds from the OAuth callback to the Dashboard's data, as one new user."""
+    # /login's redirect carries the state the callback checks against the session
+    # cookie, so both go through one session; the fake takes any code
+    browser = requests.Session()
+    location = browser.get(base + '/login', allow_redirects=False, timeout=10).headers['Location']
+    state = urllib.parse.parse_qs(urllib.parse.urlparse(location).query)['state'][0]
+
+    started = time.perf_counter()
+    response = browser.get(base + '/callback', params={'state': state, 'code': 'bench'}, allow_redirects=False,
+                           timeout=60)
+    if response.status_code != 302:
+        raise RuntimeError(f'/callback failed: {response.status_code} {response.text[:200]}')
+    tokens = urllib.parse.parse_qs(urllib.parse.urlparse(response.headers['Location']).query)
+    headers = {'Access-Token': tokens['access_token'][0], 'Refresh-Token': tokens['refresh_token'][0]}
+    time.sleep(redirect_seconds)
+
+    emails = requests.get(base + '/emails', headers=dict(headers, Accept=ARROW_STREAM), timeout=600)
+    stats = requests.get(base + '/stats', headers=headers, params={'today': datetime.date.today().isoformat()},
+                         timeout=600)
+    elapsed = (time.perf_counter() - started) * 1000
+    for r in (emails, stats):
+        r.raise_for_status()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=2000, help='job emails in the fake mailbox')
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds the fake adds to every call')
+    parser.add_argument('--logins', type=int, default=5, help='logins per case')
+    parser.add_argument('--redirect-ms', default='0,1000,3000',
+                        help='comma-separated delays between the callback and the first request')
+    parser.add_argument('--db-dir', default='/tmp')
+    args = parser.parse_args()
+    delays = [int(ms) for ms in args.redirect_ms.split(',')]
+
+    fake, fake_root = start_fake_gmail(args.messages, args.latency)
+    print(f'{args.messages} emails, {args.latency * 1000:.0f} ms per Gmail call, {args.logins} logins per case')
+    print(f"{'warm-up':<8} {'redirect ms':>11} {'p50 ms':>8} {'p95 ms':>8} {'waiting p50':>12} {'Gmail calls':>12}")
+    try:
+        for warmup in (False, True):
+            db_path = os.path.join(args.db_dir, f'bench_warmup_{os.getpid()}_{int(warmup)}.db')
+            backend, base = start_backend(fake_root, db_path, 4 if warmup else 0)
+            try:
+                for delay in delays:
+                    times, before = [], gmail_calls(fake_root)
+                    for _ in range(args.logins):
+                        times.append(first_dashboard(base, delay / 1000))
+                    calls = (gmail_calls(fake_root) - before) / args.logins
+                    p50 = statistics.median(times)
+                    print(f"{'on' if warmup else 'off':<8} {delay:>11} {p50:>8.0f} {percentile(times, 95):>8.0f} "
+                          f"{p50 - delay:>12.0f} {calls:>12.1f}")
+            finally:
+                backend.terminate()
+                backend.wait()
+                for suffix in ('', '-wal', '-shm'):
+                    if os.path.exists(db_path + suffix):
+                        os.remove(db_path + suffix)
+    finally:
+        fake.terminate()
+
+
+if __name__ == '__main__':
+    main()
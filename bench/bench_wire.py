@@ -0,0 +1,74 @@
+"""Bytes on the wire and client decode time for /emails: JSON, NDJSON and the Arrow stream.
+
+    python bench/bench_wire.py [rows ...]      # default: 10000 100000
+
+Payloads are encoded from a filled SQLite store the way the backend's /emails
+does, then decoded the way the frontend does, up to the application frame.
+'NDJSON + gzip' is what HTTP compression alone would give the current format.
+Times are the fastest of three runs.
+"""
+import io
+import os
+import sys
+import gzip
+import json
+import time
+import tempfile
+
+from bench_export import synthetic_rows
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'frontend'))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'backend'))
+
+from application_frame import build_application_frame, read_email_stream  # noqa: E402
+from export import arrow_stream_chunks  # noqa: E402
+from mailbox_store import MailboxStore  # noqa: E402
+
+
+def ndjson(pages):
+    return b''.join((json.dumps(info) + "\n").encode() for page in pages for info in page)
+
+
+def read_ndjson(payload):
+    return [json.loads(line) for line in payload.splitlines() if line]
+
+
+# name -> (encode(pages) -> bytes, decode(bytes) -> what build_application_frame takes)
+FORMATS = {
+    'JSON list': (lambda pages: json.dumps([e for page in pages for e in page]).encode(), json.loads),
+    'NDJSON': (ndjson, read_ndjson),
+    'NDJSON + gzip': (lambda pages: gzip.compress(ndjson(pages), compresslevel=6),
+                      lambda payload: read_ndjson(gzip.decompress(payload))),
+    'Arrow stream': (lambda pages: b''.join(arrow_stream_chunks(pages)),
+                     lambda payload: read_email_stream(io.BytesIO(payload))[0]),
+}
+
+
+def timed(fn, repeat=3):
+    best, result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000, result
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    print(f"{'rows':>7} {'format':<14} {'KB':>8} {'B/row':>6} {'encode ms':>10} {'decode ms':>10} {'frame ms':>9}")
+    with tempfile.TemporaryDirectory() as db_dir:
+        for rows in sizes:
+            store = MailboxStore(os.path.join(db_dir, f'{rows}.db'))
+            store.upsert('bench', synthetic_rows(rows))
+            for name, (encode, decode) in FORMATS.items():
+                encode_ms, payload = timed(lambda: encode(store.iter_email_pages('bench')))
+                decode_ms, emails = timed(lambda: decode(payload))
+                frame_ms, _ = timed(lambda: build_application_frame(emails))
+                print(f"{rows:>7} {name:<14} {len(payload) / 1024:>8.0f} {len(payload) / rows:>6.1f} "
+                      f"{encode_ms:>10.0f} {decode_ms:>10.0f} {frame_ms:>9.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,241 @@
+"""End-to-end benchmark: backend /emails and /stats, plus the frontend data pipeline, vs. mailbox size.
+
+    python bench/e2e_bench.py [--sizes 100,1000,10000,100000] [--output results.json]
+    python bench/e2e_bench.py --baseline results.json   # exit 1 on regressions
+
+For every size, starts bench/fake_gmail.py with a seeded mailbox and a
+single-worker backend against it, then measures as one user of the frontend:
+
+- cold: the first /emails (a full sync), streamed as NDJSON like the app reads it
+- warm: repeated /emails against the synced store, sequential and concurrent
+- revalidate: /emails with the ETag from before (a 304)
+- incremental: /emails after new mail arrives (a history sync)
+- stats: /stats, cold and cached
+- frontend: the frames render_dashboard, render_more_analysis and the
+  Tracking page build from those responses
+- memory: the backend worker's peak and current RSS, and the Gmail calls made
+
+Results are written as JSON. With --baseline, timings and memory more than
+--tolerance worse than the baseline's are listed and the exit code is 1.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from load_test import BENCH_DIR, free_port, percentile, start_backend, wait_until_up
+
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'frontend'))
+from application_frame import application_timeline, build_application_frame, company_summary, daily_frame  # noqa: E402,E501
+
+# Metrics where bigger is better; every other number is a cost
+HIGHER_IS_BETTER = {'warm_rps', 'cold_emails_per_second'}
+# Counts and sizes that describe the run rather than measure it
+NOT_COMPARED = {'messages', 'emails', 'response_bytes', 'gmail_calls'}
+
+
+def start_fake_gmail(messages, latency, error_rate, seed):
+    port = free_port()
+    proc = subprocess.Popen([sys.executable, os.path.join(BENCH_DIR, 'fake_gmail.py'), '--port', str(port),
+                             '--messages', str(messages), '--latency', str(latency), '--seed', str(seed),
+                             '--error-rate', str(error_rate)],
+                            stdout=subprocess.DEVNULL)
+    root = f'http://127.0.0.1:{port}/'
+    wait_until_up(proc, root + '_counts', 'fake Gmail')
+    return proc, root
+
+
+def worker_pid(master_pid):
+    # The one gunicorn worker is the master's child process
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    if int(f.read().rsplit(')', 1)[1].split()[1]) == master_pid:
+                        return int(entry)
+            except (OSError, IndexError, ValueError):
+                continue
+    return None
+
+
+def memory_kb(pid):
+    # VmHWM is the peak resident set size since the process started
+    usage = {}
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            name, _, value = line.partition(':')
+            if name in ('VmRSS', 'VmHWM'):
+                usage[name] = int(value.split()[0])
+    return usage
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - started) * 1000, result
+
+
+def read_emails(base, headers, etag=None):
+    """(status, records, bytes, ETag) for one streamed /emails request."""
+    if etag:
+        headers = dict(headers, **{'If-None-Match': etag})
+    with requests.get(base + '/emails', headers=headers, params={'stream': 1}, stream=True, timeout=600) as response:
+        size, records = 0, []
+        for line in response.iter_lines():
+            if line:
+                size += len(line) + 1
+                records.append(json.loads(line))
+        if response.status_code not in (200, 304) or any('error' in r for r in records[-1:]):
+            raise RuntimeError(f'/emails failed: {response.status_code} {records[-1:]}')
+        return response.status_code, records, size, response.headers.get('ETag')
+
+
+def measure(base, fake_root, master_pid, args):
+    headers = {'Access-Token': 'bench-access', 'Refresh-Token': 'bench-refresh'}
+    gmail_before = requests.get(fake_root + '_counts').json()
+    result = {}
+
+    cold_ms, (_, records, size, _) = timed(lambda: read_emails(base, headers))
+    result.update(cold_emails_ms=round(cold_ms, 1), emails=len(records), response_bytes=size,
+                  cold_emails_per_second=round(len(records) / cold_ms * 1000, 1))
+
+    warm = [timed(lambda: read_emails(base, headers))[0] for _ in range(args.requests)]
+    result.update(warm_p50_ms=round(percentile(warm, 50), 1), warm_p99_ms=round(percentile(warm, 99), 1))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(lambda _: read_emails(base, headers), range(args.requests)))
+    result['warm_rps'] = round(args.requests / (time.perf_counter() - started), 2)
+
+    # Only responses served from the synced store carry an ETag
+    etag = read_emails(base, headers)[3]
+    revalidate_ms, (status, _, _, _) = timed(lambda: read_emails(base, headers, etag))
+    assert status == 304, f'expected a 304 for an unchanged mailbox, got {status}'
+    result['revalidate_ms'] = round(revalidate_ms, 1)
+
+    requests.post(fake_root + '_mailbox', json={'add': args.new_mail})
+    incremental_ms, (_, updated, _, _) = timed(lambda: read_emails(base, headers))
+    assert len(updated) == len(records) + args.new_mail, 'new mail missing after the incremental sync'
+    result['incremental_ms'] = round(incremental_ms, 1)
+
+    def get_stats():
+        response = requests.get(base + '/stats', headers=headers, params={'today': '2023-11-15'}, timeout=600)
+        response.raise_for_status()
+        return response.json()
+
+    stats_ms, stats = timed(get_stats)
+    result['stats_cold_ms'] = round(stats_ms, 1)
+    result['stats_cached_ms'] = round(timed(get_stats)[0], 1)
+
+    # Frontend: what the pages build from those responses
+    result['frame_ms'] = round(timed(lambda: build_application_frame(records))[0], 1)
+    frame = build_application_frame(records)
+    result['dashboard_ms'] = round(timed(lambda: daily_frame(stats))[0], 1)
+    result['tracking_ms'] = round(timed(lambda: (application_timeline(frame), company_summary(frame)))[0], 1)
+
+    pid = worker_pid(master_pid)
+    if pid:
+        usage = memory_kb(pid)
+        result.update(worker_peak_rss_kb=usage.get('VmHWM'), worker_rss_kb=usage.get('VmRSS'))
+    gmail_after = requests.get(fake_root + '_counts').json()
+    result['gmail_calls'] = {k: v - gmail_before.get(k, 0) for k, v in gmail_after.items()
+                             if v != gmail_before.get(k, 0)}
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=BENCH_DIR, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def regressions(report, baseline, tolerance, min_delta_ms=5):
+    """Lines describing every metric worse than the baseline's by more than tolerance.
+
+    Timings that moved by less than min_delta_ms are left out, since a few
+    milliseconds either way is noise.
+    """
+    previous = {r['messages']: r for r in baseline.get('results', [])}
+    found = []
+    for result in report['results']:
+        before = previous.get(result['messages'])
+        if before is None:
+            continue
+        for name, value in result.items():
+            old = before.get(name)
+            if name in NOT_COMPARED or not isinstance(value, (int, float)) or not old:
+                continue
+            if name.endswith('_ms') and abs(value - old) < min_delta_ms:
+                continue
+            change = (value - old) / old
+            worse = -change if name in HIGHER_IS_BETTER else change
+            if worse > tolerance:
+                found.append(f"{result['messages']} messages: {name} {old} -> {value} ({change:+.0%})")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='100,1000,10000', help='comma-separated mailbox sizes')
+    parser.add_argument('--latency', type=float, default=0.0, help='fake Gmail latency per HTTP call (s)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of Gmail calls answered with a 429')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--requests', type=int, default=20, help='warm /emails requests per measurement')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--new-mail', type=int, default=10, help='messages arriving before the incremental sync')
+    parser.add_argument('--worker-class', default='gevent')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    parser.add_argument('--baseline', help='earlier JSON report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown before a regression')
+    parser.add_argument('--min-delta-ms', type=float, default=5, help='ignore timing changes smaller than this')
+    args = parser.parse_args()
+
+    report = {
+        'meta': {'commit': git_commit(), 'python': platform.python_version(), 'platform': platform.platform(),
+                 'cpus': os.cpu_count(), 'started': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())},
+        'config': {k: v for k, v in vars(args).items() if k not in ('output', 'baseline', 'tolerance', 'min_delta_ms')},
+        'results': [],
+    }
+    for size in [int(s) for s in args.sizes.split(',')]:
+        fake, fake_root = start_fake_gmail(size, args.latency, args.error_rate, args.seed)
+        try:
+            with tempfile.TemporaryDirectory() as db_dir:
+                backend, base = start_backend(args.worker_class, 1, fake_root, db_dir)
+                try:
+                    result = {'messages': size, **measure(base, fake_root, backend.pid, args)}
+                finally:
+                    backend.terminate()
+                    backend.wait()
+        finally:
+            fake.terminate()
+            fake.wait()
+        report['results'].append(result)
+        print(f"{size:>7} messages: cold {result['cold_emails_ms']:.0f} ms, warm p50 {result['warm_p50_ms']:.0f} ms, "
+              f"{result['warm_rps']} rps, peak RSS {result.get('worker_peak_rss_kb')} kB", file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(report, json.load(f), args.tolerance, args.min_delta_ms)
+        for line in found:
+            print(f'REGRESSION {line}', file=sys.stderr)
+        sys.exit(1 if found else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,403 @@
+"""A local stand-in for the Gmail REST endpoints the backend uses.
+
+    python bench/fake_gmail.py --port 8765 --messages 1000 --latency 0.05
+    python bench/fake_gmail.py --messages 100000 --seed 1 --error-rate 0.02
+
+Serves messages.list (paged, honouring after: in q), messages.get (metadata
+headers), history.list, getProfile, the OAuth token endpoint (refreshes and
+authorization codes) and batch requests. Point the backend at it with
+GMAIL_API_ROOT=http://127.0.0.1:8765/ and GOOGLE_TOKEN_URI=http://127.0.0.1:8765/token.
+
+Not part of the Gmail API: GET /_counts returns calls served per endpoint,
+and POST /_mailbox with {"add": n, "delete": [ids], "expire_history": true}
+changes the mailbox so incremental syncs have history to read.
+"""
+import re
+import json
+import time
+import bisect
+import itertools
+import random
+import argparse
+import threading
+import http
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MESSAGE_PATH = re.compile(r'^/gmail/v1/users/me/messages/(?P<id>[^/?]+)$')
+AFTER = re.compile(r'\bafter:(\d+)')
+# One match per batch part: its Content-ID and the request line it wraps.
+# Cheaper than the email package, which would make the fake the bottleneck.
+BATCH_PART = re.compile(rb'Content-ID:\s*<([^>]*)>.*?\r?\n\r?\n([A-Z]+) (\S+)', re.S | re.I)
+BASE_TIME_MS = 1_700_000_000_000
+HOUR_MS = 3_600_000
+SENDERS = ['Acme Careers <jobs@acme.com>', 'Globex via Greenhouse <no-reply@greenhouse.io>',
+           'Initech Talent <talent@initech.com>', 'Workday <workday@myworkday.com>']
+COMPANIES = ['Acme', 'Globex', 'Initech', 'Umbrella']
+# (subject, snippet) templates; most mail is application receipts, with the
+# occasional follow-up so status classification has something to find
+TEMPLATES = [
+    ('Thank you for applying - role {i}', 'Thank you for applying to {company} for role {i}. '
+                                          'We have received your application.'),
+    ('Update on role {i}', 'Unfortunately we won&#39;t be moving forward with your application for role {i}.'),
+    ('Interview invitation - role {i}', 'We would like to schedule an interview for role {i}.'),
+    ('Next steps for role {i}', 'Please complete the online assessment for role {i} within 7 days.'),
+    ('Offer - role {i}', 'We are pleased to offer you the position. Your offer letter is attached.'),
+]
+TEMPLATE_WEIGHTS = [12, 4, 2, 1, 1]
+TEMPLATE_CYCLE = [t for t, w in zip(TEMPLATES, TEMPLATE_WEIGHTS) for _ in range(w)]
+# Seeded mailboxes: employer names and the ways their mail reaches the inbox
+NAME_PARTS = (['Ac', 'Glo', 'Ini', 'Um', 'Vand', 'Hoo', 'Stark', 'Wayne', 'Sol', 'Nex', 'Pied', 'Cyber', 'Oscor',
+               'Tyr', 'Mass', 'Virt', 'Zen', 'Aper', 'Bio', 'Quant'],
+              ['me', 'bex', 'tech', 'brella', 'elay', 'li', 'corp', 'ent', 'ara', 'ova', 'iper', 'dyne', 'ture',
+               'ell', 'ive', 'ify', 'ium', 'labs', 'works', 'io'])
+SENDER_FORMATS = [
+    '{name} Careers <careers@{domain}>',
+    '{name} Recruiting <jobs@{domain}>',
+    '{name} via Greenhouse <no-reply@us.greenhouse-mail.io>',
+    '{name} Hiring Team <no-reply@hire.lever.co>',
+    'noreply@{tenant}.wd5.myworkdayjobs.com',
+    'LinkedIn <jobs-noreply@linkedin.com>',
+]
+HISTORY_PAGE_SIZE = 100
+RATE_LIMITED = {'error': {
+    'code': 429, 'message': 'Too many concurrent requests for user.', 'status': 'RESOURCE_EXHAUSTED',
+    'errors': [{'domain': 'usageLimits', 'reason': 'rateLimitExceeded', 'message': 'Rate Limit Exceeded'}],
+}}
+
+
+def synthetic_senders(seed, size):
+    """(From header, employer) pairs for a seeded mailbox, about one employer per 25 emails."""
+    rng = random.Random(seed)
+    count = max(4, min(2000, size // 25))
+    senders = []
+    for n in range(count):
+        name = rng.choice(NAME_PARTS[0]) + rng.choice(NAME_PARTS[1])
+        name = name if n < 400 else f'{name}{n}'
+        sender = rng.choice(SENDER_FORMATS).format(name=name, domain=f'{name.lower()}.com', tenant=name.lower())
+        senders.append((sender, name))
+    return senders
+
+
+class Mailbox:
+    """Synthetic, deterministic mailbox with a Gmail-style history.
+
+    Message i of the first `size` arrived about i hours before BASE_TIME_MS;
+    messages added later are dated when they arrive. Without a seed every
+    message comes from the same four senders and template cycle; with one,
+    sender, template and arrival time are drawn per message from it.
+    """
+
+    def __init__(self, size, seed=None):
+        self.size = size
+        self.seed = seed
+        self.lock = threading.RLock()
+        self.added = 0
+        self.arrived_at = {}
+        self.deleted = set()
+        self.history_id = 1000
+        # history.list 404s for anything older, as Gmail does once history expires
+        self.oldest_history_id = self.history_id
+        self.history = []
+        if seed is None:
+            self.senders = list(zip(SENDERS, COMPANIES))
+            self.cum_weights = None
+        else:
+            self.senders = synthetic_senders(seed, size)
+            # A few employers send most of the mail
+            self.cum_weights = list(itertools.accumulate(1 / (k + 1) for k in range(len(self.senders))))
+        self._listing = None
+
+    def _index(self, msg_id):
+        try:
+            index = int(msg_id)
+        except ValueError:
+            return None
+        if not 0 <= index < self.size + self.added or index in self.deleted:
+            return None
+        return index
+
+    def internal_date(self, index):
+        if index >= self.size:
+            return self.arrived_at[index]
+        # A scrambled offset within the message's hour keeps the order without a Random per call
+        jitter = 0 if self.seed is None else ((index + 1) * 2_654_435_761 ^ self.seed) % HOUR_MS
+        return BASE_TIME_MS - index * HOUR_MS - jitter
+
+    def message(self, msg_id, headers=None):
+        """messages.get for one id (None if there's no such message); `headers` limits the metadata headers."""
+        index = self._index(msg_id)
+        if index is None:
+            return None
+        internal_date = self.internal_date(index)
+        date = time.strftime('%a, %d %b %Y %H:%M:%S +0000', time.gmtime(internal_date / 1000))
+        if self.seed is None:
+            sender, company = self.senders[index % len(self.senders)]
+            subject, snippet = TEMPLATE_CYCLE[(index * 7) % len(TEMPLATE_CYCLE)]
+        else:
+            rng = random.Random(f'{self.seed}:{index}')
+            sender, company = rng.choices(self.senders, cum_weights=self.cum_weights)[0]
+            subject, snippet = rng.choices(TEMPLATES, TEMPLATE_WEIGHTS)[0]
+            if sender.startswith('LinkedIn'):
+                # Job boards only name the employer in the subject
+                subject = f'Your application was sent to {company}'
+        all_headers = [
+            {'name': 'Subject', 'value': subject.format(i=index, company=company)},
+            {'name': 'From', 'value': sender},
+            {'name': 'Date', 'value': date},
+        ]
+        return {
+            'id': str(index),
+            'threadId': str(index),
+            'labelIds': ['INBOX'],
+            'internalDate': str(internal_date),
+            'snippet': snippet.format(i=index, company=company),
+            'payload': {'headers': [h for h in all_headers if headers is None or h['name'] in headers]},
+        }
+
+    def listing(self):
+        # (ids, negated internal dates), newest first, rebuilt after changes
+        with self.lock:
+            if self._listing is None:
+                order = list(range(self.size + self.added - 1, self.size - 1, -1)) + list(range(self.size))
+                order = [i for i in order if i not in self.deleted]
+                self._listing = ([str(i) for i in order], [-self.internal_date(i) for i in order])
+            return self._listing
+
+    def list_page(self, query, page_token, max_results):
+        ids, negated_dates = self.listing()
+        end = len(ids)
+        after = AFTER.search(query or '')
+        if after:
+            end = bisect.bisect_right(negated_dates, -int(after.group(1)) * 1000)
+        start = int(page_token or 0)
+        stop = min(start + max_results, end)
+        result = {'messages': [{'id': i, 'threadId': i} for i in ids[start:stop]], 'resultSizeEstimate': end}
+        if stop < end:
+            result['nextPageToken'] = str(stop)
+        return result
+
+    def _record(self, kind, index):
+        self.history_id += 1
+        message = {'id': str(index), 'threadId': str(index), 'labelIds': ['INBOX']}
+        self.history.append((self.history_id, {'id': str(self.history_id), 'messages': [message],
+                                               kind: [{'message': message}]}))
+
+    def add(self, count):
+        with self.lock:
+            for _ in range(count):
+                index = self.size + self.added
+                # Never older than the message before, however fast they're added
+                self.arrived_at[index] = max(int(time.time() * 1000), self.arrived_at.get(index - 1, 0) + 1)
+                self._record('messagesAdded', index)
+                self.added += 1
+            self._listing = None
+
+    def delete(self, msg_ids):
+        with self.lock:
+            for msg_id in msg_ids:
+                index = self._index(msg_id)
+                if index is not None:
+                    self.deleted.add(index)
+                    self._record('messagesDeleted', index)
+            self._listing = None
+
+    def expire_history(self):
+        with self.lock:
+            self.oldest_history_id = self.history_id
+            self.history = []
+
+    def history_page(self, start_history_id, page_token, max_results):
+        """history.list result, or None when start_history_id has expired."""
+        with self.lock:
+            if start_history_id < self.oldest_history_id:
+                return None
+            ids = [hid for hid, _ in self.history]
+            first = bisect.bisect_right(ids, start_history_id) + int(page_token or 0)
+            records = [record for _, record in self.history[first:first + max_results]]
+            result = {'historyId': str(self.history_id)}
+            if records:
+                result['history'] = records
+            if first + max_results < len(self.history):
+                result['nextPageToken'] = str(int(page_token or 0) + max_results)
+            return result
+
+    def state(self):
+        with self.lock:
+            return {'historyId': str(self.history_id), 'messages': len(self.listing()[0])}
+
+
+class FakeGmail:
+    def __init__(self, mailbox, latency=0.0, check_tokens=False, error_rate=0.0, seed=None):
+        self.mailbox = mailbox
+        self.latency = latency
+        # When set, API calls need an access token this server issued, so
+        # clients holding a stale one go through a refresh first
+        self.check_tokens = check_tokens
+        # Share of API calls (batch parts included) answered with a 429
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.issued = set()
+        self.lock = threading.Lock()
+        self.counts = {}
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def rate_limited(self):
+        if not self.error_rate:
+            return False
+        with self.lock:
+            return self.random.random() < self.error_rate
+
+    def handle(self, method, path, query, headers, body):
+        """Returns (status, content type, body bytes) for one API call."""
+        if method == 'POST' and path == '/token':
+            self.count('token')
+            token = f'fake-{time.monotonic_ns()}'
+            with self.lock:
+                self.issued.add(token)
+            payload = {'access_token': token, 'expires_in': 3600, 'token_type': 'Bearer'}
+            if urllib.parse.parse_qs((body or b'').decode()).get('grant_type') == ['authorization_code']:
+                # A login through the backend's /callback: a new grant, so a new mailbox key
+                payload['refresh_token'] = f'refresh-{token}'
+            return self.json(200, payload)
+        if path == '/_counts':
+            with self.lock:
+                return self.json(200, dict(self.counts))
+        if path == '/_mailbox':
+            # Test control: {"add": 10, "delete": ["3"], "expire_history": true}
+            if method == 'POST':
+                change = json.loads(body or b'{}')
+                self.mailbox.add(int(change.get('add', 0)))
+                self.mailbox.delete(change.get('delete', []))
+                if change.get('expire_history'):
+                    self.mailbox.expire_history()
+            return self.json(200, self.mailbox.state())
+        if self.check_tokens and headers is not None:
+            token = (headers.get('Authorization') or '').removeprefix('Bearer ')
+            if token not in self.issued:
+                self.count('unauthorized')
+                return self.json(401, {'error': {'code': 401, 'message': 'Invalid Credentials'}})
+        if method == 'POST' and path.startswith('/batch'):
+            self.count('batch')
+            return self.batch(headers, body)
+        if self.rate_limited():
+            self.count('rate_limited')
+            return self.json(429, RATE_LIMITED)
+
+        def param(name, default=None):
+            return query.get(name, [default])[0]
+
+        if path == '/gmail/v1/users/me/messages':
+            self.count('messages.list')
+            size = min(int(param('maxResults', '100')), 500)
+            return self.json(200, self.mailbox.list_page(param('q'), param('pageToken'), size))
+
+        match = MESSAGE_PATH.match(path)
+        if match:
+            self.count('messages.get')
+            headers = query.get('metadataHeaders') if param('format') == 'metadata' else None
+            message = self.mailbox.message(match.group('id'), headers)
+            if message is None:
+                return self.json(404, {'error': {'code': 404, 'message': 'Not Found'}})
+            return self.json(200, message)
+
+        if path == '/gmail/v1/users/me/profile':
+            self.count('getProfile')
+            return self.json(200, {'emailAddress': 'me@example.com', 'historyId': self.mailbox.state()['historyId']})
+        if path == '/gmail/v1/users/me/history':
+            self.count('history.list')
+            result = self.mailbox.history_page(int(param('startHistoryId', '0')), param('pageToken'),
+                                               min(int(param('maxResults', str(HISTORY_PAGE_SIZE))), 500))
+            if result is None:
+                return self.json(404, {'error': {'code': 404, 'message': 'Requested entity was not found.'}})
+            return self.json(200, result)
+
+        return self.json(404, {'error': {'code': 404, 'message': f'No fake for {method} {path}'}})
+
+    def json(self, status, payload):
+        return status, 'application/json; charset=UTF-8', json.dumps(payload).encode()
+
+    def batch(self, headers, body):
+        boundary = 'batch_fake_gmail'
+        out = []
+        for content_id, method, url in BATCH_PART.findall(body):
+            parsed = urllib.parse.urlsplit(url.decode())
+            status, content_type, payload = self.handle(
+                method.decode(), parsed.path, urllib.parse.parse_qs(parsed.query), None, b'')
+            out.append(
+                f'--{boundary}\r\nContent-Type: application/http\r\n'
+                f'Content-ID: <response-{content_id.decode()}>\r\n\r\n'
+                f'HTTP/1.1 {status} {http.HTTPStatus(status).phrase}\r\nContent-Type: {content_type}\r\n\r\n'
+                f'{payload.decode()}\r\n'
+            )
+        out.append(f'--{boundary}--\r\n')
+        return 200, f'multipart/mixed; boundary={boundary}', ''.join(out).encode()
+
+
+def make_handler(fake):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Headers and body go out in separate writes; without this, Nagle and
+        # delayed ACKs add ~40ms to every response
+        disable_nagle_algorithm = True
+
+        def _serve(self):
+            if fake.latency:
+                time.sleep(fake.latency)
+            parsed = urllib.parse.urlsplit(self.path)
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length) if length else b''
+            status, content_type, payload = fake.handle(
+                self.command, parsed.path, urllib.parse.parse_qs(parsed.query), self.headers, body)
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        do_GET = _serve
+        do_POST = _serve
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+class Server(ThreadingHTTPServer):
+    # The default listen backlog of 5 resets connections under load tests
+    request_queue_size = 512
+    daemon_threads = True
+
+
+def serve(port=0, messages=1000, latency=0.0, check_tokens=False, seed=None, error_rate=0.0):
+    """Start the fake in a background thread; returns (server, FakeGmail)."""
+    fake = FakeGmail(Mailbox(messages, seed), latency=latency, check_tokens=check_tokens, error_rate=error_rate,
+                     seed=seed)
+    server = Server(('127.0.0.1', port), make_handler(fake))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, fake
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--messages', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every HTTP request')
+    parser.add_argument('--check-tokens', action='store_true', help='reject access tokens not issued by /token')
+    parser.add_argument('--seed', type=int, default=None, help='draw senders, templates and times from this seed')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of API calls answered with a 429')
+    args = parser.parse_args()
+    server, _ = serve(args.port, args.messages, args.latency, args.check_tokens, args.seed, args.error_rate)
+    print(f'fake Gmail on http://127.0.0.1:{server.server_port}/ with {args.messages} messages')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""A small in-memory server speaking enough of the Redis protocol for cache.RedisCache.
+
+    python bench/fake_redis.py --port 6399
+
+Then run the backend with CACHE_URL=redis://127.0.0.1:6399/0.
+"""
+import time
+import argparse
+import threading
+import socketserver
+
+COMMANDS = {}
+
+
+def command(name):
+    def register(fn):
+        COMMANDS[name] = fn
+        return fn
+    return register
+
+
+class Store:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data = {}  # key -> (expires_at or None, value)
+        self.counts = {}
+
+    def get(self, key):
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        if entry[0] is not None and entry[0] <= time.monotonic():
+            del self.data[key]
+            return None
+        return entry[1]
+
+
+@command(b'PING')
+def _ping(store, args):
+    return b'+PONG\r\n'
+
+
+@command(b'CLIENT')
+@command(b'SELECT')
+def _ok(store, args):
+    return b'+OK\r\n'
+
+
+@command(b'GET')
+def _get(store, args):
+    return bulk(store.get(args[0]))
+
+
+@command(b'MGET')
+def _mget(store, args):
+    return b'*%d\r\n' % len(args) + b''.join(bulk(store.get(key)) for key in args)
+
+
+@command(b'SET')
+def _set(store, args):
+    key, value, options = args[0], args[1], [a.upper() for a in args[2:]]
+    expires_at = None
+    if b'EX' in options:
+        expires_at = time.monotonic() + int(args[2 + options.index(b'EX') + 1])
+    elif b'PX' in options:
+        expires_at = time.monotonic() + int(args[2 + options.index(b'PX') + 1]) / 1000
+    store.data[key] = (expires_at, value)
+    return b'+OK\r\n'
+
+
+@command(b'DEL')
+def _del(store, args):
+    return b':%d\r\n' % sum(store.data.pop(key, None) is not None for key in args)
+
+
+@command(b'DBSIZE')
+def _dbsize(store, args):
+    return b':%d\r\n' % len(store.data)
+
+
+@command(b'FLUSHDB')
+def _flushdb(store, args):
+    store.data.clear()
+    return b'+OK\r\n'
+
+
+def bulk(value):
+    if value is None:
+        return b'$-1\r\n'
+    return b'$%d\r\n%s\r\n' % (len(value), value)
+
+
+def read_command(rfile):
+    # Clients send every command as an array of bulk strings
+    line = rfile.readline()
+    if not line:
+        return None
+    if not line.startswith(b'*'):
+        return line.split()
+    args = []
+    for _ in range(int(line[1:])):
+        length = int(rfile.readline()[1:])
+        args.append(rfile.read(length + 2)[:-2])
+    return args
+
+
+def make_handler(store):
+    class Handler(socketserver.StreamRequestHandler):
+        disable_nagle_algorithm = True
+
+        def handle(self):
+            while True:
+                args = read_command(self.rfile)
+                if not args:
+                    return
+                name = args[0].upper()
+                fn = COMMANDS.get(name)
+                with store.lock:
+                    store.counts[name.decode()] = store.counts.get(name.decode(), 0) + 1
+                    reply = fn(store, args[1:]) if fn else b'-ERR unknown command %s\r\n' % name
+                self.wfile.write(reply)
+
+    return Handler
+
+
+class Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+    request_queue_size = 512
+
+
+def serve(port=0):
+    """Start the server in a background thread; returns (server, Store)."""
+    store = Store()
+    server = Server(('127.0.0.1', port), make_handler(store))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, store
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=6399)
+    args = parser.parse_args()
+    server, _ = serve(args.port)
+    print(f'fake Redis on redis://127.0.0.1:{server.server_address[1]}/0')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
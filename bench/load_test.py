@@ -0,0 +1,145 @@
+"""Sync vs. gevent gunicorn workers under concurrent cold mailbox syncs.
+
+    python bench/load_test.py [--users 40] [--messages 500] [--latency 0.05]
+
+Starts bench/fake_gmail.py in its own process, then for each worker class boots the
+backend with gunicorn against it and has every simulated user request
+/emails with a fresh refresh token (so each one is a full sync), while a
+separate client probes /health. Needs gunicorn and gevent installed.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(BENCH_DIR, '..', 'backend')
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))] if values else None
+
+
+def wait_until_up(proc, url, what):
+    for _ in range(100):
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError(f'{what} did not start')
+
+
+def start_fake_gmail(messages, latency):
+    # Separate process so the fake's CPU doesn't compete with the load driver
+    port = free_port()
+    proc = subprocess.Popen([sys.executable, os.path.join(BENCH_DIR, 'fake_gmail.py'), '--port', str(port),
+                             '--messages', str(messages), '--latency', str(latency)],
+                            stdout=subprocess.DEVNULL)
+    root = f'http://127.0.0.1:{port}/'
+    wait_until_up(proc, root + 'gmail/v1/users/me/profile', 'fake Gmail')
+    return proc, root
+
+
+def start_backend(worker_class, workers, fake_root, db_dir):
+    port = free_port()
+    env = dict(os.environ,
+               GOOGLE_OAUTH_CLIENT_JSON=json.dumps({'web': {'client_id': 'bench', 'client_secret': 'bench'}}),
+               GMAIL_API_ROOT=fake_root,
+               GOOGLE_TOKEN_URI=fake_root + 'token',
+               MAILBOX_DB_PATH=os.path.join(db_dir, f'{worker_class}.db'),
+               # Measure the serving model, not the quota pacing
+               GMAIL_USER_UNITS_PER_SECOND='1000000',
+               GMAIL_PROJECT_UNITS_PER_SECOND='1000000',
+               GUNICORN_WORKER_CLASS=worker_class,
+               WEB_CONCURRENCY=str(workers))
+    proc = subprocess.Popen(['gunicorn', '-c', 'gunicorn.conf.py', '-b', f'127.0.0.1:{port}', 'app:app'],
+                            cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f'http://127.0.0.1:{port}'
+    wait_until_up(proc, base + '/health', f'gunicorn ({worker_class})')
+    return proc, base
+
+
+def run(base, users, label):
+    stop = threading.Event()
+    health = []
+
+    def probe():
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                requests.get(base + '/health', timeout=60)
+                health.append(time.perf_counter() - started)
+            except requests.RequestException:
+                health.append(60.0)
+            time.sleep(0.05)
+
+    def fetch(i):
+        headers = {'Access-Token': f'access-{label}-{i}', 'Refresh-Token': f'refresh-{label}-{i}'}
+        started = time.perf_counter()
+        response = requests.get(base + '/emails', headers=headers, timeout=300)
+        return time.perf_counter() - started, response.status_code, len(response.json())
+
+    prober = threading.Thread(target=probe, daemon=True)
+    prober.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        results = list(pool.map(fetch, range(users)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    prober.join()
+
+    latencies = [r[0] for r in results]
+    return {
+        'requests': users,
+        'errors': sum(1 for r in results if r[1] != 200),
+        'emails_per_response': results[0][2],
+        'wall_seconds': round(elapsed, 3),
+        'rps': round(users / elapsed, 2),
+        'emails_p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'emails_p99_ms': round(percentile(latencies, 99) * 1000, 1),
+        'health_p50_ms': round(percentile(health, 50) * 1000, 1),
+        'health_p99_ms': round(percentile(health, 99) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=40)
+    parser.add_argument('--messages', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.05, help='fake Gmail latency per HTTP call (s)')
+    parser.add_argument('--workers', type=int, default=2)
+    args = parser.parse_args()
+
+    fake, fake_root = start_fake_gmail(args.messages, args.latency)
+    report = {'config': vars(args), 'results': {}}
+    with tempfile.TemporaryDirectory() as db_dir:
+        for worker_class in ('sync', 'gevent'):
+            proc, base = start_backend(worker_class, args.workers, fake_root, db_dir)
+            try:
+                report['results'][worker_class] = run(base, args.users, worker_class)
+            finally:
+                proc.terminate()
+                proc.wait()
+    fake.terminate()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
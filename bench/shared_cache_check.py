@@ -0,0 +1,96 @@
+"""Check that backend processes share work through CACHE_URL.
+
+    python bench/shared_cache_check.py [--messages 300]
+
+Boots bench/fake_gmail.py (rejecting access tokens it didn't issue) and
+bench/fake_redis.py, then three single-worker gunicorn backends on the same
+CACHE_URL: A and B share a mailbox database, like two workers on one host,
+and C has its own, like another instance. The user's first request goes to A
+with a stale access token. Exits non-zero if B or C repeat work A did:
+another token refresh, stats computation or messages.get.
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+
+import requests
+
+from load_test import BACKEND_DIR, BENCH_DIR, free_port, wait_until_up
+
+
+def start(args, url, what, **kwargs):
+    proc = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **kwargs)
+    wait_until_up(proc, url, what)
+    return proc
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=300)
+    args = parser.parse_args()
+
+    gmail_port, redis_port = free_port(), free_port()
+    gmail_root = f'http://127.0.0.1:{gmail_port}/'
+    procs = [start([sys.executable, os.path.join(BENCH_DIR, 'fake_gmail.py'), '--port', str(gmail_port),
+                    '--messages', str(args.messages), '--check-tokens'], gmail_root + '_counts', 'fake Gmail')]
+    procs.append(subprocess.Popen([sys.executable, os.path.join(BENCH_DIR, 'fake_redis.py'),
+                                   '--port', str(redis_port)], stdout=subprocess.DEVNULL))
+
+    def gmail_counts():
+        return requests.get(gmail_root + '_counts').json()
+
+    headers = {'Access-Token': 'stale', 'Refresh-Token': 'refresh-shared-cache-check'}
+    report = {}
+    try:
+        with tempfile.TemporaryDirectory() as db_dir:
+            bases = {}
+            for name, db in (('A', 'shared.db'), ('B', 'shared.db'), ('C', 'other.db')):
+                port = free_port()
+                env = dict(os.environ,
+                           GOOGLE_OAUTH_CLIENT_JSON=json.dumps({'web': {'client_id': 'x', 'client_secret': 'y'}}),
+                           GMAIL_API_ROOT=gmail_root,
+                           GOOGLE_TOKEN_URI=gmail_root + 'token',
+                           CACHE_URL=f'redis://127.0.0.1:{redis_port}/0',
+                           MAILBOX_DB_PATH=os.path.join(db_dir, db),
+                           GUNICORN_WORKER_CLASS='sync',
+                           WEB_CONCURRENCY='1')
+                bases[name] = f'http://127.0.0.1:{port}'
+                procs.append(start(['gunicorn', '-c', 'gunicorn.conf.py', '-b', f'127.0.0.1:{port}', 'app:app'],
+                                   bases[name] + '/health', f'backend {name}', cwd=BACKEND_DIR, env=env))
+
+            for name in ('A', 'B', 'C'):
+                before = gmail_counts()
+                emails = requests.get(bases[name] + '/emails', headers=headers).json()
+                stats = requests.get(bases[name] + '/stats', headers=headers).json()
+                after = gmail_counts()
+                report[name] = {
+                    'emails': len(emails),
+                    'stats_total': stats['total'],
+                    'gmail_calls': {k: v - before.get(k, 0) for k, v in after.items() if v != before.get(k, 0)},
+                    'token_cache': requests.get(bases[name] + '/health/clients').json()['token_cache'],
+                    'cache': requests.get(bases[name] + '/health/cache').json(),
+                }
+    finally:
+        for proc in procs:
+            proc.terminate()
+
+    print(json.dumps(report, indent=2))
+    failures = []
+    for name in ('B', 'C'):
+        calls = report[name]['gmail_calls']
+        if calls.get('token') or calls.get('unauthorized'):
+            failures.append(f'{name} refreshed the token again')
+        if calls.get('messages.get'):
+            failures.append(f'{name} fetched {calls["messages.get"]} messages A had cached')
+    if report['B']['cache']['stats']['hits'] < 1:
+        failures.append('B recomputed the stats A cached')
+    for failure in failures:
+        print('FAIL:', failure)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+import datetime
+
+import altair as alt
+import streamlit as st
+
+from application_frame import daily_frame, weekly_frame
+from backend_client import derived, fetch_job_stats
+
+
+def plot_interactive_calendar(daily):
+    # expects one row per day: 'Date_Only' (datetime) and 'Applications'
+    heatmap_df = daily.assign(
+        Day_Num=daily['Date_Only'].dt.weekday,
+        Month_Num=daily['Date_Only'].dt.month,
+        Month=daily['Date_Only'].dt.strftime('%b'),
+        Day_Label=daily['Date_Only'].dt.day_name(),
+    )
+
+    base = alt.Chart(heatmap_df).encode(
+        x=alt.X('Day_Num:O', title='Day of Week',
+                axis=alt.Axis(labelExpr="{'0':'Mon','1':'Tue','2':'Wed','3':'Thu','4':'Fri','5':'Sat','6':'Sun'}[datum.label]")),
+        y=alt.Y('Month:O', title='Month',
+                sort=alt.EncodingSortField(field='Month_Num', order='ascending'))
+    )
+
+    heatmap = base.mark_rect().encode(
+        color=alt.Color('Applications:Q', scale=alt.Scale(scheme='greens')),
+        tooltip=[alt.Tooltip('Date_Only:T', title='Date'), alt.Tooltip('Applications:Q')]
+    )
+
+    borders = base.mark_rect(
+        fillOpacity=0,
+        stroke='black',
+        strokeWidth=0.5
+    )
+
+    chart = (heatmap + borders).properties(
+        width=700,
+        height=400,
+    )
+
+    st.altair_chart(chart, use_container_width=True)
+
+
+@st.fragment
+def render_weekly_goal(stats):
+    # In the page rather than the sidebar: fragments can't add sidebar widgets
+    weekly_goal = st.number_input(
+        "Set your weekly job application goal:",
+        min_value=1,
+        max_value=100,
+        value=10,
+        step=1,
+        help="Set your target number of job applications per week"
+    )
+
+    # Calculate weekly application progress
+    weekly = derived("weekly_frame", stats, weekly_frame)
+    current_week = datetime.date.today().isocalendar()
+    current_year_week = f"{current_week[0]}-W{str(current_week[1]).zfill(2)}"
+    count_weekly_apps = int(weekly.loc[weekly['Year_Week'] == current_year_week, 'Applications'].sum())
+
+    progress_percent = int((count_weekly_apps / weekly_goal) * 100) if weekly_goal > 0 else 0
+    progress_percent = min(progress_percent, 100)  # Cap at 100%
+    progress_text = f"📅 This Week: {count_weekly_apps} / {weekly_goal} applications"
+
+    st.markdown("### 🏁 Weekly Application Goal Tracker")
+    st.progress(progress_percent)
+    st.info(progress_text)
+
+    # Optional: Last 5 weeks summary
+    weekly_summary = weekly.sort_values('Year_Week', ascending=False).head(5)
+
+    with st.expander("📊 Weekly History (Last 5 Weeks)"):
+        st.dataframe(weekly_summary, use_container_width=True)
+
+
+def render_more_analysis():
+    try:
+        stats = fetch_job_stats()
+
+        if stats and stats['total']:
+            # --- WEEKLY ANALYSIS SECTION ---
+            st.markdown("## 📆 Weekly Job Application Goal & Progress")
+            render_weekly_goal(stats)
+
+            # --- MONTHLY/CONSISTENCY ANALYSIS SECTION ---
+            st.markdown("## 📅 Monthly Analysis & Application Consistency")
+            st.markdown("Check out the heatmap below to see how consistent you’ve been over time. It visualizes your job applications across different days and months.")
+
+            st.markdown("### 🗓️ Calendar Heatmap of Applications")
+            plot_interactive_calendar(derived("daily_frame", stats, daily_frame))
+
+        elif stats and stats.get('syncing'):
+            st.info("⏳ Still importing your mailbox from Gmail. Check back in a moment.")
+        else:
+            st.warning("No job-related emails found.")
+    except Exception as e:
+        st.error(f"Error: {e}")
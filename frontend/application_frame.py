@@ -0,0 +1,246 @@
+import datetime
+import email.utils
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from company_source import resolve_companies
+
+# "Tue, 14 Nov 2023 22:13:20 +0000 (UTC)" and the usual variations: optional
+# weekday and seconds, two-digit years, named zones.
+RFC2822_PATTERN = (
+    r'^\s*(?:[A-Za-z]{3},?\s+)?(?P<day>\d{1,2})\s+(?P<month>[A-Za-z]{3})[a-z]*\s+(?P<year>\d{2,4})'
+    r'\s+(?P<hour>\d{1,2}):(?P<minute>\d{2})(?::(?P<second>\d{2}))?'
+    r'\s*(?P<zone>[+-]\d{4}|[A-Za-z]+)?'
+)
+MONTHS = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+ZONES = {'ut': 0, 'utc': 0, 'gmt': 0, 'z': 0, 'est': -300, 'edt': -240, 'cst': -360, 'cdt': -300,
+         'mst': -420, 'mdt': -360, 'pst': -480, 'pdt': -420}
+
+STATUSES = ['applied', 'assessment', 'interview', 'offer', 'rejected', 'other']
+
+COLUMNS = ['Timestamp', 'Date', 'Date_Only', 'Year', 'Week_Num', 'Year_Week', 'Month', 'Subject', 'From', 'Company', 'Source',
+           'Status']
+
+
+def _parse_one(value):
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return np.nan
+    if parsed.tzinfo is None:
+        # "-0000" means UTC with no local zone information
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed.timestamp() * 1000
+
+
+def _zone_offset_minutes(zone):
+    if not zone:
+        return 0
+    if zone[0] in '+-' and zone[1:].isdigit() and len(zone) == 5:
+        minutes = int(zone[1:3]) * 60 + int(zone[3:5])
+        return -minutes if zone[0] == '-' else minutes
+    return ZONES.get(zone.lower(), np.nan)
+
+
+def parse_rfc2822(dates):
+    """Epoch milliseconds (float, NaN when unparseable) for a sequence of RFC 2822 date strings.
+
+    The common shapes are matched in one pass with Arrow's regex kernel and
+    converted with numpy; only rows it can't read fall back to email.utils.
+    """
+    dates = pd.Series(dates, dtype='object')
+    parts = pc.extract_regex(pa.array(dates, type=pa.string(), from_pandas=True), RFC2822_PATTERN)
+    matched = parts.is_valid().to_numpy(zero_copy_only=False)
+
+    def field(name):
+        return parts.field(name).to_numpy(zero_copy_only=False)
+
+    def ints(name):
+        values = pc.if_else(pc.equal(parts.field(name), ''), '0', parts.field(name))
+        return pc.cast(pc.fill_null(values, '0'), pa.int64()).to_numpy()
+
+    year = ints('year')
+    year = np.where(year >= 100, year, year + np.where(year < 50, 2000, 1900))
+    month = pc.index_in(pc.utf8_lower(pc.fill_null(parts.field('month'), '')),
+                        value_set=pa.array(list(MONTHS))).to_numpy(zero_copy_only=False)
+    valid = matched & ~pd.isna(month)
+    month = np.where(valid, month, 0).astype('int64')
+
+    # Calendar date -> days since the epoch, all in numpy
+    months_since_epoch = (np.where(valid, year, 1970) - 1970) * 12 + month
+    days = months_since_epoch.astype('datetime64[M]').astype('datetime64[D]').astype('int64') + ints('day') - 1
+    seconds = days * 86400 + ints('hour') * 3600 + ints('minute') * 60 + ints('second')
+
+    # Few distinct zone strings per mailbox, so resolve each once
+    zones = pd.Categorical(field('zone'))
+    zone_offsets = np.array([_zone_offset_minutes(z) for z in zones.categories] + [np.nan], dtype='float64')
+    offset_minutes = zone_offsets[zones.codes]
+
+    epoch_ms = pd.Series((seconds - offset_minutes * 60) * 1000.0, index=dates.index)
+    epoch_ms[~valid] = np.nan
+
+    missing = epoch_ms.isna() & dates.notna() & (dates != '')
+    if missing.any():
+        epoch_ms[missing] = dates[missing].map(_parse_one)
+    return epoch_ms
+
+
+def build_application_frame(records):
+    """One typed frame per mailbox snapshot, shared read-only by every page.
+
+    `records` are /emails records, or a frame of them such as
+    read_email_stream() returns. Uses the backend's internalDate
+    ('Timestamp', epoch ms) when present and parses the Date header
+    otherwise. Times are naive UTC, as before.
+    """
+    if isinstance(records, pd.DataFrame):
+        raw = records
+    else:
+        raw = pd.DataFrame.from_records(records, columns=['Subject', 'From', 'Date', 'Timestamp', 'Status'])
+    if raw.empty:
+        return pd.DataFrame({name: pd.Series(dtype='object') for name in COLUMNS})
+
+    timestamp = pd.to_numeric(raw['Timestamp'], errors='coerce')
+    if timestamp.isna().any():
+        timestamp = timestamp.fillna(parse_rfc2822(raw['Date']))
+    keep = timestamp.notna().to_numpy()
+    # .array keeps categorical columns categorical, so their values aren't hashed again
+    senders = raw['From'].array[keep]
+    company, source = resolve_companies(senders, raw['Subject'].array[keep])
+    timestamp = timestamp[keep].astype('int64').to_numpy()
+    status = raw['Status']
+    if status.isna().any():
+        # Older backends don't classify emails
+        status = status.astype('object').fillna('other')
+
+    date = pd.to_datetime(timestamp, unit='ms')
+    iso = date.isocalendar()
+    # Few distinct weeks, so label the uniques and share them through category codes
+    week_codes, week_index = np.unique(iso['year'].to_numpy(dtype='int64') * 100 + iso['week'].to_numpy(dtype='int64'),
+                                       return_inverse=True)
+    year_week = pd.Categorical.from_codes(week_index, [f"{c // 100}-W{c % 100:02d}" for c in week_codes])
+
+    frame = pd.DataFrame({
+        'Timestamp': timestamp,
+        'Date': date,
+        'Date_Only': date.normalize(),
+        'Year': date.year.astype('int32'),
+        'Week_Num': iso['week'].to_numpy(dtype='int32'),
+        'Year_Week': year_week,
+        'Month': date.to_period('M'),
+        'Subject': raw['Subject'].to_numpy()[keep],
+        'From': pd.Categorical(senders),
+        'Company': company,
+        'Source': source,
+        'Status': pd.Categorical(status.array[keep]),
+    })
+    return frame
+
+
+def read_email_stream(source, on_progress=None):
+    """(/emails records as a frame, trailer metadata) from the backend's Arrow stream.
+
+    Columns are decoded whole: timestamps stay int64 and the dictionary-encoded
+    text columns become categoricals, so no Python object is made per row.
+    on_progress(rows) is called after each record batch.
+    """
+    reader = pa.ipc.open_stream(source)
+    batches, trailer, rows = [], {}, 0
+    while True:
+        try:
+            batch, metadata = reader.read_next_batch_with_custom_metadata()
+        except StopIteration:
+            break
+        if metadata:
+            trailer.update((k.decode(), v.decode()) for k, v in metadata.items())
+        if batch.num_rows:
+            batches.append(batch)
+            rows += batch.num_rows
+            if on_progress:
+                on_progress(rows)
+    table = pa.Table.from_batches(batches, schema=reader.schema).unify_dictionaries()
+    return table.to_pandas(), trailer
+
+
+def daily_frame(stats):
+    """Applications per day from the backend's /stats series."""
+    return pd.DataFrame({
+        'Date_Only': pd.to_datetime(stats['daily']['date']),
+        'Applications': stats['daily']['applications'],
+    })
+
+
+def weekly_frame(stats):
+    """Applications per ISO year-week ("2023-W07") from the backend's /stats series."""
+    return pd.DataFrame({
+        'Year_Week': stats['weekly']['week'],
+        'Applications': stats['weekly']['applications'],
+    })
+
+
+def application_timeline(frame):
+    """(events, summary) for the Tracking page.
+
+    events has one row per email (Application, Date, Status, Subject), oldest
+    first; summary has one row per application with its first and latest
+    email, current status and the sequence of statuses it went through.
+    Emails are grouped into applications by the company they came from.
+    """
+    if frame.empty:
+        events = pd.DataFrame(columns=['Application', 'Date', 'Status', 'Subject'])
+        summary = pd.DataFrame(columns=['Application', 'Current Status', 'First Email', 'Last Update', 'Emails',
+                                        'Journey'])
+        return events, summary
+
+    events = pd.DataFrame({
+        'Application': frame['Company'].astype(str).to_numpy(),
+        'Date': frame['Date'].to_numpy(),
+        'Status': frame['Status'].astype(str).to_numpy(),
+        'Subject': frame['Subject'].to_numpy(),
+    }).sort_values('Date', kind='stable', ignore_index=True)
+
+    by_application = events.groupby('Application', sort=False)
+    summary = by_application.agg(**{
+        'First Email': ('Date', 'min'),
+        'Last Update': ('Date', 'max'),
+        'Emails': ('Status', 'size'),
+    })
+    # Unclassified follow-ups don't change where an application stands
+    known = events[events['Status'] != 'other']
+    summary['Current Status'] = known.groupby('Application', sort=False)['Status'].last()
+    summary['Current Status'] = summary['Current Status'].fillna('other')
+    changes = known[known['Status'] != known.groupby('Application', sort=False)['Status'].shift()]
+    summary['Journey'] = changes.groupby('Application', sort=False)['Status'].agg(' → '.join)
+    summary['Journey'] = summary['Journey'].fillna('')
+
+    summary = summary.reset_index().sort_values('Last Update', ascending=False, ignore_index=True)
+    return events, summary[['Application', 'Current Status', 'First Email', 'Last Update', 'Emails', 'Journey']]
+
+
+def company_summary(frame):
+    """One row per company: where its emails came from, how many of each status, first and latest.
+
+    Sorted by email count, busiest first.
+    """
+    columns = ['Company', 'Source', 'Emails'] + [s.capitalize() for s in STATUSES] + ['First Email', 'Last Update']
+    if frame.empty:
+        return pd.DataFrame(columns=columns)
+
+    by_company = frame.groupby('Company', observed=True, sort=False)
+    summary = by_company.agg(**{
+        'Emails': ('Timestamp', 'size'),
+        'First Email': ('Date', 'min'),
+        'Last Update': ('Date', 'max'),
+    })
+    # Status counts straight from the category codes of both columns
+    counts = pd.crosstab(frame['Company'], frame['Status']).reindex(columns=STATUSES, fill_value=0)
+    summary[[s.capitalize() for s in STATUSES]] = counts.reindex(summary.index).to_numpy()
+    # A company can be reached both directly and through a job board; show the usual route
+    sources = pd.crosstab(frame['Company'], frame['Source'])
+    summary['Source'] = sources.idxmax(axis=1).reindex(summary.index)
+
+    summary = summary.reset_index().sort_values(['Emails', 'Last Update'], ascending=False, ignore_index=True)
+    return summary[columns]
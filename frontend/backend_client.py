@@ -0,0 +1,247 @@
+import re
+import json
+import time
+import datetime
+
+import requests
+import streamlit as st
+
+BACKEND_BASE = st.secrets.get("BACKEND_BASE_URL", "https://jobbuddy1-0.onrender.com")
+
+
+# --- Backend calls ---
+# Backend responses are cached per session; after this many seconds they are
+# revalidated with If-None-Match, which costs a bodiless 304 when nothing changed.
+FETCH_CACHE_TTL = float(st.secrets.get("FETCH_CACHE_TTL_SECONDS", 300))
+
+
+# The compact /emails format: epoch-ms timestamps and dictionary-encoded text, zstd-compressed
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+# Session keys of frames memoized with derived(); dropped on logout
+DERIVED_FRAMES = ("application_frame", "daily_frame", "weekly_frame", "application_timeline", "company_summary",
+                  "raw_email_view", "frame_exports")
+
+
+class BackendError(Exception):
+    pass
+
+
+def auth_headers():
+    return {
+        'Access-Token': st.session_state["access_token"],
+        'Refresh-Token': st.session_state["refresh_token"]
+    }
+
+
+def debug_timings_enabled():
+    return st.session_state.get("debug_timings", False)
+
+
+def parse_server_timing(header):
+    # "build;dur=0.2, history.list;dur=4.3, total;dur=9.2" -> phases and total in ms
+    phases = {}
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        match = re.search(r"dur=([\d.]+)", params)
+        if name and match:
+            phases[name] = float(match.group(1))
+    return {'total_ms': phases.pop('total', None), 'phases_ms': phases}
+
+
+def record_backend_timings(path, response, started):
+    # The stream reader stores the trailing timings record on the response
+    timings = getattr(response, 'backend_timings', None) or parse_server_timing(response.headers.get('Server-Timing'))
+    st.session_state.setdefault("backend_timings", {})[path] = {
+        **timings,
+        'status': response.status_code,
+        'round_trip_ms': (time.perf_counter() - started) * 1000,
+    }
+
+
+def cached_backend_get(path, params, read, stream=False, headers=None):
+    cache = st.session_state.setdefault("backend_cache", {})
+    key = (path, tuple(sorted(params.items())))
+    entry = cache.get(key)
+    if entry and time.time() - entry['fetched_at'] < FETCH_CACHE_TTL:
+        return entry['data']
+
+    headers = {**auth_headers(), **(headers or {})}
+    if entry and entry['etag']:
+        headers['If-None-Match'] = entry['etag']
+    started = time.perf_counter()
+    with requests.get(f"{BACKEND_BASE}{path}", headers=headers, params=params,
+                      timeout=30, stream=stream) as response:
+        if response.status_code == 304 and entry:
+            entry['fetched_at'] = time.time()
+            if debug_timings_enabled():
+                record_backend_timings(path, response, started)
+            return entry['data']
+        if response.status_code != 200:
+            raise BackendError(f"Backend error: Status {response.status_code} - {response.text}")
+        data = read(response)
+        cache[key] = {'etag': response.headers.get('ETag'), 'data': data, 'fetched_at': time.time()}
+        if debug_timings_enabled():
+            record_backend_timings(path, response, started)
+    return data
+
+
+def expire_backend_cache(path=None):
+    # Keeps the cached data and ETags, so the next read is a cheap revalidation
+    for (cached_path, _), entry in st.session_state.get("backend_cache", {}).items():
+        if path is None or cached_path == path:
+            entry['fetched_at'] = 0
+
+
+def fetch_job_emails(on_progress=None):
+    """The job emails: a frame decoded from the backend's Arrow stream, or NDJSON records from older backends.
+
+    Both are streamed, so callers can show progress while later pages are still loading.
+    """
+    if "access_token" not in st.session_state or "refresh_token" not in st.session_state:
+        return []
+
+    def read_arrow(response):
+        from application_frame import read_email_stream
+
+        # Undo any Content-Encoding a proxy added, as iter_lines() would
+        response.raw.decode_content = True
+        emails, trailer = read_email_stream(response.raw, on_progress)
+        if 'error' in trailer:
+            raise BackendError(f"Backend error: {trailer['error']}")
+        if 'timings' in trailer:
+            response.backend_timings = json.loads(trailer['timings'])
+        return emails
+
+    def read_stream(response):
+        if response.headers.get('Content-Type', '').startswith(ARROW_STREAM):
+            return read_arrow(response)
+        job_emails = []
+        for line in response.iter_lines():
+            if not line:
+                continue
+            record = json.loads(line)
+            if 'error' in record:
+                raise BackendError(f"Backend error: {record['error']}")
+            if 'timings' in record:
+                response.backend_timings = record['timings']
+                continue
+            job_emails.append(record)
+            if on_progress and len(job_emails) % 100 == 0:
+                on_progress(len(job_emails))
+        return job_emails
+
+    try:
+        params = {'stream': 1, 'timings': 1} if debug_timings_enabled() else {'stream': 1}
+        return cached_backend_get("/emails", params, read_stream, stream=True,
+                                  headers={'Accept': f"{ARROW_STREAM}, application/x-ndjson;q=0.5"})
+    except BackendError as e:
+        st.error(str(e))
+        return []
+    except Exception as e:
+        st.error(f"Exception during fetch: {e}")
+        return []
+
+
+def fetch_job_emails_with_progress():
+    progress = st.empty()
+    data = fetch_job_emails(on_progress=lambda n: progress.caption(f"📬 Loaded {n} emails so far..."))
+    progress.empty()
+    return data
+
+
+def fetch_job_stats(start=None, end=None):
+    # Pre-aggregated counts from the backend; the payload size depends on the number of days, not emails
+    if "access_token" not in st.session_state or "refresh_token" not in st.session_state:
+        return None
+    params = {'today': datetime.date.today().isoformat()}
+    if start:
+        params['start'] = start.isoformat()
+    if end:
+        params['end'] = end.isoformat()
+    try:
+        stats = cached_backend_get("/stats", params, lambda response: response.json())
+        if stats.get('syncing'):
+            # Numbers and emails from a mailbox still being synced: ask again on the next rerun
+            expire_backend_cache("/stats")
+            expire_backend_cache("/emails")
+        return stats
+    except BackendError as e:
+        st.error(str(e))
+        return None
+    except Exception as e:
+        st.error(f"Exception during fetch: {e}")
+        return None
+
+
+def search_job_emails(query, limit=100):
+    # {'total': n, 'results': newest matching /emails records}; the backend keeps the index
+    if "access_token" not in st.session_state or "refresh_token" not in st.session_state:
+        return None
+    try:
+        return cached_backend_get("/search", {'q': query, 'limit': limit}, lambda response: response.json())
+    except BackendError as e:
+        st.error(str(e))
+        return None
+    except Exception as e:
+        st.error(f"Exception during search: {e}")
+        return None
+
+
+def import_mailbox(mailbox):
+    # Sends a Takeout .mbox to the backend; returns how many job emails it loaded, or None
+    if "access_token" not in st.session_state or "refresh_token" not in st.session_state:
+        return None
+    try:
+        response = requests.post(f"{BACKEND_BASE}/import", data=mailbox, timeout=600,
+                                 headers={**auth_headers(), 'Content-Type': 'application/mbox'})
+        if response.status_code != 200:
+            raise BackendError(f"Backend error: Status {response.status_code} - {response.text}")
+        # The imported emails show up on the next read of every page
+        expire_backend_cache()
+        return response.json()['imported']
+    except BackendError as e:
+        st.error(str(e))
+        return None
+    except Exception as e:
+        st.error(f"Exception during import: {e}")
+        return None
+
+
+def derived(name, source, build):
+    """build(source), kept in the session until the backend returns a new source object.
+
+    Fragment reruns get the same stats/emails objects back, so frames derived
+    from them are built once per backend response instead of once per
+    interaction. Callers must not modify the result.
+    """
+    cached = st.session_state.get(name)
+    if cached is None or cached[0] is not source:
+        cached = (source, build(source))
+        st.session_state[name] = cached
+    return cached[1]
+
+
+def load_application_frame():
+    # One typed frame per mailbox snapshot: rebuilt only when the cached email list is replaced.
+    # Imported here so that pages which never need the frame don't load pandas.
+    from application_frame import build_application_frame
+
+    return derived("application_frame", fetch_job_emails_with_progress(), build_application_frame)
+
+
+def render_debug_panel():
+    timings = st.session_state.get("backend_timings")
+    with st.sidebar.expander("🐞 Backend timings", expanded=True):
+        if not timings:
+            st.caption("No backend calls yet - cached responses don't reach the backend.")
+            return
+        for path, entry in timings.items():
+            total = f"{entry['total_ms']:.0f} ms on the backend, " if entry.get('total_ms') is not None else ""
+            st.markdown(f"**{path}** · {entry['status']} · {total}{entry['round_trip_ms']:.0f} ms round trip")
+            phases = [{'Phase': name, 'ms': ms} for name, ms in sorted(entry['phases_ms'].items(), key=lambda p: -p[1])]
+            if phases:
+                st.dataframe(phases, hide_index=True, use_container_width=True)
+            counts = {k: v for k, v in entry.items() if k not in ('total_ms', 'phases_ms', 'status', 'round_trip_ms')}
+            if counts:
+                st.caption(", ".join(f"{k.replace('_', ' ')}: {v}" for k, v in counts.items()))
@@ -0,0 +1,137 @@
+import re
+import email.utils
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# A mailbox has a few hundred distinct senders spread over thousands of emails
+SENDER_CACHE_SIZE = 4096
+DIRECT = 'Direct'
+UNKNOWN = 'Unknown'
+
+# Applicant tracking systems and job boards that send on an employer's behalf.
+# Subdomains match too ("us.greenhouse-mail.io", "acme.wd5.myworkdayjobs.com").
+RELAY_DOMAINS = {
+    'greenhouse.io': 'Greenhouse', 'greenhouse-mail.io': 'Greenhouse',
+    'lever.co': 'Lever',
+    'myworkday.com': 'Workday', 'myworkdayjobs.com': 'Workday', 'workday.com': 'Workday',
+    'smartrecruiters.com': 'SmartRecruiters', 'smartrecruitersmail.com': 'SmartRecruiters',
+    'icims.com': 'iCIMS', 'ashbyhq.com': 'Ashby', 'jobvite.com': 'Jobvite', 'taleo.net': 'Taleo',
+    'successfactors.com': 'SuccessFactors', 'successfactors.eu': 'SuccessFactors',
+    'bamboohr.com': 'BambooHR', 'workable.com': 'Workable', 'workablemail.com': 'Workable',
+    'breezy.hr': 'Breezy', 'recruitee.com': 'Recruitee', 'teamtailor.com': 'Teamtailor',
+    'linkedin.com': 'LinkedIn', 'indeed.com': 'Indeed', 'indeedemail.com': 'Indeed',
+    'ziprecruiter.com': 'ZipRecruiter', 'glassdoor.com': 'Glassdoor', 'wellfound.com': 'Wellfound',
+}
+# Tracking-system subdomains that aren't employer tenants
+RELAY_HOSTS = {'us', 'eu', 'mail', 'email', 'hire', 'jobs', 'app', 'notifications', 'www'}
+WEBMAIL_DOMAINS = {'gmail.com', 'googlemail.com', 'outlook.com', 'hotmail.com', 'live.com', 'yahoo.com',
+                   'icloud.com', 'me.com', 'aol.com', 'proton.me', 'protonmail.com'}
+
+# "Globex via Greenhouse", "Acme Careers", "Initech Talent Acquisition Team" -> the employer
+NAME_NOISE = re.compile(
+    r'\s*(?:\(?\bvia\s+.*$|[-|,@]\s*$|\b(?:hiring|recruiting|recruitment|talent(?:\s+acquisition)?|careers?|'
+    r'jobs?|people|hr|human\s+resources|team|notifications?|no-?reply)\s*$)',
+    re.IGNORECASE,
+)
+GENERIC_NAMES = {'', 'no-reply', 'noreply', 'do-not-reply', 'donotreply', 'notifications', 'mailer-daemon',
+                 'info', 'hello', 'support', 'admin', 'system', 'careers', 'jobs', 'recruiting', 'talent', 'hr'}
+SECOND_LEVEL = {'co', 'com', 'org', 'net', 'ac', 'gov', 'edu'}
+# Relay mail usually names the employer in the subject: "Thank you for applying
+# to Acme", "Your application at Globex Corp." Tried in order; " at " wins
+# because "applying to Senior Engineer at Acme" names the role first.
+SUBJECT_PATTERNS = [
+    r"\b(?i:at)\s+(?P<company>[A-Z0-9][\w&'.-]*(?:\s+(?:&\s+)?[A-Z0-9][\w&'.-]*)*)",
+    r"\b(?i:to|with|from|in|by)\s+(?P<company>[A-Z0-9][\w&'.-]*(?:\s+(?:&\s+)?[A-Z0-9][\w&'.-]*)*)",
+]
+
+
+def _relay_source(domain):
+    labels = domain.split('.')
+    for i in range(len(labels) - 1):
+        source = RELAY_DOMAINS.get('.'.join(labels[i:]))
+        if source:
+            return source, labels[:i]
+    return None, labels
+
+
+def _clean_name(name):
+    # Strip trailing "Careers"/"via Lever"-style words until nothing changes
+    previous = None
+    while name != previous:
+        previous, name = name, NAME_NOISE.sub('', name).strip(' "\'-|,')
+    return '' if name.lower() in GENERIC_NAMES else name
+
+
+def _domain_company(labels):
+    # acme.com -> Acme, careers.acme.co.uk -> Acme, stark-industries.com -> Stark Industries
+    if len(labels) >= 3 and labels[-2] in SECOND_LEVEL and len(labels[-1]) == 2:
+        labels = labels[:-1]
+    return labels[-2].replace('-', ' ').title() if len(labels) >= 2 else ''
+
+
+@lru_cache(maxsize=SENDER_CACHE_SIZE)
+def resolve_sender(sender):
+    """(company, source) for a From header.
+
+    source is the tracking system or job board that relayed the email, or
+    DIRECT. company is None when a relayed email's sender doesn't say who the
+    employer is; the subject has to.
+    """
+    name, address = email.utils.parseaddr(sender or '')
+    local, _, domain = address.lower().rpartition('@')
+    source, tenant = _relay_source(domain)
+    name = _clean_name(name.strip())
+
+    if source is not None:
+        # "LinkedIn Job Alerts" is the board talking, "Globex via Greenhouse" the employer
+        if name and not name.lower().startswith(source.lower()):
+            return name, source
+        # Workday and similar send from the employer's tenant: acme@myworkday.com, acme.wd5.myworkdayjobs.com
+        tenants = [t for t in tenant if t not in RELAY_HOSTS and not re.fullmatch(r'wd\d+', t)]
+        if tenants:
+            return tenants[0].capitalize(), source
+        if source == 'Workday' and local.lower() not in GENERIC_NAMES | {'workday'}:
+            return local.capitalize(), source
+        return None, source
+
+    if domain in WEBMAIL_DOMAINS or not domain:
+        # A recruiter writing from a personal address: their name is all there is
+        return name or local or sender or UNKNOWN, DIRECT
+    return name or _domain_company(domain.split('.')) or domain, DIRECT
+
+
+def companies_from_subjects(subjects):
+    """Employer named in each subject, NaN where none is found."""
+    subjects = pd.Series(subjects, dtype='object')
+    # Subjects repeat ("Thank you for applying to Acme"), so match each distinct one once
+    codes, uniques = pd.factorize(subjects)
+    found = pd.Series(np.nan, index=range(len(uniques)), dtype='object')
+    for pattern in SUBJECT_PATTERNS:
+        todo = found.isna()
+        if not todo.any():
+            break
+        extracted = pd.Series(uniques, dtype='object')[todo.to_numpy()].str.extract(pattern)['company']
+        found[todo] = extracted.str.rstrip('.!,').map(lambda c: _clean_name(c) or np.nan, na_action='ignore')
+    values = np.append(found.to_numpy(dtype=object), np.nan)
+    return pd.Series(values[codes], index=subjects.index, dtype='object')
+
+
+def resolve_companies(senders, subjects):
+    """(Company, Source) categoricals for parallel sequences of From headers and subjects.
+
+    Each distinct sender is resolved once (and memoized across calls); only
+    relayed emails whose sender doesn't name the employer look at the subject.
+    """
+    senders = pd.Categorical(senders)
+    resolved = [resolve_sender(s) for s in senders.categories]
+    # Code -1 (missing sender) picks the trailing entry
+    company = np.array([c for c, _ in resolved] + [UNKNOWN], dtype=object)[senders.codes]
+    source = np.array([s for _, s in resolved] + [DIRECT], dtype=object)[senders.codes]
+
+    unresolved = pd.isna(company)
+    if unresolved.any():
+        subjects = np.asarray(subjects, dtype=object)[unresolved]
+        company[unresolved] = companies_from_subjects(subjects).fillna(UNKNOWN).to_numpy()
+    return pd.Categorical(company), pd.Categorical(source)
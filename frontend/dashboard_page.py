@@ -0,0 +1,142 @@
+import datetime
+
+import altair as alt
+import pandas as pd
+import streamlit as st
+
+from application_frame import daily_frame
+from backend_client import derived, fetch_job_stats, load_application_frame, search_job_emails
+from frame_export import FORMATS as EXPORT_FORMATS, export_frame
+
+
+RAW_COLUMNS = ['Date', 'Subject', 'From', 'Company', 'Source', 'Status']
+
+
+# Fragments rerun on their own when one of their widgets changes; the rest of
+# the page stays as it was drawn. Arguments are the ones from the last full run.
+@st.fragment
+def render_daily_trend(stats):
+    today = datetime.date.today()
+    start_of_this_month = today.replace(day=1)
+    start_of_last_month = (start_of_this_month - datetime.timedelta(days=1)).replace(day=1)
+    end_of_last_month = start_of_this_month - datetime.timedelta(days=1)
+    two_weeks_ago = today - datetime.timedelta(days=14)
+    time_ranges = {
+        "Last 2 Weeks": (two_weeks_ago, None),
+        "This Month": (start_of_this_month, None),
+        "Last Month": (start_of_last_month, end_of_last_month),
+        "All Time": (None, None),
+    }
+
+    st.markdown("### 📅 Filter Daily Trend by Time Range")
+    date_filter = st.selectbox("Select Time Range", list(time_ranges))
+
+    daily_trend = derived("daily_frame", stats, daily_frame)
+    range_start, range_end = time_ranges[date_filter]
+    if range_start:
+        daily_trend = daily_trend[daily_trend['Date_Only'] >= pd.Timestamp(range_start)]
+    if range_end:
+        daily_trend = daily_trend[daily_trend['Date_Only'] <= pd.Timestamp(range_end)]
+
+    chart = alt.Chart(daily_trend).mark_line(point=True).encode(
+        x=alt.X('Date_Only:T', title='Date', axis=alt.Axis(labelAngle=0)),
+        y=alt.Y('Applications', title='Jobs Applied'),
+        tooltip=['Date_Only:T', 'Applications']
+    ).properties(
+        title=f"📈 Daily Job Application Trend ({date_filter})",
+        width=700,
+        height=300
+    )
+
+    st.altair_chart(chart, use_container_width=True)
+
+
+@st.fragment
+def render_email_search():
+    st.markdown("### 🔎 Search Your Applications")
+    query = st.text_input("Search emails", label_visibility="collapsed",
+                          placeholder="e.g. acme engineer*, from:greenhouse, status:interview OR status:offer").strip()
+    if not query:
+        st.caption("Words match subjects and senders, word* matches a prefix. from:, subject: and status: "
+                   "narrow a word to one field; OR gives alternatives and -word leaves matches out.")
+        return
+
+    found = search_job_emails(query)
+    if found is None:
+        return
+    if not found['total']:
+        st.info(f"No emails match “{query}”.")
+        return
+    shown = len(found['results'])
+    st.caption(f"{found['total']} matching emails" + (f", newest {shown} shown" if shown < found['total'] else ""))
+    results = pd.DataFrame(found['results'])
+    results['Date'] = pd.to_datetime(results['Timestamp'], unit='ms')
+    st.dataframe(results[['Date', 'Subject', 'From', 'Status']], hide_index=True, use_container_width=True)
+
+
+def render_export(df):
+    fmt = st.radio("Export format", list(EXPORT_FORMATS), horizontal=True)
+    # Files are only written when asked for, once per format and mailbox snapshot
+    exports = derived("frame_exports", df, lambda _: {})
+    if fmt not in exports and st.button(f"⚙️ Prepare {fmt} export"):
+        with st.spinner(f"Writing {len(df)} emails..."):
+            exports[fmt] = export_frame(df, fmt)
+    if fmt in exports:
+        _, extension, mime = EXPORT_FORMATS[fmt]
+        st.download_button(f"📥 Download Job Data as {fmt}", exports[fmt], f"job_applications.{extension}", mime)
+
+
+@st.fragment
+def render_raw_email_data():
+    # Raw rows are only downloaded when asked for
+    if st.toggle("🔍 Show raw email data and export"):
+        df = load_application_frame()
+        if not df.empty:
+            render_export(df)
+
+            with st.expander("🔍 Raw Email Data", expanded=True):
+                st.dataframe(derived("raw_email_view", df,
+                                     lambda frame: frame[RAW_COLUMNS].sort_values(by='Date', ascending=False)))
+
+
+def render_dashboard():
+    st.title("🪞 Job Application: Reflexion")
+
+    try:
+        # One all-time request shared with More Analysis; the range filter runs on the small daily series
+        stats = fetch_job_stats()
+        if stats and stats.get('syncing'):
+            st.info("⏳ Still importing your mailbox from Gmail. The numbers below cover what has arrived so far.")
+            st.button("🔄 Refresh")
+
+        # 'total' counts applications only; every stored job email is in the status counts
+        found = sum(stats.get('statuses', {}).values()) if stats else 0
+        if found:
+            st.success(f"✅ Found {found} job emails, {stats['total']} of them applications.")
+
+            col1, col2, col3 = st.columns(3)
+            col1.metric("🟢 Jobs Applied Today", stats['today'])
+            col2.metric("🕒 Jobs Applied Yesterday", stats['yesterday'])
+            col3.metric("📆 Jobs Applied Last 7 Days", stats['last_7_days'])
+
+            # ➕ Calculate average jobs per day
+            average_per_day = round(stats['avg_per_day'])  # Rounded to nearest integer
+            st.metric("📊 Avg Jobs/Day", f"{average_per_day}")
+
+            # 🧠 Smart motivational message
+            jobs_today_count = stats['today']
+            if jobs_today_count > average_per_day:
+                st.success(f"👏 You're on fire! You've applied to {jobs_today_count} jobs today, which is **more than your daily average** of {average_per_day}. Keep it up! 🚀😄")
+            elif jobs_today_count < average_per_day:
+                st.info(f"🙌 You’ve applied to {jobs_today_count} jobs today, which is **less than your average** of {average_per_day}. Keep going — small steps matter! 🌱💪")
+            else:
+                st.warning(f"🔁 You’re right on track! Today’s applications match your average of {average_per_day}. Consistency is key! 🎯")
+
+            st.markdown("---")
+            render_daily_trend(stats)
+            render_email_search()
+            render_raw_email_data()
+        elif not (stats and stats.get('syncing')):
+            st.warning("No job-related emails found.")
+    except Exception as e:
+        st.error(f"Error: {e}")
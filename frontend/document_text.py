@@ -0,0 +1,155 @@
+import io
+import os
+import atexit
+import hashlib
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import docx
+import PyPDF2
+
+# Extracted text is bounded by size rather than count: one long PDF can weigh
+# as much as hundreds of résumés
+CACHE_CHARS = int(os.environ.get("TEXT_CACHE_CHARS", str(32 * 2**20)))
+# Charged per entry on top of its text, for the key and bookkeeping, so empty
+# texts of unreadable files still count
+ENTRY_CHARS = 256
+# PDFs shorter than this aren't worth shipping to worker processes
+PARALLEL_MIN_PAGES = 16
+PDF_WORKERS = int(os.environ.get("PDF_WORKERS", os.cpu_count() or 1))
+
+
+class TextCache:
+    """Extracted text keyed by a hash of the file's bytes, least recently used evicted first.
+
+    Holds at most `maxchars` characters; a text larger than that on its own isn't kept.
+    """
+
+    def __init__(self, maxchars=CACHE_CHARS):
+        self.maxchars = maxchars
+        self.chars = 0
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            text = self._data.get(key)
+            if text is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return text
+
+    def set(self, key, text):
+        size = len(text) + ENTRY_CHARS
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.chars -= len(old) + ENTRY_CHARS
+            if size > self.maxchars:
+                return
+            self._data[key] = text
+            self.chars += size
+            while self.chars > self.maxchars:
+                _, evicted = self._data.popitem(last=False)
+                self.chars -= len(evicted) + ENTRY_CHARS
+
+
+cache = TextCache()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _process_pool():
+    # Spawned rather than forked: Streamlit runs scripts on threads, and
+    # forking a threaded process can deadlock the children.
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context('spawn'))
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+    return _pool
+
+
+def _extract_pages(data, start, stop):
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def iter_pdf_pages(data, workers=PDF_WORKERS):
+    """Yield the text of each page of a PDF, in order, as soon as it is available.
+
+    Long documents are split into contiguous page ranges extracted on a
+    process pool (PyPDF2 is pure Python, so threads wouldn't help).
+    """
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    n_pages = len(reader.pages)
+    if workers <= 1 or n_pages < PARALLEL_MIN_PAGES:
+        for page in reader.pages:
+            yield page.extract_text() or ""
+        return
+
+    # A few ranges per worker keeps them busy without resending the file for every page
+    step = max(1, -(-n_pages // (workers * 4)))
+    pool = _process_pool()
+    futures = [pool.submit(_extract_pages, data, start, min(start + step, n_pages))
+               for start in range(0, n_pages, step)]
+    try:
+        for future in futures:
+            yield from future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def _pdf_text(data):
+    return "\n".join(iter_pdf_pages(data))
+
+
+def _docx_text(data):
+    doc = docx.Document(io.BytesIO(data))
+    return "\n".join([para.text for para in doc.paragraphs if para.text])
+
+
+def _txt_text(data):
+    return data.decode("utf-8", errors="replace")
+
+
+EXTRACTORS = {".pdf": _pdf_text, ".docx": _docx_text, ".txt": _txt_text}
+
+
+def read_bytes(uploaded_file):
+    if isinstance(uploaded_file, (bytes, bytearray)):
+        return bytes(uploaded_file)
+    if hasattr(uploaded_file, "getvalue"):
+        return uploaded_file.getvalue()
+    uploaded_file.seek(0)
+    return uploaded_file.read()
+
+
+def extract_text(name, uploaded_file):
+    """Text of a PDF, DOCX or TXT file ("" if unsupported or unreadable).
+
+    Results are cached by content hash, so the same bytes are only parsed
+    once however many reruns, uploads or file names they arrive under.
+    """
+    extractor = EXTRACTORS.get(os.path.splitext(name.lower())[1])
+    if extractor is None:
+        return ""
+    data = read_bytes(uploaded_file)
+    key = (extractor.__name__, hashlib.sha256(data).hexdigest())
+    text = cache.get(key)
+    if text is None:
+        try:
+            text = extractor(data)
+        except Exception:
+            # Unreadable files are cached too, so they aren't retried every rerun
+            text = ""
+        cache.set(key, text)
+    return text
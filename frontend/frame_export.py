@@ -0,0 +1,46 @@
+import io
+
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+EXPORT_COLUMNS = ['Date', 'Subject', 'From', 'Company', 'Source', 'Status']
+# Rows written at a time, and the Parquet row group / Arrow record batch size
+CHUNK_ROWS = 10000
+
+
+def _csv(frame, out):
+    # Chunk by chunk, so the whole file never exists as one str next to its bytes
+    for start in range(0, len(frame), CHUNK_ROWS):
+        frame.iloc[start:start + CHUNK_ROWS].to_csv(out, columns=EXPORT_COLUMNS, header=start == 0, index=False,
+                                                    mode='wb')
+
+
+def _table(frame):
+    # Categorical columns become dictionary arrays; dates are stored as UTC instants
+    table = pa.Table.from_pandas(frame[EXPORT_COLUMNS], preserve_index=False)
+    index = table.schema.get_field_index('Date')
+    return table.set_column(index, 'Date', table.column('Date').cast(pa.timestamp('ms', tz='UTC')))
+
+
+def _parquet(frame, out):
+    pq.write_table(_table(frame), out, row_group_size=CHUNK_ROWS, compression='zstd')
+
+
+def _feather(frame, out):
+    feather.write_feather(_table(frame), out, compression='zstd', chunksize=CHUNK_ROWS)
+
+
+# label -> (writer, file extension, MIME type)
+FORMATS = {
+    'CSV': (_csv, 'csv', 'text/csv'),
+    'Parquet': (_parquet, 'parquet', 'application/vnd.apache.parquet'),
+    'Feather (Arrow)': (_feather, 'feather', 'application/vnd.apache.arrow.file'),
+}
+
+
+def export_frame(frame, fmt):
+    """The application frame's export columns as a file in `fmt` (a FORMATS label), as bytes."""
+    out = io.BytesIO()
+    FORMATS[fmt][0](frame, out)
+    return out.getvalue()
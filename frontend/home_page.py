@@ -0,0 +1,45 @@
+import datetime
+
+import streamlit as st
+
+from backend_client import import_mailbox
+
+
+def render_home():
+    st.title("💼 Welcome to Job Buddy1.0 : Your Companion for Job Search")
+
+    st.write("This app helps you track and analyze your job applications automatically.")
+
+    quotes = [
+        "Believe you can and you're halfway there. – Theodore Roosevelt",
+        "Your limitation—it’s only your imagination.",
+        "Push yourself, because no one else is going to do it for you.",
+        "Great things never come from comfort zones.",
+        "Dream it. Wish it. Do it.",
+        "Success doesn’t just find you. You have to go out and get it.",
+        "The harder you work for something, the greater you’ll feel when you achieve it.",
+        "Don’t watch the clock; do what it does. Keep going. – Sam Levenson",
+        "Stay positive, work hard, make it happen.",
+        "The future depends on what you do today. – Mahatma Gandhi"
+    ]
+
+    today = datetime.date.today()
+    quote_of_the_day = quotes[today.toordinal() % len(quotes)]
+
+    st.markdown(f"""
+    <div style="background-color:#DFF6FF; padding:20px; border-radius:10px; margin-bottom:20px;">
+        <h3 style="color:#007ACC; text-align:center;">✨ Daily Motivational Quote ✨</h3>
+        <p style="font-style:italic; font-size:18px; text-align:center;">"{quote_of_the_day}"</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    if "refresh_token" in st.session_state:
+        with st.expander("📥 Import a Google Takeout mailbox"):
+            st.write("Add years of history: export Mail from Google Takeout and upload the .mbox. "
+                     "Its job emails join the ones synced from Gmail.")
+            mailbox = st.file_uploader("Takeout mailbox", type=["mbox"])
+            if mailbox is not None and st.button("📥 Import"):
+                with st.spinner("Importing your mailbox..."):
+                    imported = import_mailbox(mailbox)
+                if imported is not None:
+                    st.success(f"✅ Imported {imported} job emails.")
@@ -0,0 +1,211 @@
+import os
+import re
+import zipfile
+
+import streamlit as st
+
+from document_text import extract_text
+from resume_ranking import is_keyword, rank_job_descriptions, words
+
+
+JD_SUFFIXES = (".pdf", ".docx", ".txt")
+# Reading JDs from a folder on the server is for running the app locally: set
+# JD_FOLDER_ROOT in secrets to allow folders under it. Unset, only uploads are read.
+JD_FOLDER_ROOT = st.secrets.get("JD_FOLDER_ROOT")
+# What one ranking may read, so an upload (or a zip bomb) can't exhaust the server's memory
+MAX_JD_FILES = int(st.secrets.get("MAX_JD_FILES", 200))
+MAX_JD_FILE_BYTES = 5 * 2**20
+MAX_JD_TOTAL_BYTES = 100 * 2**20
+
+
+def is_within(path, root_dir):
+    return os.path.commonpath([os.path.realpath(path), root_dir]) == root_dir
+
+
+def _read_limited(f):
+    # One byte past the limit tells an oversized file apart; a zip entry's declared size can lie
+    return f.read(MAX_JD_FILE_BYTES + 1)
+
+
+def _job_description_sources(uploaded_files, folder):
+    # (name, read) for every JD file; read() returns its bytes, cut off past MAX_JD_FILE_BYTES
+    for uploaded in uploaded_files:
+        if uploaded.name.lower().endswith(".zip"):
+            with zipfile.ZipFile(uploaded) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir() and info.filename.lower().endswith(JD_SUFFIXES):
+                        yield info.filename, lambda info=info: _read_limited(archive.open(info))
+        elif uploaded.name.lower().endswith(JD_SUFFIXES):
+            yield uploaded.name, lambda uploaded=uploaded: uploaded.getvalue()[:MAX_JD_FILE_BYTES + 1]
+    if folder:
+        root_dir = os.path.realpath(JD_FOLDER_ROOT)
+        for root, dirs, files in os.walk(folder):
+            dirs.sort()
+            for filename in sorted(files):
+                path = os.path.join(root, filename)
+                # Symlinks are followed only as far as the root
+                if filename.lower().endswith(JD_SUFFIXES) and is_within(path, root_dir):
+                    def read(path=path):
+                        with open(path, "rb") as f:
+                            return _read_limited(f)
+                    yield os.path.relpath(path, folder), read
+
+
+def resolve_folder(folder):
+    """The real path of `folder` under JD_FOLDER_ROOT, or None if folders are off or it's outside the root."""
+    if not JD_FOLDER_ROOT or not folder:
+        return None
+    root_dir = os.path.realpath(JD_FOLDER_ROOT)
+    path = os.path.realpath(os.path.join(root_dir, folder))
+    return path if is_within(path, root_dir) and os.path.isdir(path) else None
+
+
+def iter_job_description_files(uploaded_files=(), folder=None, skipped=None):
+    """(name, bytes) for the JDs among the uploads, inside uploaded zips, and under folder.
+
+    Reads at most MAX_JD_FILES files and MAX_JD_TOTAL_BYTES in all; files
+    over MAX_JD_FILE_BYTES, and the first one past either limit, are named in `skipped`.
+    """
+    count = total = 0
+    for name, read in _job_description_sources(uploaded_files, folder):
+        if count >= MAX_JD_FILES:
+            if skipped is not None:
+                skipped.append(name)
+            return
+        data = read()
+        if len(data) > MAX_JD_FILE_BYTES:
+            if skipped is not None:
+                skipped.append(name)
+            continue
+        total += len(data)
+        if total > MAX_JD_TOTAL_BYTES:
+            if skipped is not None:
+                skipped.append(name)
+            return
+        count += 1
+        yield name, data
+
+
+def simple_keyword_match_analysis(resume_text, jd_text):
+    jd_keywords = set(w for w in words(jd_text) if is_keyword(w))
+    resume_words = set(words(resume_text))
+
+    matched = jd_keywords.intersection(resume_words)
+    missing = jd_keywords - resume_words
+
+    if len(jd_keywords) == 0:
+        match_percent = 0
+    else:
+        match_percent = int(len(matched) / len(jd_keywords) * 100)
+
+    feedback = f"Match: {match_percent}%\n\n"
+
+    if match_percent >= 75:
+        feedback += "✅ Strong match! You should apply.\n"
+    else:
+        feedback += "⚠️ Needs improvement before applying.\n\n"
+        feedback += "Missing or weak skills:\n"
+        for skill in list(missing)[:5]:
+            feedback += f"- {skill}\n"
+        feedback += "\nStep-by-step plan to improve:\n"
+        feedback += "1. Add missing skills as bullet points in your resume.\n"
+        feedback += "2. Use keywords exactly as they appear in the job description.\n"
+        feedback += "3. Rewrite existing bullet points to emphasize relevant skills.\n"
+        feedback += "\nExample bullet points to add:\n"
+        for skill in list(missing)[:3]:
+            feedback += f"- Developed expertise in {skill} to achieve project goals.\n"
+        feedback += "\nFocus on these improvements before applying.\n"
+
+    return feedback
+
+
+def render_batch_ranking(resume_text):
+    jd_files = st.file_uploader("📚 Upload the Job Descriptions (PDF, DOCX, TXT or a ZIP of them)",
+                                type=["pdf", "docx", "txt", "zip"], accept_multiple_files=True)
+    folder = None
+    if JD_FOLDER_ROOT:
+        with st.expander("…or read them from a folder on this machine"):
+            folder_input = st.text_input(f"Folder under {JD_FOLDER_ROOT}", value="")
+        folder = resolve_folder(folder_input)
+        if folder_input and folder is None:
+            st.warning(f"⚠️ That isn't a folder under {JD_FOLDER_ROOT}.")
+
+    if not resume_text or not (jd_files or folder):
+        st.info("👆 Please upload a Resume and one or more Job Descriptions to begin.")
+        return
+
+    if st.button("🏁 Rank Job Descriptions"):
+        skipped = []
+        with st.spinner("Reading job descriptions..."):
+            job_descriptions = [(name, extract_text(name, data))
+                                for name, data in iter_job_description_files(jd_files, folder, skipped)]
+        unreadable = [name for name, text in job_descriptions if not text]
+        job_descriptions = [(name, text) for name, text in job_descriptions if text]
+        if skipped:
+            st.warning(f"⚠️ Read at most {MAX_JD_FILES} files of up to {MAX_JD_FILE_BYTES // 2**20} MB each "
+                       f"({MAX_JD_TOTAL_BYTES // 2**20} MB in all); left out: {', '.join(skipped[:10])}")
+        if unreadable:
+            st.warning(f"⚠️ Could not extract text from {len(unreadable)} file(s): {', '.join(unreadable[:10])}")
+        if not job_descriptions:
+            return
+
+        ranking = rank_job_descriptions(resume_text, job_descriptions)
+        st.success(f"✅ Ranked {len(ranking)} job descriptions")
+        st.dataframe(
+            ranking,
+            use_container_width=True,
+            column_config={
+                "Match %": st.column_config.ProgressColumn("Match %", min_value=0, max_value=100, format="%d%%"),
+                "TF-IDF %": st.column_config.NumberColumn("TF-IDF %", format="%.1f%%"),
+            },
+        )
+        st.download_button("⬇️ Download ranking as CSV", data=ranking.to_csv().encode("utf-8"),
+                           file_name="jd_ranking.csv", mime="text/csv")
+
+
+def render_resume_analyzer():
+    st.title("🕵️‍♂️ Resume vs Job Description Analyzer (Zero Cost)")
+
+    st.write("Upload your resume and job description (PDF or DOCX). This tool analyzes keyword match without any API or subscription.")
+
+    mode = st.radio("Mode", ["One job description", "Rank many job descriptions"], horizontal=True)
+    if mode == "Rank many job descriptions":
+        resume_file = st.file_uploader("📄 Upload your Resume (PDF or DOCX)", type=["pdf", "docx"])
+        resume_text = extract_text(resume_file.name, resume_file) if resume_file else ""
+        if resume_file and not resume_text:
+            st.warning("⚠️ Could not extract text from the resume. Please check the format.")
+        render_batch_ranking(resume_text)
+        return
+
+    resume_file = st.file_uploader("📄 Upload your Resume (PDF or DOCX)", type=["pdf", "docx"])
+    jd_file = st.file_uploader("📃 Upload the Job Description (PDF or DOCX)", type=["pdf", "docx"])
+
+    if resume_file and jd_file:
+        resume_text = extract_text(resume_file.name, resume_file)
+        jd_text = extract_text(jd_file.name, jd_file)
+
+        if not resume_text or not jd_text:
+            st.warning("⚠️ Could not extract text from one or both files. Please check the formats.")
+            return
+
+        if st.button("🔍 Analyze"):
+            with st.spinner("Analyzing..."):
+                feedback = simple_keyword_match_analysis(resume_text, jd_text)
+
+            st.success("✅ Analysis complete!")
+
+            st.markdown("### 📋 Feedback")
+            st.text_area("", value=feedback, height=400)
+
+            # Extract match % and show progress bar
+            match = re.search(r"Match:\s*(\d{1,3})\s*%", feedback)
+            if match:
+                match_score = int(match.group(1))
+                st.subheader(f"📊 Match Score: {match_score}%")
+                st.progress(match_score / 100)
+                if match_score >= 75:
+                    st.success("✅ Strong match! You should apply!")
+                else:
+                    st.warning("⚠️ Needs improvement before applying.")
+    else:
+        st.info("👆 Please upload both Resume and Job Description to begin.")
@@ -0,0 +1,88 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Same tokens as the analyzer's r'\b\w+\b' (a maximal run of \w is always
+# bounded by \b), without the boundary checks
+WORD_PATTERN = re.compile(r'\w+')
+STOPWORDS = frozenset(["and", "or", "the", "a", "an", "with", "to", "for", "of", "in", "on", "is", "are", "you", "your"])
+MISSING_SHOWN = 10
+
+
+def words(text):
+    return WORD_PATTERN.findall(text.lower())
+
+
+def is_keyword(word):
+    return word not in STOPWORDS and len(word) > 2
+
+
+def rank_job_descriptions(resume_text, job_descriptions):
+    """Rank (name, text) job descriptions by how well resume_text covers them.
+
+    Each JD is tokenized once into a shared vocabulary and a document x keyword
+    count matrix (kept as COO index arrays); both scores come from one pass over it:
+
+    - Match %: share of the JD's distinct keywords found in the resume, the
+      same number the single-JD analyzer reports.
+    - TF-IDF %: the same coverage with every keyword weighted by how often the
+      JD repeats it and how rare it is across the JDs being ranked, so
+      boilerplate shared by all postings counts for little.
+    """
+    names = [name for name, _ in job_descriptions]
+    n_docs = len(names)
+    if n_docs == 0:
+        return pd.DataFrame(columns=['Job Description', 'Match %', 'TF-IDF %', 'Keywords', 'Matched',
+                                     'Missing Keywords'])
+
+    # Tokenize each JD once, then give every distinct word one column id for
+    # the whole batch and collapse (JD, word) pairs into counts.
+    tokens = [words(text) for _, text in job_descriptions]
+    doc_of_token = np.repeat(np.arange(n_docs), [len(t) for t in tokens])
+    word_ids, terms = pd.factorize(pd.Series([w for t in tokens for w in t], dtype='object'))
+    terms = terms.tolist()
+    keep = np.array([is_keyword(w) for w in terms], dtype=bool)[word_ids]
+    n_terms = max(len(terms), 1)
+    pairs, tf = np.unique(doc_of_token[keep] * n_terms + word_ids[keep], return_counts=True)
+    rows, cols = pairs // n_terms, pairs % n_terms
+    tf = tf.astype('float64')
+
+    in_resume = pd.Index(terms, dtype='object').isin(list(set(words(resume_text))))
+    matched = in_resume[cols]
+
+    # Smoothed IDF, as in scikit-learn's TfidfTransformer
+    df = np.bincount(cols, minlength=len(terms))
+    idf = np.log((1 + n_docs) / (1 + df)) + 1
+    weight = tf * idf[cols]
+
+    keyword_total = np.bincount(rows, minlength=n_docs)
+    matched_total = np.bincount(rows, weights=matched, minlength=n_docs).astype('int64')
+    weight_total = np.bincount(rows, weights=weight, minlength=n_docs)
+    matched_weight = np.bincount(rows, weights=weight * matched, minlength=n_docs)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Same float arithmetic as int(len(matched) / len(jd_keywords) * 100)
+        match_percent = np.where(keyword_total > 0, matched_total / keyword_total * 100, 0).astype('int64')
+        tfidf_percent = np.where(weight_total > 0, matched_weight / weight_total * 100, 0.0)
+
+    # Missing keywords, heaviest first, grouped by JD
+    missing = np.flatnonzero(~matched)
+    missing = missing[np.lexsort((-weight[missing], rows[missing]))]
+    boundaries = np.searchsorted(rows[missing], np.arange(n_docs + 1))
+    missing_keywords = [
+        ', '.join(terms[c] for c in cols[missing[boundaries[d]:boundaries[d + 1]][:MISSING_SHOWN]])
+        for d in range(n_docs)
+    ]
+
+    ranking = pd.DataFrame({
+        'Job Description': names,
+        'Match %': match_percent,
+        'TF-IDF %': np.round(tfidf_percent, 1),
+        'Keywords': keyword_total,
+        'Matched': matched_total,
+        'Missing Keywords': missing_keywords,
+    })
+    ranking = ranking.sort_values(['TF-IDF %', 'Match %'], ascending=False, kind='stable')
+    ranking.index = pd.RangeIndex(1, n_docs + 1, name='Rank')
+    return ranking
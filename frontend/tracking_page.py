@@ -0,0 +1,75 @@
+import altair as alt
+import streamlit as st
+
+from application_frame import STATUSES, application_timeline, company_summary
+from backend_client import derived, load_application_frame
+
+
+STATUS_COLORS = {
+    'applied': '#4c78a8', 'assessment': '#b279a2', 'interview': '#f58518',
+    'offer': '#54a24b', 'rejected': '#e45756', 'other': '#bab0ac',
+}
+
+
+@st.fragment
+def render_status_timeline(frame):
+    events, summary = derived("application_timeline", frame, application_timeline)
+    selected = st.multiselect("Filter by current status", STATUSES,
+                              default=[s for s in STATUSES if s != 'other'])
+    search = st.text_input("🔎 Search applications", value="")
+    shown = summary[summary['Current Status'].isin(selected)]
+    if search:
+        shown = shown[shown['Application'].str.contains(search, case=False, regex=False)]
+
+    st.markdown(f"### 🧭 Status timeline ({len(shown)} applications)")
+    recent = shown.head(30)['Application']
+    timeline_events = events[events['Application'].isin(recent)]
+    scale = alt.Scale(domain=list(STATUS_COLORS), range=list(STATUS_COLORS.values()))
+    y = alt.Y('Application:N', sort=list(recent), title=None)
+    spans = alt.Chart(shown.head(30)).mark_rule(color='#dddddd', strokeWidth=2).encode(
+        x=alt.X('First Email:T', title='Date'), x2='Last Update:T', y=y
+    )
+    points = alt.Chart(timeline_events).mark_circle(size=90, opacity=0.9).encode(
+        x='Date:T', y=y,
+        color=alt.Color('Status:N', scale=scale),
+        tooltip=['Application', 'Status', 'Subject', alt.Tooltip('Date:T', format='%Y-%m-%d %H:%M')]
+    )
+    st.altair_chart((spans + points).properties(height=max(200, 22 * len(recent))), use_container_width=True)
+    if len(shown) > 30:
+        st.caption("Showing the 30 most recently updated applications; all of them are in the table below.")
+
+    st.dataframe(shown, use_container_width=True, hide_index=True)
+
+
+def render_tracking():
+    st.title("📊 Job Application & Status")
+
+    try:
+        frame = load_application_frame()
+        if frame.empty:
+            st.warning("No job-related emails found.")
+            return
+
+        _, summary = derived("application_timeline", frame, application_timeline)
+
+        st.markdown("### 🚦 Where your applications stand")
+        current = summary['Current Status'].value_counts()
+        columns = st.columns(len(STATUSES))
+        for column, status in zip(columns, STATUSES):
+            column.metric(status.capitalize(), int(current.get(status, 0)))
+
+        st.markdown("---")
+        render_status_timeline(frame)
+
+        st.markdown("### 🏢 Companies")
+        companies = derived("company_summary", frame, company_summary)
+        sources = companies.groupby('Source', observed=True)['Emails'].sum().reset_index()
+        st.altair_chart(alt.Chart(sources).mark_bar().encode(
+            x=alt.X('Emails:Q', title='Emails'),
+            y=alt.Y('Source:N', sort='-x', title=None),
+            tooltip=['Source', 'Emails']
+        ).properties(title="Where your emails came from", height=max(120, 28 * len(sources))),
+            use_container_width=True)
+        st.dataframe(companies, use_container_width=True, hide_index=True)
+    except Exception as e:
+        st.error(f"Error: {e}")
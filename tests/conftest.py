@@ -0,0 +1,48 @@
+import os
+import sys
+import json
+import importlib
+import urllib.parse
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA = os.path.join(ROOT, 'tests', 'data')
+# The backend and bench modules import each other as top-level modules
+sys.path[:0] = [os.path.join(ROOT, 'backend'), os.path.join(ROOT, 'bench')]
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    """The backend's Flask app, with bench/fake_gmail.py standing in for Google's OAuth and Gmail API."""
+    from fake_gmail import serve
+
+    server, _ = serve(messages=1)
+    root = f'http://127.0.0.1:{server.server_port}/'
+    client = {'web': {'client_id': 'test', 'client_secret': 'test', 'auth_uri': root + 'auth',
+                      'token_uri': root + 'token'}}
+    with pytest.MonkeyPatch.context() as env:
+        env.setenv('GOOGLE_OAUTH_CLIENT_JSON', json.dumps(client))
+        env.setenv('GMAIL_API_ROOT', root)
+        env.setenv('GOOGLE_TOKEN_URI', root + 'token')
+        env.setenv('MAILBOX_DB_PATH', str(tmp_path_factory.mktemp('db') / 'mailbox.db'))
+        env.setenv('BACKEND_BASE_URL', 'http://backend.test')
+        env.setenv('STREAMLIT_BASE_URL', 'http://streamlit.test')
+        env.setenv('OAUTHLIB_INSECURE_TRANSPORT', '1')
+        env.setenv('WARMUP_WORKERS', '0')
+        yield importlib.import_module('app').app
+    server.shutdown()
+    server.server_close()
+
+
+def start_login(client):
+    location = client.get('/login').headers['Location']
+    return urllib.parse.parse_qs(urllib.parse.urlparse(location).query)['state'][0]
+
+
+def sign_in(app):
+    """The token headers the frontend sends after a login through /login and /callback."""
+    browser = app.test_client()
+    response = browser.get('/callback', query_string={'state': start_login(browser), 'code': 'test'})
+    tokens = urllib.parse.parse_qs(urllib.parse.urlparse(response.headers['Location']).query)
+    return {'Access-Token': tokens['access_token'][0], 'Refresh-Token': tokens['refresh_token'][0]}
@@ -0,0 +1,33 @@
+import json
+
+from email_status import DEFAULT_PHRASES, UNMATCHED, StatusClassifier, classifier, load_phrases
+
+
+def test_a_message_gets_the_highest_priority_status_it_matches():
+    subjects = ['Thank you for applying to Acme', 'Your application to Globex', 'Our weekly digest']
+    snippets = ['', 'Unfortunately we won&#39;t be moving forward to the interview stage', '']
+
+    assert classifier.classify(subjects, snippets) == ['applied', 'rejected', UNMATCHED]
+
+
+def test_phrases_match_whole_words_only():
+    subjects = ['Your job offer from Acme', 'We have a job offers page', 'Bjob offer', 'Job offer.', 'Job',
+                'Phone screen at Acme']
+    snippets = ['', '', '', '', 'offer letter attached', '']
+
+    # A phrase doesn't straddle the subject and the snippet either
+    assert classifier.classify(subjects, snippets) == ['offer', UNMATCHED, UNMATCHED, 'offer', 'offer', 'interview']
+    assert classifier.classify(['Job'], ['offer']) == [UNMATCHED]
+
+
+def test_a_phrases_file_replaces_the_defaults_and_their_priority(tmp_path):
+    path = tmp_path / 'phrases.json'
+    path.write_text(json.dumps({'interview': ['next round'], 'rejected': ['not moving forward', 'next round']}))
+
+    custom = StatusClassifier(load_phrases(str(path)))
+
+    assert load_phrases(None) is DEFAULT_PHRASES
+    assert custom.classify(['Next round: not moving forward', 'Thank you for applying'], ['', '']) == [
+        'interview', UNMATCHED]
+    assert custom.gmail_query() == '"next round" OR "not moving forward"'
+    assert custom.version != classifier.version
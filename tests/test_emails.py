@@ -0,0 +1,23 @@
+import sys
+
+from conftest import sign_in
+
+
+def test_a_resynced_mailbox_gets_an_etag_the_next_request_can_revalidate(app, monkeypatch):
+    backend = sys.modules['app']
+    headers = sign_in(app)
+    # Not the login's warm-up: this request rebuilds the store itself
+    monkeypatch.setattr(backend.prefetcher, 'attach', lambda key: False)
+    key, _, _ = backend.open_gmail(headers['Access-Token'], headers['Refresh-Token'])
+    backend.store.reset(key)
+    client = app.test_client()
+
+    resynced = client.get('/emails', headers=headers)
+
+    assert resynced.status_code == 200 and resynced.get_json()
+    assert resynced.headers['ETag']
+    revalidated = client.get('/emails', headers=dict(headers, **{'If-None-Match': resynced.headers['ETag']}))
+    assert revalidated.status_code == 304
+    # A stream's headers go out before the rebuild ends
+    backend.store.reset(key)
+    assert 'ETag' not in client.get('/emails', query_string={'stream': '1'}, headers=headers).headers
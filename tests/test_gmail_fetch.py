@@ -0,0 +1,92 @@
+import time
+import threading
+from types import SimpleNamespace
+
+from gmail_fetch import fetch_metadata
+
+LATENCY = 0.02
+
+
+class FakeGmail:
+    """Serves messages.get one at a time or in batches, every round trip taking LATENCY seconds."""
+
+    def __init__(self, count):
+        self.messages = {}
+        for i in range(count):
+            headers = [{'name': 'Date', 'value': f'Mon, {i % 28 + 1} Jan 2024 09:00:00 +0000'},
+                       {'name': 'X-Mailer', 'value': 'fake'},
+                       {'name': 'Subject', 'value': f'Thank you for applying #{i}'}]
+            if i % 5:
+                # Some mail has no From header at all
+                headers.append({'name': 'From', 'value': f'jobs{i % 7}@example.com'})
+            self.messages[str(i)] = {'id': str(i), 'payload': {'headers': headers}}
+        self.round_trips = 0
+        self._lock = threading.Lock()
+
+    def _round_trip(self):
+        with self._lock:
+            self.round_trips += 1
+        time.sleep(LATENCY)
+
+    def _get(self, userId, id, **kwargs):
+        def execute(http=None):
+            self._round_trip()
+            return self.messages[id]
+        return SimpleNamespace(msg_id=id, execute=execute)
+
+    def users(self):
+        return SimpleNamespace(messages=lambda: SimpleNamespace(get=self._get))
+
+    def new_batch_http_request(self, callback):
+        parts = []
+
+        def execute(http=None):
+            self._round_trip()
+            for request, request_id in parts:
+                callback(request_id, self.messages[request.msg_id], None)
+
+        return SimpleNamespace(add=lambda request, request_id: parts.append((request, request_id)), execute=execute)
+
+
+def sequential_metadata(service, message_ids):
+    # The loop /emails used before batching: one messages.get per id
+    records = []
+    for msg_id in message_ids:
+        msg_data = service.users().messages().get(
+            userId='me', id=msg_id, format='metadata',
+            metadataHeaders=['Subject', 'From', 'Date']
+        ).execute()
+        headers = msg_data.get('payload', {}).get('headers', [])
+        info = {'Subject': '', 'From': '', 'Date': ''}
+        for h in headers:
+            if h['name'] in info:
+                info[h['name']] = h['value']
+        records.append(info)
+    return records
+
+
+def test_batched_fetch_matches_sequential_loop():
+    gmail = FakeGmail(120)
+    ids = [str(i) for i in reversed(range(120))]
+
+    batched = fetch_metadata(gmail, ids, batch_size=25, http_factory=object)
+
+    assert batched == sequential_metadata(gmail, ids)
+    assert [list(record) for record in batched] == [['Subject', 'From', 'Date']] * len(ids)
+
+
+def test_fetch_time_stays_flat_as_messages_grow():
+    gmail = FakeGmail(200)
+    ids = list(gmail.messages)
+
+    def timed(count):
+        started = time.perf_counter()
+        records = fetch_metadata(gmail, ids[:count], batch_size=50, workers=4, http_factory=object)
+        assert len(records) == count
+        return time.perf_counter() - started
+
+    small, large = timed(50), timed(200)
+    # Four batches in parallel cost about one round trip, where the old loop paid 200
+    assert large < 3 * small
+    assert large < 200 * LATENCY / 4
+    assert gmail.round_trips == 5
@@ -0,0 +1,88 @@
+import time
+import sqlite3
+
+from mailbox_store import MailboxStore
+
+
+def row(msg_id, subject='Thank you for applying to Acme'):
+    return {'id': msg_id, 'internal_date': 1_700_000_000_000 + int(msg_id), 'Subject': subject,
+            'From': 'jobs@acme.com', 'Date': '', 'status': 'applied'}
+
+
+def test_deleting_unstored_messages_keeps_the_revision(tmp_path):
+    store = MailboxStore(str(tmp_path / 'mailbox.db'))
+    store.upsert('user', [row('1'), row('2')])
+    revision = store.revision('user')
+
+    store.delete('user', ['99', '100'])
+    assert store.revision('user') == revision
+
+    store.delete('user', ['99', '2'])
+    assert store.revision('user') != revision
+    assert store.message_ids('user') == {'1'}
+
+
+def test_linking_a_grant_moves_its_mailbox_to_the_account(tmp_path):
+    store = MailboxStore(str(tmp_path / 'mailbox.db'))
+    # Stored before mailboxes were keyed by account: one under each login's grant
+    store.upsert('grant-1', [row('1'), dict(row('2'), source='mbox')])
+    store.set_sync_state('grant-1', '100', int(time.time()))
+    store.upsert('grant-2', [row('3'), dict(row('4'), source='mbox')])
+    store.set_sync_state('grant-2', '200', int(time.time()))
+
+    store.link_account('grant-1', 'account')
+    assert store.account('grant-1') == 'account'
+    assert store.message_ids('account') == {'1', '2'}
+    assert store.sync_state('account')[0] == '100'
+    assert store.message_ids('grant-1') == set() and store.sync_state('grant-1') == (None, None, None)
+
+    # The account has its own synced copy now; only the other grant's import joins it
+    store.link_account('grant-2', 'account')
+    assert store.message_ids('account') == {'1', '2', '4'}
+    assert store.sync_state('account')[0] == '100'
+    assert store.message_ids('grant-2') == set()
+
+
+def test_mailboxes_no_grant_links_to_are_pruned_once_stale(tmp_path):
+    store = MailboxStore(str(tmp_path / 'mailbox.db'))
+    month_ago = int(time.time()) - 31 * 24 * 3600
+    for key in ('old-grant', 'account'):
+        store.upsert(key, [row('1')])
+        store.set_sync_state(key, '100', month_ago)
+    store.upsert('fresh-grant', [row('1')])
+    store.set_sync_state('fresh-grant', '100', int(time.time()))
+    store.link_account('current-grant', 'account')
+
+    # Run whenever a store is opened
+    store = MailboxStore(store.path)
+
+    assert store.message_ids('old-grant') == set()
+    assert store.message_ids('account') == {'1'}
+    assert store.message_ids('fresh-grant') == {'1'}
+
+
+def test_opening_a_first_release_database_adds_the_new_columns(tmp_path):
+    path, synced_at = str(tmp_path / 'mailbox.db'), int(time.time())
+    with sqlite3.connect(path) as conn:
+        conn.executescript("""
+            CREATE TABLE sync_state (user_key TEXT PRIMARY KEY, history_id TEXT, synced_at INTEGER NOT NULL);
+            CREATE TABLE emails (user_key TEXT NOT NULL, message_id TEXT NOT NULL, internal_date INTEGER NOT NULL,
+                                 subject TEXT NOT NULL, sender TEXT NOT NULL, date TEXT NOT NULL,
+                                 PRIMARY KEY (user_key, message_id));
+            CREATE TABLE warmups (user_key TEXT PRIMARY KEY, started_at REAL NOT NULL, finished_at REAL,
+                                  ok INTEGER NOT NULL DEFAULT 0);
+            INSERT INTO emails VALUES ('user', '1', 1700000000000, 'Thank you for applying', 'jobs@acme.com', '');
+        """)
+        conn.execute("INSERT INTO sync_state VALUES ('user', '100', ?)", (synced_at,))
+    conn.close()
+
+    store = MailboxStore(path)
+
+    # An empty version never matches a sync version, so the user is resynced
+    assert store.sync_state('user') == ('100', synced_at, '')
+    assert store.rows_by_message_id('user', ['1'])[0]['status'] == 'other'
+    assert store.rows_by_message_id('user', ['1'])[0]['source'] == 'gmail'
+    assert store.versions('user') == {('1', '')}
+    assert store.begin_warmup('user', 'worker', 20)
+    # And a second open finds nothing left to add
+    MailboxStore(path)
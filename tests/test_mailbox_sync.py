@@ -0,0 +1,233 @@
+import re
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from email_status import StatusClassifier, classifier
+from mailbox_store import MailboxStore
+from mailbox_sync import FULL_SYNC_STALE_SECONDS, SyncInProgress, full_sync, incremental_sync, sync_mailbox
+
+QUERY = '"thank you for applying"'
+AFTER = re.compile(r'\bafter:(\d+)')
+
+
+class StubGmail:
+    """Just enough of a Gmail API client for mailbox_sync, recording every call it serves."""
+
+    def __init__(self):
+        self.messages = {}
+        self.history = []
+        self.history_id = 100
+        self.calls = []
+
+    def add(self, msg_id, subject, received_at=None, record=True):
+        received_at = time.time() if received_at is None else received_at
+        self.messages[msg_id] = {
+            'id': msg_id,
+            'internalDate': str(int(received_at * 1000)),
+            'snippet': '',
+            'payload': {'headers': [{'name': 'Subject', 'value': subject}, {'name': 'From', 'value': 'jobs@acme.com'},
+                                    {'name': 'Date', 'value': 'Mon, 1 Jan 2024 09:00:00 +0000'}]},
+        }
+        if record:
+            self.record('messagesAdded', msg_id)
+
+    def record(self, kind, msg_id, labels=None):
+        self.history_id += 1
+        item = {'message': {'id': msg_id}}
+        if labels:
+            item['labelIds'] = labels
+        self.history.append({'id': str(self.history_id), kind: [item]})
+
+    def calls_to(self, method):
+        return [kwargs for name, kwargs in self.calls if name == method]
+
+    def _request(self, method, respond):
+        def build(**kwargs):
+            def execute(http=None):
+                self.calls.append((method, kwargs))
+                return respond(**kwargs)
+            return SimpleNamespace(execute=execute)
+        return build
+
+    def _list(self, q='', **kwargs):
+        after = AFTER.search(q)
+        since = int(after.group(1)) * 1000 if after else 0
+        phrases = [p.lower() for p in re.findall(r'"([^"]+)"', q)]
+
+        def matches(message):
+            subject = message['payload']['headers'][0]['value'].lower()
+            return int(message['internalDate']) >= since and any(p in subject for p in phrases)
+
+        newest_first = sorted(self.messages.values(), key=lambda m: -int(m['internalDate']))
+        return {'messages': [{'id': m['id']} for m in newest_first if matches(m)]}
+
+    def _history(self, startHistoryId, **kwargs):
+        return {'historyId': str(self.history_id),
+                'history': [r for r in self.history if int(r['id']) > int(startHistoryId)]}
+
+    def users(self):
+        return SimpleNamespace(
+            messages=lambda: SimpleNamespace(list=self._request('messages.list', self._list),
+                                             get=self._request('messages.get', lambda id, **_: self.messages[id])),
+            history=lambda: SimpleNamespace(list=self._request('history.list', self._history)),
+            getProfile=self._request('getProfile', lambda **_: {'historyId': str(self.history_id)}),
+        )
+
+    def new_batch_http_request(self, callback):
+        parts = []
+
+        def execute(http=None):
+            for request, request_id in parts:
+                callback(request_id, request.execute(), None)
+
+        return SimpleNamespace(add=lambda request, request_id: parts.append((request, request_id)), execute=execute)
+
+
+def synced_store(tmp_path, gmail):
+    store = MailboxStore(str(tmp_path / 'mailbox.db'))
+    sync_mailbox(gmail, store, 'user', QUERY)
+    gmail.calls.clear()
+    return store
+
+
+def fetched_ids(gmail):
+    return sorted(kwargs['id'] for kwargs in gmail.calls_to('messages.get'))
+
+
+def test_warm_sync_fetches_only_the_delta(tmp_path):
+    gmail = StubGmail()
+    for i in range(5):
+        gmail.add(str(i), f'Thank you for applying to Acme #{i}')
+    store = synced_store(tmp_path, gmail)
+
+    gmail.add('10', 'Thank you for applying to Globex')
+    gmail.add('11', 'Thank you for applying to Initech')
+    assert incremental_sync(gmail, store, 'user', QUERY)
+
+    assert len(gmail.calls_to('history.list')) == 1
+    assert gmail.calls_to('getProfile') == []
+    assert fetched_ids(gmail) == ['10', '11']
+    assert store.message_ids('user') == {'0', '1', '2', '3', '4', '10', '11'}
+
+
+def test_warm_sync_without_changes_is_one_history_call(tmp_path):
+    gmail = StubGmail()
+    gmail.add('0', 'Thank you for applying to Acme')
+    store = synced_store(tmp_path, gmail)
+    revision = store.revision('user')
+
+    assert incremental_sync(gmail, store, 'user', QUERY)
+
+    assert [name for name, _ in gmail.calls] == ['history.list']
+    assert store.revision('user') == revision
+
+
+def test_mail_restored_from_trash_is_matched_whatever_its_age(tmp_path):
+    gmail = StubGmail()
+    year_ago = time.time() - 365 * 24 * 3600
+    gmail.add('old', 'Thank you for applying to Acme', received_at=year_ago)
+    gmail.add('newsletter', 'Our weekly digest', received_at=year_ago, record=False)
+    store = synced_store(tmp_path, gmail)
+    assert store.message_ids('user') == {'old'}
+
+    gmail.record('labelsAdded', 'old', ['TRASH'])
+    assert incremental_sync(gmail, store, 'user', QUERY)
+    assert store.message_ids('user') == set()
+
+    gmail.record('labelsRemoved', 'old', ['TRASH'])
+    gmail.record('labelsRemoved', 'newsletter', ['SPAM'])
+    gmail.calls.clear()
+    assert incremental_sync(gmail, store, 'user', QUERY)
+
+    assert store.message_ids('user') == {'old'}
+    assert fetched_ids(gmail) == ['old']
+
+
+def test_restored_mail_is_classified_instead_of_searched_for(tmp_path):
+    gmail = StubGmail()
+    year_ago = time.time() - 365 * 24 * 3600
+    gmail.add('old', 'Thank you for applying to Acme', received_at=year_ago)
+    gmail.add('newsletter', 'Our weekly digest', received_at=year_ago, record=False)
+    store = MailboxStore(str(tmp_path / 'mailbox.db'))
+    sync_mailbox(gmail, store, 'user', QUERY, classifier=classifier)
+
+    gmail.record('labelsAdded', 'old', ['TRASH'])
+    assert incremental_sync(gmail, store, 'user', QUERY, classifier=classifier)
+    assert store.message_ids('user') == set()
+
+    gmail.record('labelsRemoved', 'old', ['TRASH'])
+    gmail.record('labelsRemoved', 'newsletter', ['SPAM'])
+    gmail.calls.clear()
+    assert incremental_sync(gmail, store, 'user', QUERY, classifier=classifier)
+
+    assert store.message_ids('user') == {'old'}
+    assert fetched_ids(gmail) == ['newsletter', 'old']
+    assert gmail.calls_to('messages.list') == []
+
+
+def test_one_full_sync_per_user_at_a_time(tmp_path):
+    gmail = StubGmail()
+    gmail.add('0', 'Thank you for applying to Acme')
+    store = MailboxStore(str(tmp_path / 'mailbox.db'))
+
+    running = full_sync(gmail, store, 'user', QUERY)
+    next(running)
+    assert store.full_sync_running('user', FULL_SYNC_STALE_SECONDS)
+    with pytest.raises(SyncInProgress):
+        sync_mailbox(gmail, store, 'user', QUERY)
+
+    list(running)
+    assert not store.full_sync_running('user', FULL_SYNC_STALE_SECONDS)
+    assert list(full_sync(gmail, store, 'user', QUERY))
+
+
+def test_full_sync_keeps_imported_mail_and_fetches_only_the_rest(tmp_path):
+    gmail = StubGmail()
+    gmail.add('0', 'Thank you for applying to Acme')
+    gmail.add('1', 'Thank you for applying to Globex')
+    store = MailboxStore(str(tmp_path / 'mailbox.db'))
+    imported = [{'id': msg_id, 'internal_date': 1000, 'Subject': f'Thank you for applying to {company}',
+                 'From': 'jobs@example.com', 'Date': 'Mon, 1 Jan 2018 09:00:00 +0000', 'snippet': '',
+                 'status': 'applied', 'source': 'mbox'} for msg_id, company in (('1', 'Globex'), ('old', 'Initech'))]
+    store.upsert('user', imported)
+
+    pages = list(full_sync(gmail, store, 'user', QUERY, classifier=classifier))
+
+    assert fetched_ids(gmail) == ['0']
+    assert [row['id'] for rows in pages for row in rows] == ['0', '1']
+    assert store.message_ids('user') == {'0', '1', 'old'}
+    assert [row['source'] for row in store.rows_by_message_id('user', ['1', 'old'])] == ['mbox', 'mbox']
+
+
+def test_full_sync_keeps_only_mail_the_classifier_labels(tmp_path):
+    gmail = StubGmail()
+    gmail.add('0', 'Thank you for applying to Acme')
+    gmail.add('1', 'Our weekly digest')
+    store = MailboxStore(str(tmp_path / 'mailbox.db'))
+
+    # The query matches more than the classifier knows, like a phrase deep in a body
+    pages = list(full_sync(gmail, store, 'user', f'{QUERY} OR "weekly digest"', classifier=classifier))
+
+    assert fetched_ids(gmail) == ['0', '1']
+    assert [row['id'] for rows in pages for row in rows] == ['0']
+    assert store.message_ids('user') == {'0'}
+
+
+def test_changing_the_phrases_forces_a_full_resync(tmp_path):
+    gmail = StubGmail()
+    gmail.add('0', 'Thank you for applying to Acme')
+    gmail.add('1', 'Thank you for applying - coding challenge inside')
+    store = MailboxStore(str(tmp_path / 'mailbox.db'))
+    sync_mailbox(gmail, store, 'user', QUERY, classifier=classifier)
+    assert incremental_sync(gmail, store, 'user', QUERY, classifier=classifier)
+
+    applied_only = StatusClassifier({'applied': ['thank you for applying']})
+    assert not incremental_sync(gmail, store, 'user', QUERY, classifier=applied_only)
+
+    gmail.calls.clear()
+    sync_mailbox(gmail, store, 'user', QUERY, classifier=applied_only)
+    assert len(gmail.calls_to('getProfile')) == 1
+    assert store.status_counts('user') == {'applied': 2}
+    assert incremental_sync(gmail, store, 'user', QUERY, classifier=applied_only)
@@ -0,0 +1,43 @@
+import os
+import sys
+
+from conftest import DATA, sign_in
+from mbox_import import iter_mbox_rows
+
+# A Google Takeout export: a two-message thread, mail in Trash and a newsletter
+TAKEOUT = os.path.join(DATA, 'takeout.mbox')
+THREAD_ID = 1786969509593563817
+
+
+def test_takeout_separator_holds_the_message_id_not_the_thread_id():
+    rows = [row for page in iter_mbox_rows(TAKEOUT) for row in page]
+
+    assert [(row['Subject'], row['status']) for row in rows] == [
+        ('Thank you for applying to Acme', 'applied'),
+        ('Re: Thank you for applying – invitation to interview', 'interview'),
+    ]
+    first, reply = rows
+    # A thread's id is its first message's; the reply shares the thread but not the id
+    assert first['id'] == format(THREAD_ID, 'x')
+    assert reply['id'] != first['id']
+    for row in rows:
+        # Gmail ids begin with the millisecond the message arrived
+        assert abs((int(row['id'], 16) >> 20) - row['internal_date']) < 5000
+
+
+def test_import_loads_the_upload_into_the_signed_in_users_mailbox(app, monkeypatch):
+    backend = sys.modules['app']
+    headers = dict(sign_in(app), **{'Content-Type': 'application/mbox'})
+    with open(TAKEOUT, 'rb') as f:
+        mailbox = f.read()
+
+    response = app.test_client().post('/import', data=mailbox, headers=headers)
+
+    assert response.status_code == 200
+    assert response.get_json() == {'imported': 2}
+    key, _, _ = backend.open_gmail(headers['Access-Token'], headers['Refresh-Token'])
+    assert {row['id'] for page in iter_mbox_rows(TAKEOUT) for row in page} <= backend.store.message_ids(key)
+
+    monkeypatch.setattr(backend, 'IMPORT_MAX_BYTES', len(mailbox) - 1)
+    assert app.test_client().post('/import', data=mailbox, headers=headers).status_code == 413
+    assert app.test_client().post('/import', data=mailbox).status_code == 401
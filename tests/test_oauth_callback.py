@@ -0,0 +1,37 @@
+import sys
+
+from conftest import sign_in, start_login
+from mailbox_store import account_key
+
+
+def test_callback_accepts_the_state_of_its_own_login(app):
+    browser = app.test_client()
+    state = start_login(browser)
+
+    response = browser.get('/callback', query_string={'state': state, 'code': 'test'})
+
+    assert response.status_code == 302
+    assert 'refresh_token=' in response.headers['Location']
+    # A state is good for one callback
+    assert browser.get('/callback', query_string={'state': state, 'code': 'test'}).status_code == 400
+
+
+def test_callback_rejects_a_state_from_another_browser(app):
+    state = start_login(app.test_client())
+    victim = app.test_client()
+
+    assert victim.get('/callback', query_string={'state': state, 'code': 'test'}).status_code == 400
+
+    start_login(victim)
+    assert victim.get('/callback', query_string={'state': state, 'code': 'test'}).status_code == 400
+
+
+def test_every_login_of_an_account_opens_the_same_mailbox(app):
+    backend = sys.modules['app']
+    first, second = sign_in(app), sign_in(app)
+    # prompt=consent hands out a new refresh token each time
+    assert first['Refresh-Token'] != second['Refresh-Token']
+
+    keys = {backend.open_gmail(tokens['Access-Token'], tokens['Refresh-Token'])[0] for tokens in (first, second)}
+
+    assert keys == {account_key('me@example.com')}
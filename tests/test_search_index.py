@@ -0,0 +1,43 @@
+from mailbox_store import MailboxStore
+from search_index import SearchIndex
+
+
+def row(msg_id, subject, status='applied'):
+    return {'id': msg_id, 'internal_date': 1_700_000_000_000 + int(msg_id), 'Subject': subject,
+            'From': 'jobs@example.com', 'Date': '', 'status': status}
+
+
+def subjects(index, query):
+    return sorted(record['Subject'] for record in index.search(query)[1])
+
+
+def test_refresh_after_a_reset_sees_the_rows_written_again(tmp_path):
+    store = MailboxStore(str(tmp_path / 'mailbox.db'))
+    store.upsert('user', [row('1', 'Thank you for applying to Acme'), row('2', 'Thank you for applying to Initech')])
+    index = SearchIndex()
+    index.refresh(store, 'user')
+
+    # The new rows take the deleted ones' rowids
+    store.reset('user')
+    store.upsert('user', [row('3', 'Thank you for applying to Globex'),
+                          row('2', 'Thank you for applying to Initech', status='interview')])
+    index.refresh(store, 'user')
+
+    assert subjects(index, 'globex') == ['Thank you for applying to Globex']
+    assert subjects(index, 'initech') == ['Thank you for applying to Initech']
+    assert subjects(index, 'acme') == []
+    assert subjects(index, 'status:interview') == ['Thank you for applying to Initech']
+    assert len(index) == 2
+
+
+def test_refresh_replaces_a_rewritten_row(tmp_path):
+    store = MailboxStore(str(tmp_path / 'mailbox.db'))
+    store.upsert('user', [row('1', 'Thank you for applying to Acme'), row('2', 'Thank you for applying to Initech')])
+    index = SearchIndex()
+    index.refresh(store, 'user')
+
+    store.upsert('user', [row('2', 'Thank you for applying to Initech', status='rejected')])
+    index.refresh(store, 'user')
+
+    assert subjects(index, 'status:rejected') == ['Thank you for applying to Initech']
+    assert subjects(index, 'status:applied') == ['Thank you for applying to Acme']
@@ -0,0 +1,56 @@
+import time
+import sqlite3
+import threading
+
+import warmup
+from mailbox_store import MailboxStore
+from warmup import STALE_SECONDS, Prefetcher
+
+
+def claimed_by_another_worker(store, heartbeat_age=0):
+    assert store.begin_warmup('user', 'other-worker', STALE_SECONDS)
+    with sqlite3.connect(store.path) as conn:
+        conn.execute('UPDATE warmups SET heartbeat_at = ?', (time.time() - heartbeat_age,))
+
+
+def test_a_claim_left_by_a_dead_worker_holds_nobody_up(tmp_path):
+    store = MailboxStore(str(tmp_path / 'mailbox.db'))
+    claimed_by_another_worker(store, heartbeat_age=STALE_SECONDS + 1)
+    prefetcher = Prefetcher(store, workers=1)
+
+    started = time.monotonic()
+    assert not prefetcher.attach('user')
+    assert time.monotonic() - started < 1
+
+    done = threading.Event()
+    assert prefetcher.submit('user', done.set)
+    assert done.wait(5)
+
+
+def test_waiting_on_another_workers_warmup_is_capped(tmp_path):
+    store = MailboxStore(str(tmp_path / 'mailbox.db'))
+    claimed_by_another_worker(store)
+    prefetcher = Prefetcher(store, workers=1)
+
+    started = time.monotonic()
+    assert not prefetcher.attach('user', timeout=0.3)
+    assert time.monotonic() - started < 1
+    # Still live, so it isn't claimed again
+    assert prefetcher.submit('user', lambda: None)
+    assert store.warmup_state('user')[1] is None
+
+
+def test_running_warmups_keep_their_claim(tmp_path, monkeypatch):
+    monkeypatch.setattr(warmup, 'HEARTBEAT_SECONDS', 0.05)
+    store = MailboxStore(str(tmp_path / 'mailbox.db'))
+    prefetcher = Prefetcher(store, workers=1)
+    release = threading.Event()
+    assert prefetcher.submit('user', release.wait)
+
+    claimed_at = store.warmup_state('user')[0]
+    time.sleep(0.3)
+    assert store.warmup_state('user')[0] > claimed_at
+    assert not store.begin_warmup('user', 'other-worker', STALE_SECONDS)
+
+    release.set()
+    assert prefetcher.attach('user')